@@ -0,0 +1,106 @@
+"""A local stand-in for SEC EDGAR, so the fetching code can be tested offline."""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+INFO_TABLE_NS = 'http://www.sec.gov/edgar/document/thirteenf/informationtable'
+
+
+def make_filing_text(holdings):
+    """Build a full-submission .txt document whose information table lists holdings.
+
+    Each holding is a dict with issuer_name, cusip, value (in thousands), shares,
+    investment_discretion and sole/shared/none voting authority.
+    """
+    rows = ''.join(
+        '<infoTable>'
+        f'<nameOfIssuer>{h["issuer_name"]}</nameOfIssuer>'
+        '<titleOfClass>COM</titleOfClass>'
+        f'<cusip>{h["cusip"]}</cusip>'
+        f'<value>{h["value"]}</value>'
+        f'<shrsOrPrnAmt><sshPrnamt>{h["shares"]}</sshPrnamt>'
+        '<sshPrnamtType>SH</sshPrnamtType></shrsOrPrnAmt>'
+        f'<investmentDiscretion>{h.get("investment_discretion", "SOLE")}</investmentDiscretion>'
+        f'<votingAuthority><Sole>{h.get("sole", h["shares"])}</Sole>'
+        f'<Shared>{h.get("shared", 0)}</Shared><None>{h.get("none", 0)}</None>'
+        '</votingAuthority>'
+        '</infoTable>\n'
+        for h in holdings
+    )
+    return (
+        '<SEC-DOCUMENT>stub.txt\n<SEC-HEADER>\nCONFORMED SUBMISSION TYPE:\t13F-HR\n</SEC-HEADER>\n'
+        '<DOCUMENT>\n<TYPE>13F-HR\n<TEXT>\n<XML>\n<edgarSubmission/>\n</XML>\n</TEXT>\n</DOCUMENT>\n'
+        '<DOCUMENT>\n<TYPE>INFORMATION TABLE\n<TEXT>\n<XML>\n'
+        f'<informationTable xmlns="{INFO_TABLE_NS}">\n{rows}</informationTable>\n'
+        '</XML>\n</TEXT>\n</DOCUMENT>\n</SEC-DOCUMENT>\n'
+    )
+
+
+def make_submissions(filings):
+    """Build a submissions JSON body from a list of (form, filing_date, accession_number)."""
+    return json.dumps({
+        'filings': {
+            'recent': {
+                'form': [form for form, _, _ in filings],
+                'filingDate': [date for _, date, _ in filings],
+                'accessionNumber': [accession for _, _, accession in filings],
+            }
+        }
+    })
+
+
+class StubEdgar:
+    """A threaded HTTP server answering GETs from a table of routes.
+
+    routes maps a path to (status, body); fail_first maps a path to how many
+    requests should get a 503 before the real response; etags maps a path to an
+    ETag, answered with a 304 when the request's If-None-Match matches it.
+    Every request's path and arrival time is recorded in requests.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.fail_first = {}
+        self.etags = {}
+        self.requests = []
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests.append((self.path, time.monotonic()))
+                    failures = stub.fail_first.get(self.path, 0)
+                    if failures:
+                        stub.fail_first[self.path] = failures - 1
+                status, body = (503, '') if failures else stub.routes.get(self.path, (404, ''))
+                etag = stub.etags.get(self.path)
+                if status == 200 and etag and self.headers.get('If-None-Match') == etag:
+                    status, body = 304, ''
+                payload = body.encode()
+                self.send_response(status)
+                if etag:
+                    self.send_header('ETag', etag)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def paths(self):
+        with self._lock:
+            return [path for path, _ in self.requests]
@@ -0,0 +1,66 @@
+"""
+Fake 13F-HR filings for the database tests, in the shape bulk_load_filings takes, and a
+transaction that rolls them back so they never stay in the database .env points at.
+"""
+from contextlib import ExitStack
+
+import pandas as pd
+
+from db_utils import bulk_load_filings, transaction
+from filings_store import filing_period
+
+
+def make_filing(cik, accession, manager_name='Test Fund', filing_date='2025-02-14'):
+    """A filing dict for bulk_load_filings; its year and quarter are filing_date's."""
+    year, quarter = filing_period(filing_date)
+    return {
+        'manager_cik': cik,
+        'manager_name': manager_name,
+        'asset_size': None,
+        'filing_date': filing_date,
+        'year': year,
+        'quarter': quarter,
+        'raw_data_url': f'http://example.com/{accession}.txt',
+        'filing_type': '13F-HR',
+        'accession': accession,
+    }
+
+
+def make_holdings(accession, positions):
+    """
+    A holdings frame for bulk_load_filings with one row per position.
+
+    positions: dicts with cusip, shares and value, and optionally issuer_name (default
+        'Security <cusip>'), holding_ticker (default None) and investment_discretion (default 'SOLE')
+    """
+    return pd.DataFrame({
+        'accession': [accession] * len(positions),
+        'cusip': [p['cusip'] for p in positions],
+        'issuer_name': [p.get('issuer_name', f'Security {p["cusip"]}') for p in positions],
+        'holding_ticker': [p.get('holding_ticker') for p in positions],
+        'investment_discretion': [p.get('investment_discretion', 'SOLE') for p in positions],
+        'shares': pd.array([p['shares'] for p in positions], dtype='Int64'),
+        'value': pd.array([p['value'] for p in positions], dtype='Int64'),
+    })
+
+
+def load_filing(cik, accession, positions, manager_name='Test Fund', filing_date='2025-02-14', sectors=None):
+    """Loads one filing with its positions (see make_holdings); returns its filing_id."""
+    filings = [make_filing(cik, accession, manager_name, filing_date)]
+    return bulk_load_filings(filings, make_holdings(accession, positions), sectors=sectors)[accession]
+
+
+_rolled_back = ExitStack()
+
+
+def begin_rolled_back():
+    """
+    Opens a transaction that every database call joins until roll_back(), for setup_module.
+    Whatever the module's tests load (filings, securities, rollups, the data version) is undone.
+    """
+    _rolled_back.enter_context(transaction(rollback=True))
+
+
+def roll_back():
+    """Rolls back the transaction begin_rolled_back() opened, for teardown_module."""
+    _rolled_back.close()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Tests for the chat agent's answer cache (test_data_version_tracks_ingestion needs the database from .env)."""
+import os
+import tempfile
+import uuid
+from collections import namedtuple
+
+from answer_cache import (
+    AnswerCache,
+    data_version,
+    generated_sql,
+    normalize_question,
+    result_row_count,
+    serialize_steps,
+)
+from db_utils import fill_security_sectors, transaction
+from Tests.fake_filings import load_filing
+
+# Stands in for langchain's AgentAction
+Action = namedtuple('Action', ['tool', 'tool_input', 'log'])
+
+
+def temp_cache(**kwargs):
+    return AnswerCache(os.path.join(tempfile.mkdtemp(), 'answers.sqlite'), **kwargs)
+
+
+def test_near_duplicate_questions_share_an_answer():
+    """Case, punctuation and spacing don't change the cache key; the data version does."""
+    assert normalize_question('  Top holders of NVDA this quarter?') == 'top holders of nvda this quarter'
+    cache = temp_cache()
+    cache.put('Top holders of NVDA this quarter?', 'v1', 'Vanguard', [{'tool': 'sql_db_query'}], ['SELECT 1'])
+    hit = cache.get('top holders of  nvda this quarter', 'v1')
+    assert hit == {'answer': 'Vanguard', 'steps': [{'tool': 'sql_db_query'}], 'sql': ['SELECT 1']}
+    assert cache.get('top holders of nvda this quarter', 'v2') is None
+    print(f'[test_near_duplicate_questions_share_an_answer] {hit["answer"]}')
+
+
+def test_new_data_expiry_and_eviction():
+    """Answers for an older data version, expired answers and the least recently used are dropped."""
+    cache = temp_cache(max_entries=2)
+    cache.put('a', 'v1', 'A', [], [])
+    cache.put('b', 'v2', 'B', [], [])
+    assert len(cache) == 1  # 'a' was for older data
+
+    cache.put('c', 'v2', 'C', [], [])
+    cache.get('b', 'v2')  # 'b' is now more recently used than 'c'
+    cache.put('d', 'v2', 'D', [], [])
+    assert [cache.get(q, 'v2') is not None for q in 'bcd'] == [True, False, True]
+
+    expired = temp_cache(ttl=-1)
+    expired.put('a', 'v1', 'A', [], [])
+    assert expired.get('a', 'v1') is None
+    print('[test_new_data_expiry_and_eviction] stale, expired and least recently used answers dropped')
+
+
+def test_steps_are_serialized_with_their_sql():
+    """Agent steps become plain dicts, and the queries the agent ran are picked out."""
+    steps = serialize_steps([
+        (Action('sql_db_list_tables', '', 'Thought: list'), 'filings, holdings'),
+        (Action('sql_db_query', 'SELECT COUNT(*) FROM Filings', 'Thought: count'), [(42,)]),
+    ])
+    assert steps[1] == {'tool': 'sql_db_query', 'tool_input': 'SELECT COUNT(*) FROM Filings',
+                        'log': 'Thought: count', 'observation': '[(42,)]'}
+    assert generated_sql(steps) == ['SELECT COUNT(*) FROM Filings']
+    print(f'[test_steps_are_serialized_with_their_sql] {generated_sql(steps)}')
+
+
+def test_result_row_count():
+    """Rows are counted from sql_db_query's text output, whatever their values contain."""
+    output = repr([('BERKSHIRE (HATHAWAY)', 1.5), ("it's (a) ')", None), ('2025-01-01',)])
+    assert result_row_count(output) == 3
+    assert result_row_count('[]') == 0
+    assert result_row_count('') == 0
+    assert result_row_count('Error: (psycopg2.errors.UndefinedTable)') == 0
+    print(f'[test_result_row_count] {result_row_count(output)} rows')
+
+
+def load_shares(accession, shares):
+    """Loads one 13F-HR holding shares of one security (re-loading the same accession upserts it)."""
+    load_filing('9999999996', accession, [
+        {'cusip': f'ANS{accession[-6:]}', 'issuer_name': 'Answer Security',
+         'holding_ticker': f'ANS{accession[-6:]}', 'shares': shares, 'value': shares * 10},
+    ], manager_name='Answer Cache Test Fund')
+
+
+def test_data_version_tracks_ingestion():
+    """Loading a filing, re-loading it with new numbers, or filling a sector changes the data version."""
+    with transaction(rollback=True):  # leave the fake filing out of the database
+        accession = f'9999999996-25-{uuid.uuid4().int % 10**6:06d}'
+        versions = [data_version()]
+        load_shares(accession, 1)
+        versions.append(data_version())
+
+        cache = temp_cache()
+        cache.put('How many shares does the test fund hold?', versions[-1], '1', [], [])
+        load_shares(accession, 2)  # the same filing again: an upsert, with no new filing row
+        versions.append(data_version())
+        assert cache.get('How many shares does the test fund hold?', versions[-1]) is None
+
+        fill_security_sectors({f'ANS{accession[-6:]}': 'Technology'})
+        versions.append(data_version())
+        assert len(set(versions)) == len(versions)
+        print(f'[test_data_version_tracks_ingestion] {" -> ".join(versions)}')
+
+
+if __name__ == '__main__':
+    test_near_duplicate_questions_share_an_answer()
+    test_new_data_expiry_and_eviction()
+    test_steps_are_serialized_with_their_sql()
+    test_result_row_count()
+    test_data_version_tracks_ingestion()
+    print('\n✅ All tests executed.')
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""Smoke-tests for db_utils.bulk_load_filings (needs the database from .env)."""
+import time
+import uuid
+
+import pandas as pd
+
+from db_utils import bulk_load_filings, portfolio_weights, transaction
+from populate_db import group_batches
+from Tests.fake_filings import begin_rolled_back, make_filing, make_holdings, roll_back
+
+MANAGER_CIK = '9999999999'
+
+
+def setup_module(module=None):
+    begin_rolled_back()
+
+
+def teardown_module(module=None):
+    roll_back()
+
+
+def make_batch(num_filings, holdings_per_filing):
+    """Filings with unique accessions, sharing a pool of CUSIPs so some securities already exist."""
+    run_id = uuid.uuid4().int % 1_000_000
+    accessions = [f'9999999999-25-{(run_id + i) % 1_000_000:06d}' for i in range(num_filings)]
+    positions = [
+        {'cusip': f'BULK{j:05d}', 'issuer_name': f'Bulk Security {j}', 'shares': j, 'value': j * 10}
+        for j in range(holdings_per_filing)
+    ]
+    filings = [make_filing(MANAGER_CIK, accession, 'Bulk Test Fund') for accession in accessions]
+    holdings = pd.concat([make_holdings(accession, positions) for accession in accessions], ignore_index=True)
+    return filings, holdings
+
+
+def count_holdings(filing_ids):
+    with transaction() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                'SELECT COUNT(*) FROM Holdings WHERE filing_id = ANY(%s);',
+                (list(filing_ids),),
+            )
+            return cur.fetchone()[0]
+
+
+def test_bulk_load_inserts_every_holding():
+    """Every filing gets an id and every holding with a CUSIP lands in Holdings."""
+    filings, holdings = make_batch(3, 50)
+    holdings.loc[0, 'cusip'] = None  # no CUSIP, so it cannot be linked to a security
+    filing_ids = bulk_load_filings(filings, holdings)
+    assert set(filing_ids) == {f['accession'] for f in filings}
+    assert count_holdings(filing_ids.values()) == len(holdings) - 1
+    print(f'[test_bulk_load_inserts_every_holding] {len(filing_ids)} filings, {len(holdings) - 1} holdings')
+
+
+def test_portfolio_weights():
+    """Weights are each holding's share of its filing's value; totals count distinct rows."""
+    holdings = pd.DataFrame({
+        'filing_id': [1, 1, 1, 2, 3],
+        'cusip': ['A', 'A', 'B', 'A', 'A'],
+        'investment_discretion': ['SOLE', 'SOLE', 'SOLE', 'SOLE', 'SOLE'],
+        'value': pd.array([30, 10, 60, 5, 0], dtype='Int64'),
+    })
+    weighted, totals = portfolio_weights(holdings)
+    assert list(weighted['weight'][:4]) == [0.3, 0.1, 0.6, 1.0]
+    assert pd.isna(weighted['weight'][4])  # a filing worth nothing has no weights
+    assert totals.loc[1].tolist() == [100, 2]
+    assert totals.loc[3].tolist() == [0, 1]
+    print(f'[test_portfolio_weights] {weighted["weight"].tolist()}')
+
+
+def test_group_batches():
+    """Per-CIK frames are regrouped into batches of at least batch_size filings, lazily."""
+    frames = [pd.DataFrame({'accession': [f'{cik}-{i}' for i in range(n)]}) for cik, n in enumerate([2, 1, 3, 1])]
+    consumed = []
+
+    def fetched():
+        for frame in frames:
+            consumed.append(frame)
+            yield frame
+
+    groups = group_batches(fetched(), 3)
+    first = next(groups)
+    assert first['accession'].tolist() == ['0-0', '0-1', '1-0']
+    assert len(consumed) == 2  # nothing is fetched ahead of the batch being loaded
+    assert [len(group) for group in groups] == [3, 1]
+    print(f'[test_group_batches] batches of {len(first)}, 3 and 1 filings')
+
+
+def test_bulk_load_stores_weights_and_totals():
+    """Stored weights sum to 1 per filing and match the filing's total_value."""
+    filings, holdings = make_batch(2, 20)
+    filing_ids = bulk_load_filings(filings, holdings)
+    with transaction() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT f.total_value, f.position_count, SUM(h.market_value), SUM(h.weight), COUNT(*)
+                FROM Filings f JOIN Holdings h ON h.filing_id = f.filing_id
+                WHERE f.filing_id = ANY(%s)
+                GROUP BY f.filing_id;
+            """, (list(filing_ids.values()),))
+            for total_value, position_count, value_sum, weight_sum, rows in cur.fetchall():
+                assert total_value == value_sum and position_count == rows
+                assert abs(weight_sum - 1) < 1e-9
+    print(f'[test_bulk_load_stores_weights_and_totals] {len(filing_ids)} filings, weights sum to 1')
+
+
+def test_bulk_load_throughput():
+    """Loads 100k holdings and reports the rate."""
+    filings, holdings = make_batch(20, 5_000)
+    start = time.perf_counter()
+    filing_ids = bulk_load_filings(filings, holdings)
+    elapsed = time.perf_counter() - start
+    assert count_holdings(filing_ids.values()) == len(holdings)
+    print(f'[test_bulk_load_throughput] {len(holdings)} holdings in {elapsed:.2f}s '
+          f'({len(holdings) / elapsed:,.0f} holdings/s)')
+
+
+if __name__ == '__main__':
+    setup_module()
+    test_bulk_load_inserts_every_holding()
+    test_portfolio_weights()
+    test_group_batches()
+    test_bulk_load_stores_weights_and_totals()
+    test_bulk_load_throughput()
+    teardown_module()
+    print('\n✅ All tests executed.')
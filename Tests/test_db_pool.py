@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Smoke-tests for the pooled transaction() unit of work (needs the database from .env)."""
+from db_utils import (
+    get_pool,
+    insert_filing,
+    insert_investment_manager,
+    transaction,
+)
+
+MANAGER_CIK = '9999999998'
+
+
+def count_filings(raw_data_url):
+    with transaction() as conn:
+        with conn.cursor() as cur:
+            cur.execute('SELECT COUNT(*) FROM Filings WHERE raw_data_url = %s;', (raw_data_url,))
+            return cur.fetchone()[0]
+
+
+def teardown_module(module=None):
+    """The first test has to commit for real, so delete the test fund afterwards."""
+    with transaction() as conn:
+        with conn.cursor() as cur:
+            cur.execute('DELETE FROM Filings WHERE manager_cik = %s;', (MANAGER_CIK,))
+            cur.execute('DELETE FROM InvestmentManagers WHERE cik = %s;', (MANAGER_CIK,))
+
+
+def test_inserts_share_one_transaction():
+    """Calls inside a transaction() block run on its connection and commit together."""
+    url = 'http://example.com/pool/commit.txt'
+    before = count_filings(url)
+    with transaction() as conn:
+        insert_investment_manager(MANAGER_CIK, 'Pool Test Fund', None)
+        insert_filing(MANAGER_CIK, '2025-02-14', 2025, 1, url, '13F-HR')
+        with transaction() as inner:
+            assert inner is conn
+    assert count_filings(url) == before + 1
+    print('[test_inserts_share_one_transaction] committed once')
+
+
+def test_failure_rolls_back_the_whole_unit():
+    """An error after some inserts leaves nothing from the block behind."""
+    url = 'http://example.com/pool/rollback.txt'
+    try:
+        with transaction():
+            insert_investment_manager(MANAGER_CIK, 'Pool Test Fund', None)
+            insert_filing(MANAGER_CIK, '2025-02-14', 2025, 1, url, '13F-HR')
+            raise RuntimeError('holding failed')
+    except RuntimeError:
+        pass
+    assert count_filings(url) == 0
+    print('[test_failure_rolls_back_the_whole_unit] rolled back')
+
+
+def test_connections_are_reused():
+    """Sequential transactions borrow the same pooled connection instead of reconnecting."""
+    with transaction() as first:
+        pass
+    with transaction() as second:
+        pass
+    assert first is second
+    assert not first.closed
+    print(f'[test_connections_are_reused] pool max={get_pool().maxconn}')
+
+
+if __name__ == '__main__':
+    test_inserts_share_one_transaction()
+    test_failure_rolls_back_the_whole_unit()
+    test_connections_are_reused()
+    teardown_module()
+    print('\n✅ All tests executed.')
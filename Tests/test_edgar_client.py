@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""Tests for the EDGAR client and concurrent fetching, against a local stub server."""
+import os
+import tempfile
+import time
+
+from edgar_client import EdgarClient, ResponseCache, TokenBucket
+from get_filings import fetch_holdings_data, get_all_13f_filings, get_filings, iter_13f_filings
+from Tests.edgar_stub import StubEdgar, make_filing_text, make_submissions
+from yahoo_info import YahooInfo
+
+CIK = '0000320193'
+ACCESSIONS = ['0000320193-25-000001', '0000320193-24-000009']
+HOLDINGS = [
+    {'issuer_name': 'APPLE INC', 'cusip': '037833100', 'value': 1000, 'shares': 500},
+    {'issuer_name': 'MICROSOFT CORP', 'cusip': '594918104', 'value': 2000, 'shares': 300},
+]
+
+
+def filing_path(accession):
+    return f'/Archives/edgar/data/{int(CIK)}/{accession.replace("-", "")}/{accession}.txt'
+
+
+def stub_client(stub, **kwargs):
+    kwargs.setdefault('backoff', 0.01)
+    return EdgarClient(data_url=stub.url, archives_url=stub.url, **kwargs)
+
+
+def serve_cik(stub):
+    stub.routes[f'/submissions/CIK{CIK}.json'] = (200, make_submissions([
+        ('13F-HR', '2025-02-10', ACCESSIONS[0]),
+        ('10-K', '2024-11-01', '0000320193-24-000123'),
+        ('13F-HR', '2024-11-12', ACCESSIONS[1]),
+    ]))
+    for accession in ACCESSIONS:
+        stub.routes[filing_path(accession)] = (200, make_filing_text(HOLDINGS))
+
+
+def test_token_bucket_spacing():
+    """Acquiring n tokens at rate r takes at least (n - 1) / r seconds."""
+    bucket = TokenBucket(rate=50)
+    start = time.monotonic()
+    for _ in range(11):
+        bucket.acquire()
+    assert time.monotonic() - start >= 10 / 50 * 0.9
+
+
+def test_retries_on_server_errors():
+    """503s are retried with backoff until the real response comes through."""
+    with StubEdgar() as stub:
+        stub.routes['/flaky'] = (200, 'ok')
+        stub.fail_first['/flaky'] = 2
+        client = stub_client(stub)
+        response = client.get(f'{stub.url}/flaky')
+        assert response.status_code == 200 and response.text == 'ok'
+        assert stub.paths().count('/flaky') == 3
+
+        stub.routes['/down'] = (200, 'never')
+        stub.fail_first['/down'] = 10
+        assert stub_client(stub, max_retries=1).get(f'{stub.url}/down').status_code == 503
+
+
+def test_rate_limit_across_threads():
+    """Concurrent requests from many threads still respect the shared rate."""
+    with StubEdgar() as stub:
+        stub.routes['/doc'] = (200, 'x')
+        client = stub_client(stub, rate=20, max_workers=8)
+        futures = [client.submit(client.get, f'{stub.url}/doc') for _ in range(21)]
+        assert all(f.result().status_code == 200 for f in futures)
+        times = sorted(t for _, t in stub.requests)
+        assert times[-1] - times[0] >= 20 / 20 * 0.9
+
+
+def test_get_filings_from_stub():
+    """get_filings lists only 13F forms and parses each filing's holdings."""
+    with StubEdgar() as stub:
+        serve_cik(stub)
+        client = stub_client(stub)
+        filings = get_filings(CIK, client)
+        print(filings[['form', 'date', 'text_url']])
+        assert filings['form'].tolist() == ['13F-HR', '13F-HR']
+        assert filings['text_url'].tolist() == [stub.url + filing_path(a) for a in ACCESSIONS]
+        holdings = filings['data'].iloc[0]
+        assert holdings['cusip'].tolist() == ['037833100', '594918104']
+        assert holdings['value'].tolist() == [1_000_000, 2_000_000]
+        assert holdings['holding_ticker'].tolist() == ['AAPL', 'MSFT']
+
+
+def test_get_filings_incremental():
+    """Filings already ingested, or older than the high-water mark, are not downloaded."""
+    with StubEdgar() as stub:
+        serve_cik(stub)
+        client = stub_client(stub)
+        filings = get_filings(CIK, client, skip_accessions={ACCESSIONS[1]})
+        assert filings['accession'].tolist() == [ACCESSIONS[0]]
+        assert filing_path(ACCESSIONS[1]) not in stub.paths()
+
+        assert get_filings(CIK, client, since='2025-02-11').empty
+        assert get_filings(CIK, client, skip_accessions=set(ACCESSIONS), since='2024-01-01').empty
+        assert stub.paths().count(filing_path(ACCESSIONS[0])) == 1
+
+
+def test_iter_13f_filings_yields_per_cik():
+    """Each CIK with filings comes out as its own enriched batch; get_all_13f_filings joins them."""
+    yahoo = YahooInfo(fetcher=lambda ticker: {'sector': 'Technology'})
+    with StubEdgar() as stub:
+        # Only Apple's submissions exist; the other demo CIKs answer 404 and are skipped
+        serve_cik(stub)
+        client = stub_client(stub)
+        batches = list(iter_13f_filings(MAX_NUM_TO_FETCH=0, client=client, yahoo=yahoo))
+        assert len(batches) == 1
+        assert batches[0]['accession'].tolist() == ACCESSIONS
+        assert batches[0]['Ticker Symbol'].tolist() == ['AAPL', 'AAPL']
+        assert batches[0]['Sector/Industry'].tolist() == ['Technology', 'Technology']
+
+        combined = get_all_13f_filings(MAX_NUM_TO_FETCH=0, client=client, yahoo=yahoo)
+        assert combined['accession'].tolist() == ACCESSIONS
+    print(f'[test_iter_13f_filings_yields_per_cik] {len(batches)} batch, {yahoo.fetched} Yahoo lookups')
+
+
+def test_fetch_holdings_data_missing_document():
+    """A filing that cannot be fetched yields an empty frame."""
+    with StubEdgar() as stub:
+        assert fetch_holdings_data(f'{stub.url}/missing.txt', client=stub_client(stub)).empty
+
+
+def test_response_cache_immutable_documents():
+    """Filing documents are served from disk on later runs without any request."""
+    with StubEdgar() as stub, tempfile.TemporaryDirectory() as tmp:
+        serve_cik(stub)
+        url = stub.url + filing_path(ACCESSIONS[0])
+        first = stub_client(stub, cache=ResponseCache(tmp)).get(url)
+        assert first.status_code == 200
+        # A new client (a new run) over the same cache directory
+        second = stub_client(stub, cache=ResponseCache(tmp, ttl=0)).get(url)
+        assert second.from_cache and second.content == first.content
+        assert stub.paths().count(filing_path(ACCESSIONS[0])) == 1
+        cached_files = [name for _, _, names in os.walk(tmp) for name in names]
+        assert any(name.endswith('.gz') for name in cached_files)
+
+
+def test_response_cache_revalidates_submissions():
+    """Submissions JSON is fresh for its TTL, then revalidated with If-None-Match."""
+    with StubEdgar() as stub, tempfile.TemporaryDirectory() as tmp:
+        serve_cik(stub)
+        path = f'/submissions/CIK{CIK}.json'
+        stub.etags[path] = '"v1"'
+
+        fresh = stub_client(stub, cache=ResponseCache(tmp, ttl=3600))
+        fresh.get(stub.url + path)
+        assert fresh.get(stub.url + path).from_cache
+        assert stub.paths().count(path) == 1
+
+        stale = stub_client(stub, cache=ResponseCache(tmp, ttl=0))
+        revalidated = stale.get(stub.url + path)
+        assert revalidated.from_cache and revalidated.json()['filings']['recent']['form'][0] == '13F-HR'
+        assert stub.paths().count(path) == 2
+
+        # Once the ETag changes the new body replaces the cached one
+        stub.etags[path] = '"v2"'
+        stub.routes[path] = (200, make_submissions([]))
+        updated = stale.get(stub.url + path)
+        assert updated.status_code == 200 and updated.json()['filings']['recent']['form'] == []
+
+
+if __name__ == '__main__':
+    test_token_bucket_spacing()
+    test_retries_on_server_errors()
+    test_rate_limit_across_threads()
+    test_get_filings_from_stub()
+    test_get_filings_incremental()
+    test_iter_13f_filings_yields_per_cik()
+    test_fetch_holdings_data_missing_document()
+    test_response_cache_immutable_documents()
+    test_response_cache_revalidates_submissions()
+    print('\n✅ All tests executed.')
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Tests for the Parquet filings dataset."""
+import tempfile
+
+import pandas as pd
+
+from filings_store import (
+    dataset_periods,
+    read_filings,
+    read_holdings,
+    write_filings_dataset,
+)
+from get_filings import Holding, holdings_frame
+
+
+def sample_filings(cik, filings):
+    """A get_all_13f_filings-shaped frame from (accession, date, [Holding, ...]) tuples."""
+    return pd.DataFrame([
+        {
+            'form': '13F-HR',
+            'accession': accession,
+            'cik': cik,
+            'date': date,
+            'url': f'https://example.com/{accession}-index.html',
+            'text_url': f'https://example.com/{accession}.txt',
+            'data': holdings_frame(holdings, ['AAPL'] * len(holdings)),
+            'Ticker Symbol': None,
+            'Institution Name': 'Test Fund',
+            'Sector/Industry': 'N/A',
+            'Assets Under Management (AUM)': 'N/A',
+            'Fund Type': 'N/A',
+        }
+        for accession, date, holdings in filings
+    ])
+
+
+def holding(cusip, value):
+    return Holding('APPLE INC', cusip, value, value // 10, 'SOLE', value // 10, 0, None)
+
+
+def test_write_and_read_partitions():
+    """Batches append to the dataset and reads prune to the requested quarter."""
+    with tempfile.TemporaryDirectory() as root:
+        assert write_filings_dataset(sample_filings('0000000001', [
+            ('0000000001-25-000001', '2025-02-10', [holding('037833100', 1000), holding('594918104', 500)]),
+            ('0000000001-24-000007', '2024-11-12', [holding('037833100', 900)]),
+        ]), root) == (2, 3)
+        assert write_filings_dataset(sample_filings('0000000002', [
+            ('0000000002-25-000003', '2025-03-01', [holding('037833100', 70)]),
+            ('0000000002-25-000004', '2025-03-02', []),
+        ]), root) == (2, 1)
+
+        assert dataset_periods(root) == [(2024, 4), (2025, 1)]
+
+        filings = read_filings(root, columns=['accession', 'cik'], year=2025, quarter=1)
+        assert sorted(filings['accession']) == [
+            '0000000001-25-000001', '0000000002-25-000003', '0000000002-25-000004',
+        ]
+        assert list(filings.columns) == ['accession', 'cik']
+
+        holdings = read_holdings(root, columns=['accession', 'value', 'voting_none'], year=2025, quarter=1)
+        assert len(holdings) == 3
+        assert holdings['value'].sum() == 1570
+        assert holdings['voting_none'].isna().all()
+
+        assert len(read_holdings(root)) == 4
+        assert read_holdings(root, year=2023).empty
+
+
+if __name__ == '__main__':
+    test_write_and_read_partitions()
+    print('\n✅ All tests executed.')
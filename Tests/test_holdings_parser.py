@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Tests for the streaming informationTable parser in get_filings."""
+import tempfile
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from edgar_client import EdgarClient, ResponseCache
+from get_filings import (
+    HOLDINGS_COLUMNS,
+    holdings_frame,
+    holdings_records,
+    iter_holdings,
+    stream_holdings,
+)
+from Tests.edgar_stub import StubEdgar, make_filing_text
+
+HOLDINGS = [
+    {'issuer_name': f'ISSUER {i}', 'cusip': f'{i:09d}', 'value': i, 'shares': 10 * i}
+    for i in range(1, 201)
+]
+
+
+def chunked(data, size):
+    return (data[i:i + size] for i in range(0, len(data), size))
+
+
+def test_iter_holdings_any_chunk_size():
+    """Markers split across chunk boundaries are still found."""
+    text = make_filing_text(HOLDINGS[:3]).encode()
+    for size in (1, 7, 64, len(text)):
+        holdings = list(iter_holdings(chunked(text, size)))
+        assert [h.cusip for h in holdings] == ['000000001', '000000002', '000000003']
+    assert holdings[1].value == 2000
+    assert (holdings[1].voting_sole, holdings[1].voting_shared, holdings[1].voting_none) == (20, 0, 0)
+
+
+def test_iter_holdings_namespace_prefix():
+    """Information tables written with a namespace prefix parse the same way."""
+    text = make_filing_text(HOLDINGS[:2])
+    text = (text.replace('<informationTable xmlns=', '<ns1:informationTable xmlns:ns1=')
+                .replace('</informationTable>', '</ns1:informationTable>')
+                .replace('<', '<ns1:').replace('<ns1:/', '</ns1:')
+                .replace('<ns1:ns1:', '<ns1:').replace('</ns1:ns1:', '</ns1:'))
+    holdings = list(iter_holdings(chunked(text.encode(), 50)))
+    assert [h.issuer_name for h in holdings] == ['ISSUER 1', 'ISSUER 2']
+
+
+def test_iter_holdings_bounded_memory():
+    """Peak memory does not grow with the number of holdings in the filing."""
+    def lazy_filing(n):
+        # The same document make_filing_text builds, generated one row at a time
+        head, rows_and_tail = make_filing_text([HOLDINGS[0]]).split('<infoTable>', 1)
+        row, tail = rows_and_tail.split('</informationTable>', 1)
+        yield head.encode()
+        for _ in range(n):
+            yield f'<infoTable>{row}'.encode()
+        yield f'</informationTable>{tail}'.encode()
+
+    def peak(n):
+        tracemalloc.start()
+        count = sum(1 for _ in iter_holdings(lazy_filing(n)))
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        assert count == n
+        return peak_bytes
+
+    small, large = peak(1_000), peak(20_000)
+    print(f'[test_iter_holdings_bounded_memory] peak {small} bytes for 1k rows, {large} for 20k')
+    assert large < 2 * small
+
+
+def test_iter_holdings_no_table_or_truncated():
+    """No information table yields nothing; a cut-off table is a parse error."""
+    assert list(iter_holdings([b'<SEC-DOCUMENT>no holdings here</SEC-DOCUMENT>'])) == []
+    text = make_filing_text(HOLDINGS[:5]).encode()
+    with pytest.raises(ET.ParseError):
+        list(iter_holdings([text[:text.index(b'</informationTable>')]]))
+
+
+def test_holdings_frame_columns():
+    """Holdings become flat typed columns; missing amounts stay missing."""
+    text = make_filing_text(HOLDINGS[:3]).replace('<Shared>0</Shared>', '<Shared></Shared>', 1)
+    frame = holdings_frame(list(iter_holdings([text.encode()])), ['A', None, 'C'])
+    assert list(frame.columns) == HOLDINGS_COLUMNS
+    assert str(frame['value'].dtype) == 'Int64' and str(frame['voting_none'].dtype) == 'Int64'
+    assert str(frame['investment_discretion'].dtype) == 'category'
+    assert frame['value'].sum() == 6000
+    assert frame['voting_shared'].isna().tolist() == [True, False, False]
+
+    records = holdings_records(frame)
+    assert records[0]['voting_shared'] is None and records[1]['holding_ticker'] is None
+    assert records[2]['shares'] == 30 and records[2]['investment_discretion'] == 'SOLE'
+    assert holdings_frame([]).empty
+
+
+def test_stream_holdings_writes_through_cache():
+    """A streamed download lands complete in the cache and is re-read from disk."""
+    text = make_filing_text(HOLDINGS)
+    with StubEdgar() as stub, tempfile.TemporaryDirectory() as tmp:
+        path = '/Archives/edgar/data/1/000000000125000001/0000000001-25-000001.txt'
+        stub.routes[path] = (200, text)
+        client = EdgarClient(data_url=stub.url, archives_url=stub.url, cache=ResponseCache(tmp))
+        first = list(stream_holdings(stub.url + path, client))
+        second = list(stream_holdings(stub.url + path, client))
+        assert first == second and len(first) == len(HOLDINGS)
+        assert stub.paths().count(path) == 1
+        assert client.cache.load(stub.url + path)['content'] == text.encode()
+
+
+if __name__ == '__main__':
+    test_iter_holdings_any_chunk_size()
+    test_iter_holdings_namespace_prefix()
+    test_iter_holdings_bounded_memory()
+    test_iter_holdings_no_table_or_truncated()
+    test_holdings_frame_columns()
+    test_stream_holdings_writes_through_cache()
+    print('\n✅ All tests executed.')
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""Smoke-tests for the name_to_ticker module."""
+import json
+import os
+import random
+import re
+import tempfile
+import time
+
+import pandas as pd
+from rapidfuzz import fuzz, process
+
+from name_to_ticker import (
+    ABBREVIATIONS,
+    MAPPING_PATH,
+    NUISANCE_PHRASES,
+    TickerCache,
+    TickerResolver,
+    _clean_name,
+    clean_security_name,
+    clean_security_names,
+    get_resolver,
+    get_ticker_from_name,
+    get_tickers_from_names,
+)
+
+
+def legacy_clean_security_name(name):
+    """clean_security_name as it was before it was memoized; the golden reference."""
+    nuisance_phrases = [
+        "inc", "llc", "corp", "corporation", "group", "sa", "plc", "ltd", "limited",
+        "common stock", "ordinary shares", "etf", "fund", "shares", "unit", "class a",
+        "class b", "depositary shares", "rights", "warrant", "options", "global", "active",
+        "corporate", "equity", "investors", "international", "the", "company", "incorporated",
+        "inc", "co", "test", "industries", "solutions", "partners", "services"
+    ]
+    if not isinstance(name, str):
+        return ""
+    name = name.lower()
+    name = re.sub(r' -.*$', '', name)
+    for phrase in nuisance_phrases:
+        name = name.replace(phrase, "")
+    for short, full in [
+        ('rlty', 'realty'), ('agro', 'agriculture'), ('prod', 'products'),
+        ('chems', 'chemicals'), ('invt', 'investment'), ('grp', 'group'),
+        ('inds', 'industries'), ('centy', 'century'), ('labs', 'laboratories'),
+        ('resh', 'research'), ('hldgs', 'holdings'), ('aehr', 'aehr test systems'),
+        ('adv energy', 'advanced energy industries'),
+    ]:
+        name = name.replace(short, full)
+    name = re.sub(r'[-,.\(\)]', ' ', name)
+    name = re.sub(r'\s+', ' ', name).strip()
+    return name.title()
+
+
+def golden_names():
+    """Every security name in the mapping csv, plus issuer names from the sample filings."""
+    names = pd.read_csv(MAPPING_PATH, keep_default_na=False)['Security Name'].tolist()
+    for data in pd.read_csv('13f_filings.csv')['data']:
+        try:
+            names += [h['issuer_name'] for h in json.loads(data)]
+        except (TypeError, json.JSONDecodeError):
+            continue
+    # Removing one phrase can create another that a later replace catches
+    adversarial = ['cinco', 'labscorpat', 'COINCO', 'THEQUITY', 'GRINCOUP', 'PRINCOD', 'CLASS CLASS AA',
+                   'INCORPORATEDCO', 'SHARESHARES', 'LABLABSS', 'ADV ADV ENERGYENERGY']
+    return names + [None, float('nan'), '', 'HEALTHEQUITY INC', 'ADV ENERGY INDS - CL A'] + adversarial
+
+
+def test_clean_security_name_golden():
+    """The cleaner reproduces the original output exactly, including where one removal creates another."""
+    names = golden_names()
+    expected = [legacy_clean_security_name(name) for name in names]
+    mismatches = [
+        (name, want, got)
+        for name, want, got in zip(names, expected, map(clean_security_name, names))
+        if want != got
+    ]
+    assert not mismatches, mismatches[:10]
+    assert clean_security_names(names).tolist() == expected
+
+    # Random run-together fragments of the phrases, where removals most often create new ones
+    rng = random.Random(0)
+    fragments = [word[:rng.randint(1, len(word))] for word in NUISANCE_PHRASES + list(ABBREVIATIONS)] * 3
+    fuzzed = [''.join(rng.sample(fragments, rng.randint(1, 4))) for _ in range(20000)]
+    mismatches = [name for name in fuzzed if clean_security_name(name) != legacy_clean_security_name(name)]
+    assert not mismatches, mismatches[:10]
+    print(f'[test_clean_security_name_golden] {len(names)} names and {len(fuzzed)} fuzzed strings match')
+
+
+def test_clean_security_name_speed():
+    """Microbenchmark: original cleaner vs the current one, vectorized and memoized."""
+    unique = pd.read_csv(MAPPING_PATH, keep_default_na=False)['Security Name'].tolist()
+    repeated = [name for name in golden_names()[len(unique):] if isinstance(name, str)] * 20
+
+    def timed(fn, names):
+        start = time.perf_counter()
+        fn(names)
+        return time.perf_counter() - start
+
+    _clean_name.cache_clear()
+    legacy_unique = timed(lambda n: [legacy_clean_security_name(x) for x in n], unique)
+    new_unique = timed(lambda n: [clean_security_name(x) for x in n], unique)
+    column_unique = timed(clean_security_names, unique)
+    legacy_repeated = timed(lambda n: [legacy_clean_security_name(x) for x in n], repeated)
+    new_repeated = timed(lambda n: [clean_security_name(x) for x in n], repeated)
+
+    print(f'[test_clean_security_name_speed] {len(unique)} mapping names: '
+          f'original {legacy_unique:.3f}s, current {new_unique:.3f}s '
+          f'({legacy_unique / new_unique:.1f}x), column {column_unique:.3f}s')
+    print(f'[test_clean_security_name_speed] {len(repeated)} filing issuer names: '
+          f'original {legacy_repeated:.3f}s, memoized {new_repeated:.3f}s '
+          f'({legacy_repeated / new_repeated:.1f}x)')
+
+
+def test_resolver_loads_mapping_once():
+    """The process-wide resolver is built once and reused."""
+    resolver = get_resolver()
+    assert resolver is get_resolver()
+    assert len(resolver.choices) == len(resolver.symbols) > 0
+    print(f'[test_resolver_loads_mapping_once] {len(resolver)} names loaded')
+
+
+def test_resolver_pickle_cache():
+    """A resolver rebuilt from its pickle cache matches the original."""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_path = os.path.join(tmp, 'mapping.pkl')
+        built = TickerResolver(cache_path=cache_path)
+        assert os.path.exists(cache_path)
+        cached = TickerResolver(cache_path=cache_path)
+    assert cached.choices == built.choices
+    assert cached.symbols == built.symbols
+    assert cached.token_index == built.token_index
+
+
+def test_get_ticker_from_name():
+    """Map a few well-known issuer names to their tickers."""
+    for issuer, ticker in [('APPLE INC', 'AAPL'), ('NVIDIA CORP', 'NVDA')]:
+        result = get_ticker_from_name(issuer)
+        print(f'[test_get_ticker_from_name] {issuer} → {result}')
+        assert result == ticker
+    assert get_ticker_from_name(None) is None
+
+
+def test_ticker_cache_hits_and_persistence():
+    """Resolved tickers are served from the cache and survive a reload."""
+    resolver = TickerResolver()
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_path = os.path.join(tmp, 'tickers.sqlite')
+        resolver.ticker_cache = TickerCache(cache_path, version=1)
+
+        assert get_ticker_from_name('APPLE INC', resolver, cusip='037833100') == 'AAPL'
+        assert get_ticker_from_name('APPLE INC', resolver, cusip='037833100') == 'AAPL'
+        # Same CUSIP under a different issuer spelling still hits the cache
+        assert get_ticker_from_name('APPLE COMPUTER', resolver, cusip='037833100') == 'AAPL'
+        stats = resolver.ticker_cache.stats()
+        print(f'[test_ticker_cache_hits_and_persistence] {stats}')
+        assert stats['hits'] == 2 and stats['misses'] == 1
+        resolver.ticker_cache.flush()
+
+        reloaded = TickerCache(cache_path, version=1)
+        assert reloaded.lookup(TickerCache.keys_for('Apple')) == (True, 'AAPL')
+        # A new mapping version discards the persisted entries
+        assert len(TickerCache(cache_path, version=2)) == 0
+
+
+def test_bulk_matching_agrees_with_single():
+    """The batched cdist matcher returns the same tickers as extractOne."""
+    resolver = TickerResolver()
+    names = [
+        'APPLE INC', 'MICROSOFT CORP', 'AIR TRANSPORT SERVICES GRP I',
+        'TESLA INC', 'NOT A REAL ISSUER XYZ', 'APPLE INC', None,
+    ]
+    bulk = get_tickers_from_names(names, resolver)
+    single = [get_ticker_from_name(name, TickerResolver()) for name in names]
+    print(f'[test_bulk_matching_agrees_with_single] {bulk}')
+    assert bulk == single
+    assert bulk[0] == bulk[5] == 'AAPL'
+    assert bulk[-1] is None
+
+    # Agreement on the mapping's own names, in several chunks
+    sample = resolver.choices[::97]
+    matches = resolver.match_many(sample, chunk_size=16)
+    assert all(matches[name] == resolver.match(name) for name in sample)
+
+
+def test_tiered_matching_stats():
+    """Exact and block tiers decide most names; each tier is counted."""
+    resolver = TickerResolver()
+    assert resolver.match('Apple') == 'AAPL'           # exact
+    assert resolver.match('M Amazon') == 'AMZN'        # block on 'Amazon'
+    assert resolver.match('Not A Real Issuer Xyz') is None
+    stats = resolver.tier_stats()
+    print(f'[test_tiered_matching_stats] {stats}')
+    assert stats['exact'] == 1
+    assert stats['block'] == 1
+    assert stats['unmatched'] == 1
+    assert stats['comparisons_skipped'] > len(resolver)
+
+
+def test_tiered_matching_agrees_with_full_scan():
+    """The exact and block tiers pick the same ticker a scan of every choice would."""
+    resolver = TickerResolver()
+    names = []
+    for choice in resolver.choices[::211]:
+        words = choice.split()
+        names.append(' '.join(words[:-1]) if len(words) > 1 else choice[:-1])  # a word dropped
+        names.append(choice[:-1])                                                # a letter dropped
+        names.append(' '.join(reversed(words)))                                  # words reordered
+    for name in names:
+        full = process.extractOne(name, resolver.choices, scorer=fuzz.token_sort_ratio, score_cutoff=90)
+        assert resolver.match(name) == (resolver.symbols[full[2]] if full else None), name
+    stats = resolver.tier_stats()
+    print(f'[test_tiered_matching_agrees_with_full_scan] {len(names)} names, {stats}')
+    assert stats['block'] > 0
+
+
+if __name__ == '__main__':
+    test_clean_security_name_golden()
+    test_clean_security_name_speed()
+    test_resolver_loads_mapping_once()
+    test_resolver_pickle_cache()
+    test_get_ticker_from_name()
+    test_ticker_cache_hits_and_persistence()
+    test_bulk_matching_agrees_with_single()
+    test_tiered_matching_stats()
+    test_tiered_matching_agrees_with_full_scan()
+    print('\n✅ All tests executed.')
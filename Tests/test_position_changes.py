@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Tests for the PositionChanges table kept up to date by bulk_load_filings (needs the database from .env)."""
+import uuid
+
+from db_utils import transaction
+from Tests.fake_filings import begin_rolled_back, load_filing, roll_back
+
+# A new manager per run, so the test starts without earlier quarters
+MANAGER_CIK = f'99{uuid.uuid4().int % 10**8:08d}'
+
+
+def setup_module(module=None):
+    begin_rolled_back()
+
+
+def teardown_module(module=None):
+    roll_back()
+
+
+def load_positions(accession, filing_date, positions):
+    """Loads one 13F-HR with {cusip: shares} positions, each worth 10 per share."""
+    load_filing(MANAGER_CIK, accession, [
+        {'cusip': cusip, 'shares': shares, 'value': shares * 10, 'issuer_name': f'Change Test {cusip}'}
+        for cusip, shares in positions.items()
+    ], manager_name='Position Change Test Fund', filing_date=filing_date)
+
+
+def changes(year, quarter):
+    """{cusip: (shares_change, is_new, is_exited, is_increased, is_decreased)} for the test manager."""
+    with transaction() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT s.cusip, pc.shares_change, pc.is_new, pc.is_exited, pc.is_increased, pc.is_decreased
+                FROM PositionChanges pc
+                JOIN Securities s ON s.security_id = pc.security_id
+                WHERE pc.manager_cik = %s AND pc.year = %s AND pc.quarter = %s;
+            """, (MANAGER_CIK, year, quarter))
+            return {
+                cusip: (None if change is None else int(change), *flags)
+                for cusip, change, *flags in cur.fetchall()
+            }
+
+
+def test_quarter_over_quarter_flags():
+    """Loading the later quarter first, then the earlier one, still yields the right comparison."""
+    load_positions(f'{MANAGER_CIK}-25-000001', '2025-02-14',
+                   {'CHANGE001': 150, 'CHANGE002': 20, 'CHANGE004': 5})
+
+    # No previous quarter yet: nothing to compare with
+    assert changes(2025, 1) == {
+        'CHANGE001': (None, False, False, False, False),
+        'CHANGE002': (None, False, False, False, False),
+        'CHANGE004': (None, False, False, False, False),
+    }
+
+    load_positions(f'{MANAGER_CIK}-24-000001', '2024-11-14',
+                   {'CHANGE001': 100, 'CHANGE002': 50, 'CHANGE003': 10})
+
+    assert changes(2025, 1) == {
+        'CHANGE001': (50, False, False, True, False),
+        'CHANGE002': (-30, False, False, False, True),
+        'CHANGE003': (-10, False, True, False, False),
+        'CHANGE004': (5, True, False, False, False),
+    }
+    print(f'[test_quarter_over_quarter_flags] {changes(2025, 1)}')
+
+
+if __name__ == '__main__':
+    setup_module()
+    test_quarter_over_quarter_flags()
+    teardown_module()
+    print('\n✅ All tests executed.')
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Tests for the ManagerSectorExposure and SecurityOwnership rollups (needs the database from .env)."""
+import uuid
+
+from db_utils import fill_security_sectors, transaction
+from Tests.fake_filings import begin_rolled_back, load_filing, roll_back
+
+# Fresh managers and securities per run, so the rollups start empty
+RUN = f'{uuid.uuid4().int % 10**6:06d}'
+MANAGERS = [f'98{RUN}01', f'98{RUN}02']
+CUSIPS = {ticker: f'R{RUN}{ticker}' for ticker in ('RA', 'RB', 'RC')}
+TICKERS = {ticker: f'{ticker}{RUN}' for ticker in CUSIPS}
+
+
+def setup_module(module=None):
+    begin_rolled_back()
+
+
+def teardown_module(module=None):
+    roll_back()
+
+
+def load_positions(cik, positions, sectors=None):
+    """Loads a Q1 2025 13F-HR for cik with {ticker key: value} positions (one share per dollar)."""
+    load_filing(cik, f'{cik}-25-000001', [
+        {'cusip': CUSIPS[key], 'issuer_name': f'Rollup {key}', 'holding_ticker': TICKERS[key],
+         'shares': value, 'value': value}
+        for key, value in positions.items()
+    ], manager_name=f'Rollup Test Fund {cik}', sectors=sectors)
+
+
+def exposure(cik):
+    """{sector: (value, weight)} for cik in Q1 2025."""
+    with transaction() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT sector, value, weight FROM ManagerSectorExposure
+                WHERE manager_cik = %s AND year = 2025 AND quarter = 1;
+            """, (cik,))
+            return {sector: (int(value), round(float(weight), 4)) for sector, value, weight in cur.fetchall()}
+
+
+def ownership():
+    """{ticker key: (holder_count, total_value)} in Q1 2025."""
+    with transaction() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT s.cusip, o.holder_count, o.total_value
+                FROM SecurityOwnership o JOIN Securities s ON s.security_id = o.security_id
+                WHERE s.cusip = ANY(%s) AND o.year = 2025 AND o.quarter = 1;
+            """, (list(CUSIPS.values()),))
+            keys = {cusip: key for key, cusip in CUSIPS.items()}
+            return {keys[cusip]: (holders, int(value)) for cusip, holders, value in cur.fetchall()}
+
+
+def test_rollups_follow_loads_and_sectors():
+    """Rollups cover every manager's latest filing and pick up sectors filled in later."""
+    load_positions(MANAGERS[0], {'RA': 300, 'RB': 100}, sectors={TICKERS['RA']: 'Technology'})
+    assert exposure(MANAGERS[0]) == {'Technology': (300, 0.75), 'Unknown': (100, 0.25)}
+
+    load_positions(MANAGERS[1], {'RA': 50, 'RC': 50})
+    assert ownership() == {'RA': (2, 350), 'RB': (1, 100), 'RC': (1, 50)}
+
+    # A sector learned later is applied to earlier rollups too
+    fill_security_sectors({TICKERS['RB']: 'Healthcare'})
+    assert exposure(MANAGERS[0]) == {'Technology': (300, 0.75), 'Healthcare': (100, 0.25)}
+    assert exposure(MANAGERS[1]) == {'Technology': (50, 0.5), 'Unknown': (50, 0.5)}
+    print(f'[test_rollups_follow_loads_and_sectors] {exposure(MANAGERS[0])} {ownership()}')
+
+
+if __name__ == '__main__':
+    setup_module()
+    test_rollups_follow_loads_and_sectors()
+    teardown_module()
+    print('\n✅ All tests executed.')
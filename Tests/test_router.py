@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Tests for the SQL-template router in front of the chat agent (needs the database from .env)."""
+import uuid
+
+from db_utils import transaction
+from filings_store import filing_period
+from router import TEMPLATES, answer_question
+from Tests.fake_filings import begin_rolled_back, load_filing, roll_back
+
+SUFFIX = uuid.uuid4().hex[:6]
+MANAGER = f'Router Test {SUFFIX} LLC'
+CIK = str(uuid.uuid4().int % 10**10).zfill(10)
+TICKERS = {'A': f'RA{SUFFIX}'.upper(), 'B': f'RB{SUFFIX}'.upper(), 'C': f'RC{SUFFIX}'.upper()}
+SECTORS = {TICKERS['A']: 'Technology', TICKERS['B']: 'Financial Services', TICKERS['C']: 'Healthcare'}
+# Two securities whose names only differ by their corporate suffix, held by a second manager
+TWIN_CIK = str(uuid.uuid4().int % 10**10).zfill(10)
+TWINS = {'D': f'Router Twin {SUFFIX} Inc', 'E': f'Router Twin {SUFFIX} Corp'}
+
+
+def load_quarter(filing_date, positions, cik=CIK, manager=MANAGER):
+    """Loads one 13F-HR for a test manager; positions are (security letter, shares, value)."""
+    year, quarter = filing_period(filing_date)
+    load_filing(cik, f'{cik}-{year % 100}-{quarter:06d}', [
+        {'cusip': f'R{letter}{SUFFIX}'.upper(),
+         'issuer_name': TWINS.get(letter, f'Router Security {letter} {SUFFIX}'),
+         'holding_ticker': TICKERS.get(letter), 'shares': shares, 'value': value}
+        for letter, shares, value in positions
+    ], manager_name=manager, filing_date=filing_date, sectors=SECTORS)
+
+
+def setup_module(module=None):
+    begin_rolled_back()
+    load_quarter('2024-11-14', [('A', 100, 1000), ('B', 50, 500)])
+    load_quarter('2025-02-14', [('A', 150, 1500), ('C', 20, 200)])
+    load_quarter('2025-02-14', [('D', 10, 100), ('E', 20, 200)],
+                 cik=TWIN_CIK, manager=f'Router Twin Holder {SUFFIX}')
+
+
+def teardown_module(module=None):
+    roll_back()
+
+
+def test_templates_answer_from_position_changes():
+    """Each template answers from the test manager's two quarters."""
+    holders = answer_question(f'Who are the top holders of {TICKERS["A"]}?')
+    assert f'| {MANAGER} | 2025 | 1 | 150 | 1,500 |' in holders['answer']
+
+    new = answer_question(f'What new positions did {MANAGER} add this quarter?')
+    assert TICKERS['C'] in new['answer'] and TICKERS['B'] not in new['answer']
+
+    increases = answer_question(f'Biggest increases in {TICKERS["A"]} over the last two quarters')
+    assert f'| {MANAGER} | +50 | +500 |' in increases['answer']
+
+    shift = answer_question(f'Has {MANAGER} shifted from financials to healthcare in the past year?')
+    assert shift['answer'].startswith(f"{MANAGER}'s portfolio weight by sector, 2024 Q4 vs. 2025 Q1:")
+    assert 'Financial Services: 33.3% → 0.0%. Healthcare: 0.0% → 11.8%.' in shift['answer']
+    assert shift['steps'][0]['tool'] == 'router:sector_shift' and shift['sql'][0].lstrip().startswith('WITH')
+    print(f'[test_templates_answer_from_position_changes]\n{shift["answer"]}')
+
+
+def test_last_quarter():
+    """"last quarter" is answered from the quarter before the newest."""
+    holders = answer_question(f'Top holders of {TICKERS["A"]} last quarter')
+    assert holders['answer'].startswith(f'The largest holders of {TICKERS["A"]} in 2024 Q4:')
+    assert f'| {MANAGER} | 2024 | 4 | 100 | 1,000 |' in holders['answer']
+    print(f'[test_last_quarter] {holders["answer"].splitlines()[0]}')
+
+
+def test_unknown_and_ambiguous_names_fall_back_to_the_agent():
+    """A name matching no security or manager, or several, leaves the question to the agent."""
+    assert answer_question(f'What new positions did Nobody {SUFFIX} add this quarter?') is None
+    assert answer_question('How did the market do?') is None
+    # "Router Test" is only a prefix of the manager's name
+    assert answer_question('What new positions did Router Test add this quarter?') is None
+    # Both "Router Twin ... Inc" and "Router Twin ... Corp" are "router twin ..."
+    assert answer_question(f'Who are the top holders of Router Twin {SUFFIX}?') is None
+    # A corporate suffix alone doesn't stop a name matching
+    assert answer_question(f'What new positions did Router Test {SUFFIX} add this quarter?') is not None
+    print('[test_unknown_and_ambiguous_names_fall_back_to_the_agent] None')
+
+
+def test_templates_use_indexes():
+    """The templates reach PositionChanges and ManagerSectorExposure through indexes."""
+    with transaction() as conn:
+        with conn.cursor() as cur:
+            cur.execute('SELECT security_id FROM Securities WHERE ticker = %s;', (TICKERS['A'],))
+            security_id = cur.fetchone()[0]
+    params = {'security_id': security_id, 'manager_cik': CIK, 'year': None, 'quarter': None,
+              'offset': 0, 'limit': 10, 'quarters': 2}
+    for intent, sql in TEMPLATES.items():
+        with transaction() as conn:
+            with conn.cursor() as cur:
+                cur.execute('SET LOCAL enable_seqscan = off;')
+                cur.execute('EXPLAIN ' + sql, params)
+                plan = '\n'.join(row[0] for row in cur.fetchall())
+        for table in ('positionchanges', 'managersectorexposure'):
+            assert f'Seq Scan on {table}' not in plan, f'{intent} scans {table}:\n{plan}'
+    print(f'[test_templates_use_indexes] {len(TEMPLATES)} templates, no sequential scans')
+
+
+if __name__ == '__main__':
+    setup_module()
+    test_templates_answer_from_position_changes()
+    test_last_quarter()
+    test_unknown_and_ambiguous_names_fall_back_to_the_agent()
+    test_templates_use_indexes()
+    teardown_module()
+    print('\n✅ All tests executed.')
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""Tests for how the SQL-template router recognizes questions (no database needed)."""
+from router import route
+
+
+def test_route_readme_questions():
+    """The README's example questions are routed, with their parameters; open-ended ones are not."""
+    assert route('Which top 5 firms increased their Tesla holdings the most over the last two quarters?') == (
+        'biggest_increases', {'limit': 5, 'security': 'tesla', 'quarters': 2})
+    assert route('Has BlackRock shifted from financials to healthcare in the past year?') == (
+        'sector_shift', {'limit': None, 'manager': 'blackrock', 'quarters': 4,
+                         'sectors': ['financials', 'healthcare']})
+    assert route('What new positions did Berkshire Hathaway add this quarter?') == (
+        'new_positions', {'limit': 20, 'manager': 'berkshire hathaway', 'year': None, 'quarter': None,
+                          'offset': 0})
+    assert route('Top 3 holders of NVDA in Q1 2025') == (
+        'top_holders', {'limit': 3, 'security': 'nvda', 'year': 2025, 'quarter': 1, 'offset': 0})
+    assert route('Why do managers file 13Fs late?') is None
+    print('[test_route_readme_questions] 4 intents routed, open question left to the agent')
+
+
+def test_last_quarter_is_the_one_before():
+    """"last quarter" asks for the quarter before the newest, "this quarter" for the newest."""
+    assert route('What new positions did Berkshire Hathaway add last quarter?').params['offset'] == 1
+    assert route('Top holders of AT&T last quarter').params == {
+        'limit': 10, 'security': 'at&t', 'year': None, 'quarter': None, 'offset': 1}
+    assert route('Who holds the most J.P. Morgan stock this quarter?').params['offset'] == 0
+    print('[test_last_quarter_is_the_one_before] offsets 1 and 0')
+
+
+def test_compound_questions_go_to_the_agent():
+    """A question that only starts like a template's is left to the agent, not squeezed into a name."""
+    for question in [
+        'Who are the largest holders of Apple and how did they change over the last year?',
+        'Has Vanguard shifted from tech to energy and why?',
+        'Top holders of NVDA compared to AMD',
+        'Top holders of NVDA vs AMD this quarter',
+        'What new positions did Citadel or Millennium add this quarter?',
+        'Biggest increases in Tesla and Apple over the last two quarters',
+        'Has BlackRock shifted from financials to healthcare, and why did it?',
+    ]:
+        assert route(question) is None, question
+    print('[test_compound_questions_go_to_the_agent] 7 questions left to the agent')
+
+
+if __name__ == '__main__':
+    test_route_readme_questions()
+    test_last_quarter_is_the_one_before()
+    test_compound_questions_go_to_the_agent()
+    print('\n✅ All tests executed.')
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""Checks for the migrated schema: idempotent loads, period partitions and indexed plans for the README questions (needs the database from .env)."""
+import psycopg2
+
+from db_utils import (
+    archive_holdings_partition,
+    bulk_load_filings,
+    holdings_partition_name,
+    restore_holdings_partition,
+    transaction,
+)
+from migrate import available_migrations, current_version, migrate
+from Tests.fake_filings import begin_rolled_back, load_filing, make_filing, make_holdings, roll_back
+
+# The README's example questions, as the agent would write them
+README_QUERIES = {
+    'tesla_increase': """
+        WITH tesla AS (
+            SELECT f.manager_cik, f.year, f.quarter, SUM(h.position_size) AS shares
+            FROM Holdings h
+            JOIN Securities s ON s.security_id = h.security_id
+            JOIN Filings f ON f.filing_id = h.filing_id
+            WHERE s.ticker = 'TSLA'
+            GROUP BY f.manager_cik, f.year, f.quarter
+        )
+        SELECT m.name, cur.shares - prev.shares AS increase
+        FROM tesla cur
+        JOIN tesla prev ON prev.manager_cik = cur.manager_cik
+            AND prev.year * 4 + prev.quarter = cur.year * 4 + cur.quarter - 2
+        JOIN InvestmentManagers m ON m.cik = cur.manager_cik
+        WHERE cur.year = 2025 AND cur.quarter = 1
+        ORDER BY increase DESC
+        LIMIT 5;
+    """,
+    'blackrock_sectors': """
+        SELECT f.year, f.quarter, s.sector, SUM(h.market_value) AS value
+        FROM InvestmentManagers m
+        JOIN Filings f ON f.manager_cik = m.cik
+        JOIN Holdings h ON h.filing_id = f.filing_id
+        JOIN Securities s ON s.security_id = h.security_id
+        WHERE m.name ILIKE 'blackrock%'
+        GROUP BY f.year, f.quarter, s.sector
+        ORDER BY f.year, f.quarter;
+    """,
+    'berkshire_new_positions': """
+        SELECT s.name, h.position_size
+        FROM InvestmentManagers m
+        JOIN Filings f ON f.manager_cik = m.cik AND f.year = 2025 AND f.quarter = 1
+        JOIN Holdings h ON h.filing_id = f.filing_id
+        JOIN Securities s ON s.security_id = h.security_id
+        WHERE m.name ILIKE 'berkshire hathaway%'
+          AND NOT EXISTS (
+              SELECT 1
+              FROM Filings pf
+              JOIN Holdings ph ON ph.filing_id = pf.filing_id
+              WHERE pf.manager_cik = m.cik AND pf.year = 2024 AND pf.quarter = 4
+                AND ph.security_id = h.security_id
+          );
+    """,
+}
+
+
+def setup_module(module=None):
+    migrate()  # committed, unlike the filings the tests load
+    begin_rolled_back()
+
+
+def teardown_module(module=None):
+    roll_back()
+
+
+def explain(query):
+    """The query's plan with sequential scans priced out, so any index that applies is used."""
+    with transaction() as conn:
+        with conn.cursor() as cur:
+            cur.execute('SET LOCAL enable_seqscan = off;')
+            cur.execute('EXPLAIN ' + query)
+            return '\n'.join(row[0] for row in cur.fetchall())
+
+
+def test_migrations_are_applied():
+    """migrate() brings the database to the newest version and is a no-op after that."""
+    migrate()
+    assert current_version() == available_migrations()[-1][0]
+    assert migrate() == []
+    print(f'[test_migrations_are_applied] schema version {current_version()}')
+
+
+def test_readme_queries_use_indexes():
+    """Holdings and Filings are reached through indexes, never scanned whole."""
+    for name, query in README_QUERIES.items():
+        plan = explain(query)
+        for table in ('holdings', 'filings'):
+            assert f'Seq Scan on {table}' not in plan, f'{name} scans {table}:\n{plan}'
+        print(f'[test_readme_queries_use_indexes] {name}: no sequential scans on holdings/filings')
+
+
+def load_test_filing(accession, filing_date):
+    """Loads one filing for the 9999999997 test manager with a single holding."""
+    return load_filing('9999999997', accession, [
+        {'cusip': 'SCHEMA001', 'issuer_name': 'Schema Security', 'shares': 1, 'value': 10},
+    ], manager_name='Schema Test Fund', filing_date=filing_date)
+
+
+def count_holdings(filing_id):
+    with transaction() as conn:
+        with conn.cursor() as cur:
+            cur.execute('SELECT COUNT(*) FROM Holdings WHERE filing_id = %s;', (filing_id,))
+            return cur.fetchone()[0]
+
+
+def test_quarter_queries_prune_to_one_partition():
+    """Filtering Holdings on year and quarter reads only that quarter's partition."""
+    load_test_filing('9999999997-25-000010', '2025-02-14')
+    load_test_filing('9999999997-24-000010', '2024-11-14')
+    plan = explain('SELECT SUM(market_value) FROM Holdings WHERE year = 2025 AND quarter = 1;')
+    assert holdings_partition_name(2025, 1) in plan
+    assert holdings_partition_name(2024, 4) not in plan
+    print(f'[test_quarter_queries_prune_to_one_partition] only {holdings_partition_name(2025, 1)} is read')
+
+
+def test_archive_and_restore_a_quarter():
+    """An archived quarter disappears from Holdings and comes back when restored."""
+    filing_id = load_test_filing('9999999997-99-000001', '1999-08-14')
+    assert count_holdings(filing_id) == 1
+    archive_holdings_partition(1999, 3)
+    try:
+        assert count_holdings(filing_id) == 0
+        with transaction() as conn:
+            with conn.cursor() as cur:
+                cur.execute(f'SELECT COUNT(*) FROM archive.{holdings_partition_name(1999, 3)};')
+                assert cur.fetchone()[0] == 1
+        try:
+            archive_holdings_partition(1999, 3)
+            assert False, 'an archived quarter cannot be archived again'
+        except ValueError:
+            pass
+    finally:
+        restore_holdings_partition(1999, 3)
+    assert count_holdings(filing_id) == 1
+    try:
+        restore_holdings_partition(1999, 3)
+        assert False, 'an attached quarter cannot be restored'
+    except ValueError:
+        pass
+    print('[test_archive_and_restore_a_quarter] 1999 Q3 archived and restored')
+
+
+def test_detached_table_is_not_taken_for_a_partition():
+    """A detached table named like a quarter's partition makes create_holdings_partition fail."""
+    load_test_filing('9999999997-99-000001', '1999-08-14')
+    name = holdings_partition_name(1999, 3)
+    with transaction() as conn:
+        with conn.cursor() as cur:
+            # The error would abort the module's transaction; undo just this test's part of it.
+            cur.execute('SAVEPOINT detach;')
+            try:
+                cur.execute(f'ALTER TABLE Holdings DETACH PARTITION {name};')
+                cur.execute('SELECT create_holdings_partition(1999, 3);')
+                assert False, 'the detached table was taken for an attached partition'
+            except psycopg2.errors.RaiseException as e:
+                message = str(e).splitlines()[0]
+            cur.execute('ROLLBACK TO SAVEPOINT detach;')
+    print(f'[test_detached_table_is_not_taken_for_a_partition] {message}')
+
+
+def test_reloading_a_batch_is_idempotent():
+    """Loading the same filings twice leaves one filing and one row per security/discretion."""
+    accession = '9999999997-25-000001'
+    filings = [make_filing('9999999997', accession, 'Idempotent Test Fund')]
+    holdings = make_holdings(accession, [
+        {'cusip': 'IDEMP0001', 'issuer_name': 'Idem A', 'shares': 10, 'value': 100},
+        {'cusip': 'IDEMP0001', 'issuer_name': 'Idem A', 'shares': 5, 'value': 50},
+        {'cusip': 'IDEMP0001', 'issuer_name': 'Idem A', 'shares': 7, 'value': 70, 'investment_discretion': 'DFND'},
+        {'cusip': 'IDEMP0002', 'issuer_name': 'Idem B', 'shares': 1, 'value': 10},
+    ])
+    first = bulk_load_filings(filings, holdings)
+    second = bulk_load_filings(filings, holdings)
+    assert first == second
+
+    with transaction() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT s.cusip, h.investment_discretion, h.position_size
+                FROM Holdings h JOIN Securities s ON s.security_id = h.security_id
+                WHERE h.filing_id = %s
+                ORDER BY s.cusip, h.investment_discretion;
+            """, (first[accession],))
+            rows = [(cusip, discretion, int(shares)) for cusip, discretion, shares in cur.fetchall()]
+    assert rows == [('IDEMP0001', 'DFND', 7), ('IDEMP0001', 'SOLE', 15), ('IDEMP0002', 'SOLE', 1)]
+    print(f'[test_reloading_a_batch_is_idempotent] {rows}')
+
+
+if __name__ == '__main__':
+    setup_module()
+    test_migrations_are_applied()
+    test_readme_queries_use_indexes()
+    test_quarter_queries_prune_to_one_partition()
+    test_archive_and_restore_a_quarter()
+    test_detached_table_is_not_taken_for_a_partition()
+    test_reloading_a_batch_is_idempotent()
+    teardown_module()
+    print('\n✅ All tests executed.')
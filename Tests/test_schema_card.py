@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Tests for the chat agent's schema card (needs the database from .env)."""
+import json
+import os
+import tempfile
+
+import schema_card
+from migrate import current_version, migrate
+from schema_card import CARD_TABLES, build_schema_card, get_schema_card
+
+
+def test_card_describes_every_table():
+    """Every agent table is on the card, with its column notes and no sample rows."""
+    migrate()
+    card = build_schema_card()
+    assert card['version'] == current_version()
+    assert sorted(card['tables']) == sorted(CARD_TABLES)
+    holdings = card['tables']['holdings']
+    assert holdings.startswith('CREATE TABLE holdings (')
+    assert 'weight numeric, -- market_value / the filing' in holdings
+    assert "'SOLE', 'DFND' or 'OTR'" in holdings and 'SHARED' not in holdings
+    assert 'quarter the 13F was filed in' in card['tables']['filings']
+    assert 'Representative values' not in holdings  # Holdings is never scanned for examples
+    assert 'Representative values' in card['tables']['filings']
+    print(f'[test_card_describes_every_table] {len(card["tables"])} tables, '
+          f'{sum(map(len, card["tables"].values()))} characters')
+
+
+def test_card_is_rebuilt_only_for_a_new_version():
+    """The saved card is reused while the schema version matches, and rebuilt when it doesn't."""
+    builds = []
+    real_build = schema_card.build_schema_card
+
+    def counting_build():
+        builds.append(1)
+        return real_build()
+
+    schema_card.build_schema_card = counting_build
+    schema_card._card = None
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'schema_card.json')
+            first = get_schema_card(path)
+            schema_card._card = None  # a new process: served from the file
+            assert get_schema_card(path) == first
+            assert get_schema_card(path) is get_schema_card(path)
+            assert len(builds) == 1
+
+            with open(path, 'w') as f:
+                json.dump({**first, 'version': first['version'] - 1}, f)
+            schema_card._card = None
+            assert get_schema_card(path)['version'] == current_version()
+            assert len(builds) == 2
+    finally:
+        schema_card.build_schema_card = real_build
+        schema_card._card = None
+    print(f'[test_card_is_rebuilt_only_for_a_new_version] {len(builds)} builds')
+
+
+if __name__ == '__main__':
+    test_card_describes_every_table()
+    test_card_is_rebuilt_only_for_a_new_version()
+    print('\n✅ All tests executed.')
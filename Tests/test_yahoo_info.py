@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Offline tests for the batched, cached Yahoo Finance enrichment."""
+import os
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+from yahoo_info import InfoCache, YahooInfo
+
+INFOS = {
+    'AAA': {'sector': 'Technology', 'totalAssets': 12_345_000_000, 'category': 'Large Growth'},
+    'BBB': {'sector': 'Healthcare'},
+}
+
+
+class CountingFetcher:
+    """Offline stand-in for fetch_yahoo_info that records which tickers were fetched."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, ticker):
+        with self._lock:
+            self.calls.append(ticker)
+        time.sleep(self.delay)
+        if ticker == 'FAIL':
+            raise ConnectionError('Yahoo unavailable')
+        return INFOS.get(ticker, {})
+
+
+def test_dedupes_and_caches():
+    """Each distinct ticker is fetched once; a second enricher on the same cache fetches nothing."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'yahoo.sqlite')
+        fetcher = CountingFetcher()
+        infos = YahooInfo(fetcher, InfoCache(path)).info_for(['AAA', 'AAA', 'BBB', None, '', 'AAA'])
+        assert sorted(fetcher.calls) == ['AAA', 'BBB']
+        assert infos == {'AAA': INFOS['AAA'], 'BBB': INFOS['BBB']}
+
+        again = CountingFetcher()
+        assert YahooInfo(again, InfoCache(path)).info_for(['AAA', 'BBB']) == infos
+        assert again.calls == []
+        print(f'[test_dedupes_and_caches] fetched {fetcher.calls}, then nothing')
+
+
+def test_expired_and_failed_lookups_are_refetched():
+    """Entries past the TTL and lookups that raised are fetched again next time."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'yahoo.sqlite')
+        YahooInfo(CountingFetcher(), InfoCache(path)).info_for(['AAA', 'FAIL'])
+
+        fetcher = CountingFetcher()
+        assert YahooInfo(fetcher, InfoCache(path)).info_for(['AAA', 'FAIL']) == {'AAA': INFOS['AAA'], 'FAIL': {}}
+        assert fetcher.calls == ['FAIL']
+
+        expired = CountingFetcher()
+        YahooInfo(expired, InfoCache(path, ttl=-1)).info_for(['AAA'])
+        assert expired.calls == ['AAA']
+        print('[test_expired_and_failed_lookups_are_refetched] ok')
+
+
+def test_fetches_concurrently():
+    """Slow lookups overlap instead of running one after another."""
+    fetcher = CountingFetcher(delay=0.2)
+    start = time.perf_counter()
+    YahooInfo(fetcher, max_workers=8).info_for([f'T{i}' for i in range(8)])
+    elapsed = time.perf_counter() - start
+    assert len(fetcher.calls) == 8
+    assert elapsed < 0.8, elapsed
+    print(f'[test_fetches_concurrently] 8 lookups in {elapsed:.2f}s')
+
+
+def test_enrich_joins_columns():
+    """Every row gets its ticker's columns, formatted as before; unknown tickers get N/A."""
+    filings = pd.DataFrame({
+        'accession': ['a1', 'a2', 'b1', 'c1', 'd1'],
+        'Ticker Symbol': ['AAA', 'AAA', 'BBB', 'FAIL', None],
+    })
+    fetcher = CountingFetcher()
+    enriched = YahooInfo(fetcher).enrich(filings)
+    assert sorted(fetcher.calls) == ['AAA', 'BBB', 'FAIL']
+    assert enriched['Sector/Industry'].tolist() == ['Technology', 'Technology', 'Healthcare', 'N/A', 'N/A']
+    assert enriched['Assets Under Management (AUM)'].tolist() == ['$12.35B', '$12.35B', 'N/A', 'N/A', 'N/A']
+    assert enriched['Fund Type'].tolist() == ['Large Growth', 'Large Growth', 'N/A', 'N/A', 'N/A']
+    assert 'Sector/Industry' not in filings.columns
+    print(f'[test_enrich_joins_columns] {enriched.to_dict("records")[0]}')
+
+
+if __name__ == '__main__':
+    test_dedupes_and_caches()
+    test_expired_and_failed_lookups_are_refetched()
+    test_fetches_concurrently()
+    test_enrich_joins_columns()
+    print('\n✅ All tests executed.')
@@ -0,0 +1,162 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+
+from db_utils import transaction
+
+"""
+This file caches the chat agent's answers, so a question that was already asked is answered
+instantly instead of running the agent's Gemini calls and SQL again.
+
+Answers are keyed on the normalized question (case, punctuation and spacing don't matter) and on
+the data version, a counter every change to the loaded data bumps (new or re-loaded filings,
+sectors, rollups; see db_utils.bump_data_version). So new data invalidates every cached answer
+without anyone clearing the cache. Entries also expire after ttl seconds, and
+only the max_entries most recently used are kept.
+"""
+
+ANSWER_CACHE_PATH = "answer_cache.sqlite"
+ANSWER_TTL = 24 * 60 * 60  # seconds before a cached answer is computed again
+MAX_ANSWERS = 500
+
+
+def normalize_question(question):
+    """Lowercases the question and drops punctuation and extra spaces ("Top holders of NVDA?" -> "top holders of nvda")."""
+    return " ".join(re.sub(r"[^\w$%.\-]+", " ", question.lower()).split()).strip(" .")
+
+
+def data_version():
+    """Identifies the loaded data: the DataVersion counter, as text."""
+    with transaction() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT version FROM DataVersion;")
+            (version,) = cur.fetchone()
+    return str(version)
+
+
+def serialize_steps(intermediate_steps):
+    """
+    The agent's intermediate steps, (action, observation) pairs, as JSON-friendly dicts with the
+    action's tool, tool_input and log, and the observation as text.
+    """
+    return [
+        {
+            "tool": getattr(action, "tool", None),
+            "tool_input": getattr(action, "tool_input", None),
+            "log": getattr(action, "log", None),
+            "observation": str(observation),
+        }
+        for action, observation in intermediate_steps
+    ]
+
+
+def generated_sql(steps):
+    """The queries the agent ran, from serialized steps."""
+    return [step["tool_input"] for step in steps if step["tool"] == "sql_db_query" and step["tool_input"]]
+
+
+def result_row_count(observation):
+    """
+    How many rows a sql_db_query observation holds. The tool returns the rows as the text of a
+    Python list of tuples, e.g. "[(1, Decimal('2.5')), (3, None)]", or "" when there are none.
+    """
+    if not observation.startswith("["):
+        return 0
+    rows, depth, quote = 0, 0, None
+    for char in observation:
+        if quote:
+            quote = None if char == quote else quote
+        elif char in "'\"":
+            quote = char
+        elif char in "([":
+            depth += 1
+            rows += char == "(" and depth == 2
+        elif char in ")]":
+            depth -= 1
+    return rows
+
+
+class AnswerCache:
+    """
+    SQLite-backed cache of agent answers, shared by every session (and process) using path.
+    ttl: seconds an answer stays valid
+    max_entries: how many answers are kept; the least recently used are evicted first
+    """
+
+    def __init__(self, path=ANSWER_CACHE_PATH, ttl=ANSWER_TTL, max_entries=MAX_ANSWERS):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS answers (
+                question TEXT,
+                data_version TEXT,
+                answer TEXT,
+                steps TEXT,
+                sql TEXT,
+                created_at REAL,
+                used_at REAL,
+                PRIMARY KEY (question, data_version)
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, question, version):
+        """The cached {"answer", "steps", "sql"} for question at this data version, or None."""
+        key = normalize_question(question)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT answer, steps, sql FROM answers "
+                "WHERE question = ? AND data_version = ? AND created_at >= ?",
+                (key, version, now - self.ttl),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE answers SET used_at = ? WHERE question = ? AND data_version = ?",
+                (now, key, version),
+            )
+            self._conn.commit()
+        answer, steps, sql = row
+        return {"answer": answer, "steps": json.loads(steps), "sql": json.loads(sql)}
+
+    def put(self, question, version, answer, steps, sql):
+        """Caches an answer, and drops answers for older data versions, expired ones and any over max_entries."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (normalize_question(question), version, answer, json.dumps(steps), json.dumps(sql), now, now),
+            )
+            self._conn.execute(
+                "DELETE FROM answers WHERE data_version != ? OR created_at < ?",
+                (version, now - self.ttl),
+            )
+            self._conn.execute(
+                "DELETE FROM answers WHERE rowid NOT IN "
+                "(SELECT rowid FROM answers ORDER BY used_at DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_answer_cache(path=ANSWER_CACHE_PATH):
+    """Returns the process-wide AnswerCache, creating it on first use (path only matters then)."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = AnswerCache(path)
+    return _cache
@@ -1,20 +1,11 @@
 import time
 import streamlit as st
-from langchain_core.prompts import PromptTemplate
-from langchain_community.agent_toolkits import create_sql_agent
-from langchain_community.agent_toolkits.sql.toolkit import SQLDatabaseToolkit
-from langchain.agents.agent_types import AgentType
-from langchain_community.utilities import SQLDatabase
-from langchain_google_genai import ChatGoogleGenerativeAI
-import google.generativeai as genai
-import sqlite3
-import pandas as pd
-import os
-import config # Put your API key in config.py
-from prompt import init_agent
+from prompt import ask, warm_up_agent
 
 # == INTEGRATING WITH PROMPT.PY ==
-agent_executor, df = init_agent()
+# The agent is built once per server process, not on every rerun. Start building it now,
+# in the background, so it's usually ready by the time the first question is asked.
+warm_up_agent()
 
 # == APP.PY NEW CODE == 
 
@@ -58,22 +49,43 @@ if prompt := st.chat_input("What's up?"):
     st.chat_message("user").write(prompt)
     st.session_state.messages.append({"role": "user", "content": prompt})
     
-    # generate assistant message
+    # generate assistant message, showing the agent's tool calls and answer as they happen
     start = time.time()
-    with st.spinner("Thinking..."):
+    with st.chat_message("assistant"):
+        status = st.status("Thinking...", expanded=False)
+        placeholder = st.empty()
+        shown = []
+
+        def show(kind, data):
+            shown.append(kind)
+            if kind == "tool":
+                status.update(label=f"Running {data['tool']}...")
+                if data["tool"] == "sql_db_query":
+                    status.code(data["input"], language="sql")
+                else:
+                    status.write(f"**{data['tool']}** {data['input'] or ''}")
+            elif kind == "tool_end" and data["rows"] is not None:
+                status.write(f"{data['rows']} rows")
+            elif kind == "answer":
+                placeholder.markdown(data + "▌")
+
         try:
-            result  = agent_executor.invoke(prompt)
-            answer  = result["output"]
-            chain   = result["intermediate_steps"]   # now present
+            # answered from a SQL template or the shared cache when possible;
+            # waits only if the warm-up hasn't finished
+            result  = ask(prompt, on_event=show)
+            answer  = result["answer"]
+            chain   = result["steps"]
+            cached  = result["cached"]
         except Exception as e:
-            answer, chain = f"[Error: {e}]", []       
-    elapsed = time.time() - start
+            answer, chain, cached = f"[Error: {e}]", [], False
+        elapsed = time.time() - start
 
-    with st.chat_message("assistant"):
-        # expander shows elapsed time
-        with st.expander(f"Thought for {elapsed:.2f} seconds", expanded=False):
+        # label shows elapsed time; answers that didn't stream list their steps now
+        label = f"Thought for {elapsed:.2f} seconds" + (" (cached answer)" if cached else "")
+        if not shown:
             for step in chain:
-                st.write(step)
-        st.write(answer)
+                status.write(step)
+        status.update(label=label, state="error" if answer.startswith("[Error") else "complete")
+        placeholder.markdown(answer)
 
-    st.session_state.messages.append({"role": "assistant", "content": answer, "chain": chain})
\ No newline at end of file
+    st.session_state.messages.append({"role": "assistant", "content": answer, "chain": chain})
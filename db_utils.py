@@ -1,12 +1,21 @@
+import io
 import os
+import re
+import threading
+from contextlib import contextmanager
+from urllib.parse import quote_plus
 from dotenv import load_dotenv
+import pandas as pd
 import psycopg2
+from psycopg2 import sql
+from psycopg2.extras import execute_values
+from psycopg2.pool import ThreadedConnectionPool
 
 # Load the variables from .env into environment variables
 load_dotenv()
 
-def connect():
-    return psycopg2.connect(
+def connection_params():
+    return dict(
         dbname=os.getenv("DB_NAME"),
         user=os.getenv("DB_USER"),
         password=os.getenv("DB_PASSWORD"),
@@ -14,8 +23,93 @@ def connect():
         port=os.getenv("DB_PORT")
     )
 
+def pool_settings():
+    """Connection pool bounds shared by the loaders and the chat agent (DB_POOL_MIN / DB_POOL_MAX in .env)."""
+    return {
+        "minconn": int(os.getenv("DB_POOL_MIN", "1")),
+        "maxconn": int(os.getenv("DB_POOL_MAX", "8")),
+    }
+
+def database_uri():
+    """SQLAlchemy URI for the same database, for prompt.py's SQLDatabase."""
+    params = connection_params()
+    if None in params.values():
+        raise ValueError("One or more environment variables are missing.")
+    user, password = quote_plus(params["user"]), quote_plus(params["password"])
+    return f"postgresql+psycopg2://{user}:{password}@{params['host']}:{int(params['port'])}/{params['dbname']}"
+
+def engine_args():
+    """SQLAlchemy engine arguments that size its pool like get_pool()'s."""
+    settings = pool_settings()
+    return {
+        "pool_size": settings["maxconn"],
+        "max_overflow": 0,
+        "pool_pre_ping": True,
+    }
+
+def connect():
+    """A new, unpooled connection. Prefer transaction(), which reuses pooled connections."""
+    return psycopg2.connect(**connection_params())
+
+_pool = None
+_pool_lock = threading.Lock()
+_local = threading.local()
+
+def get_pool():
+    """Returns the process-wide connection pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadedConnectionPool(**pool_settings(), **connection_params())
+    return _pool
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+
+@contextmanager
+def transaction(rollback=False):
+    """
+    Unit of work on a pooled connection: everything run inside the block commits together,
+    or rolls back together if it raises. The insert_* functions below join the enclosing
+    transaction when called inside one, so
+
+        with transaction():
+            insert_investment_manager(...)
+            filing_id = insert_filing(...)
+            for ...: insert_holding(...)
+
+    commits a whole filing at once on one connection. Outside a block, each call is its own
+    transaction. rollback=True rolls the block back even when it succeeds (the tests load
+    their fake filings this way); a block nested in another follows the outer one.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        yield conn
+        return
+    pool = get_pool()
+    conn = pool.getconn()
+    _local.conn = conn
+    try:
+        yield conn
+        if rollback:
+            conn.rollback()
+        else:
+            conn.commit()
+    except BaseException:
+        if not conn.closed:
+            conn.rollback()
+        raise
+    finally:
+        _local.conn = None
+        pool.putconn(conn, close=bool(conn.closed))
+
 def insert_investment_manager(cik, name, asset_size):
-    with connect() as conn:
+    with transaction() as conn:
         with conn.cursor() as cur:
             cur.execute("""
                 INSERT INTO InvestmentManagers (cik, name, asset_size)
@@ -23,23 +117,38 @@ def insert_investment_manager(cik, name, asset_size):
                 ON CONFLICT (cik) DO NOTHING;
             """, (cik, name, asset_size))
 
-def insert_filing(manager_cik, filing_date, year, quarter, raw_data_url, filing_type):
-    with connect() as conn:
+def insert_filing(manager_cik, filing_date, year, quarter, raw_data_url, filing_type, accession_number=None):
+    """
+    Inserts a filing and returns its filing_id. Filings are unique by accession number
+    (taken from raw_data_url when not given), so inserting one again returns the existing id.
+    """
+    if accession_number is None:
+        accession_number = accession_from_url(raw_data_url)
+    with transaction() as conn:
         with conn.cursor() as cur:
             cur.execute("""
-                INSERT INTO Filings (manager_cik, filing_date, year, quarter, raw_data_url, filing_type)
-                VALUES (%s, %s, %s, %s, %s, %s)
+                INSERT INTO Filings (manager_cik, filing_date, year, quarter, raw_data_url, filing_type, accession_number)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                ON CONFLICT (accession_number) DO UPDATE SET raw_data_url = EXCLUDED.raw_data_url
                 RETURNING filing_id;
-            """, (manager_cik, filing_date, year, quarter, raw_data_url, filing_type))
-            return cur.fetchone()[0]  
+            """, (manager_cik, filing_date, year, quarter, raw_data_url, filing_type, accession_number))
+            filing_id = cur.fetchone()[0]
+            if year is not None and quarter is not None:
+                ensure_holdings_partitions([(year, quarter)])
+            return filing_id
 
 def insert_security(ticker, cusip, name, sector):
-    with connect() as conn:
+    """Inserts a security by CUSIP (filling in a missing ticker or sector on an existing one) and returns its id."""
+    with transaction() as conn:
         with conn.cursor() as cur:
             cur.execute("""
                 INSERT INTO Securities (ticker, cusip, name, sector)
                 VALUES (%s, %s, %s, %s)
-                ON CONFLICT (cusip) DO NOTHING
+                ON CONFLICT (cusip) DO UPDATE SET
+                    ticker = COALESCE(Securities.ticker, EXCLUDED.ticker),
+                    sector = COALESCE(Securities.sector, EXCLUDED.sector)
+                WHERE (Securities.ticker IS NULL AND EXCLUDED.ticker IS NOT NULL)
+                   OR (Securities.sector IS NULL AND EXCLUDED.sector IS NOT NULL)
                 RETURNING security_id;
             """, (ticker, cusip, name, sector))
             result = cur.fetchone()
@@ -50,10 +159,395 @@ def insert_security(ticker, cusip, name, sector):
                 cur.execute("SELECT security_id FROM Securities WHERE cusip = %s", (cusip,))
                 return cur.fetchone()[0]
 
-def insert_holding(filing_id, security_id, position_size, market_value, weight):
-    with connect() as conn:
+def insert_holding(filing_id, security_id, position_size, market_value, weight, investment_discretion=""):
+    """
+    Inserts a holding, or replaces the filing's existing row for this security and discretion.
+    The holding's year and quarter (its Holdings partition) are copied from the filing.
+    """
+    with transaction() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO Holdings (filing_id, security_id, year, quarter, position_size, market_value, weight, investment_discretion)
+                SELECT filing_id, %s, year, quarter, %s, %s, %s, %s
+                FROM Filings
+                WHERE filing_id = %s
+                ON CONFLICT (filing_id, security_id, investment_discretion, year, quarter) DO UPDATE SET
+                    position_size = EXCLUDED.position_size,
+                    market_value = EXCLUDED.market_value,
+                    weight = EXCLUDED.weight;
+            """, (security_id, position_size, market_value, weight, investment_discretion or "", filing_id))
+
+def bump_data_version(cur):
+    """
+    Marks the loaded data as changed, in the caller's transaction, so answers cached for the
+    old data (see answer_cache.data_version) are not served once it commits.
+    """
+    cur.execute("UPDATE DataVersion SET version = version + 1;")
+
+def update_filing_totals(filing_ids):
+    """
+    Recomputes total_value and position_count for the given filings from their stored
+    Holdings, and each of their holdings' weight (market_value / total_value).
+    bulk_load_filings computes these as it loads; this is for holdings inserted one at a time.
+    """
+    filing_ids = list(filing_ids)
+    with transaction() as conn:
         with conn.cursor() as cur:
             cur.execute("""
-                INSERT INTO Holdings (filing_id, security_id, position_size, market_value, weight)
-                VALUES (%s, %s, %s, %s, %s);
-            """, (filing_id, security_id, position_size, market_value, weight))
\ No newline at end of file
+                UPDATE Filings f
+                SET total_value = (SELECT COALESCE(SUM(h.market_value), 0) FROM Holdings h WHERE h.filing_id = f.filing_id),
+                    position_count = (SELECT COUNT(*) FROM Holdings h WHERE h.filing_id = f.filing_id)
+                WHERE f.filing_id = ANY(%s);
+            """, (filing_ids,))
+            cur.execute("""
+                UPDATE Holdings h
+                SET weight = h.market_value / NULLIF(f.total_value, 0)
+                FROM Filings f
+                WHERE f.filing_id = h.filing_id AND f.filing_id = ANY(%s);
+            """, (filing_ids,))
+            bump_data_version(cur)
+
+def holdings_partition_name(year, quarter):
+    """Name of the Holdings partition for one filing quarter, e.g. holdings_2025q1."""
+    return f"holdings_{int(year)}q{int(quarter)}"
+
+def ensure_holdings_partitions(periods):
+    """Creates the Holdings partitions for any (year, quarter) periods that don't have one yet."""
+    with transaction() as conn:
+        with conn.cursor() as cur:
+            for year, quarter in sorted(set(periods)):
+                cur.execute("SELECT create_holdings_partition(%s, %s);", (int(year), int(quarter)))
+
+def is_attached_partition(cur, name):
+    """
+    Whether name is a partition attached to Holdings, according to pg_inherits. A detached
+    (e.g. archived) table of the same name is not.
+    """
+    cur.execute("""
+        SELECT 1 FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'holdings'::regclass AND c.relname = %s;
+    """, (name,))
+    return cur.fetchone() is not None
+
+def archive_holdings_partition(year, quarter, schema="archive"):
+    """
+    Detaches a quarter's Holdings partition and moves it into schema. Its rows stop appearing
+    in Holdings (and in the agent's queries) but stay in the database, where the table can be
+    dumped with pg_dump or dropped. restore_holdings_partition() reverses this.
+    """
+    name = holdings_partition_name(year, quarter)
+    with transaction() as conn:
+        with conn.cursor() as cur:
+            if not is_attached_partition(cur, name):
+                raise ValueError(f"{name} is not attached to Holdings")
+            cur.execute(sql.SQL("ALTER TABLE Holdings DETACH PARTITION {};").format(sql.Identifier(name)))
+            cur.execute(sql.SQL("CREATE SCHEMA IF NOT EXISTS {};").format(sql.Identifier(schema)))
+            cur.execute(sql.SQL("ALTER TABLE {} SET SCHEMA {};").format(sql.Identifier(name), sql.Identifier(schema)))
+            bump_data_version(cur)
+
+def next_quarter(year, quarter):
+    """The (year, quarter) after the given one."""
+    year, quarter = int(year), int(quarter)
+    return (year + 1, 1) if quarter == 4 else (year, quarter + 1)
+
+def restore_holdings_partition(year, quarter, schema="archive"):
+    """Moves an archived quarter back and re-attaches it to Holdings."""
+    year, quarter = int(year), int(quarter)
+    name = holdings_partition_name(year, quarter)
+    end_year, end_quarter = next_quarter(year, quarter)
+    with transaction() as conn:
+        with conn.cursor() as cur:
+            if is_attached_partition(cur, name):
+                raise ValueError(f"{name} is already attached to Holdings")
+            cur.execute(sql.SQL("ALTER TABLE {} SET SCHEMA public;").format(sql.Identifier(schema, name)))
+            cur.execute(sql.SQL("""
+                ALTER TABLE Holdings ATTACH PARTITION {}
+                FOR VALUES FROM ({}, {}) TO ({}, {});
+            """).format(sql.Identifier(name), *map(sql.Literal, (year, quarter, end_year, end_quarter))))
+            bump_data_version(cur)
+
+def refresh_position_changes(periods):
+    """
+    Recomputes PositionChanges for the given (manager_cik, year, quarter) periods after their
+    filings changed, plus the quarter after each, whose comparison is against them.
+    """
+    affected = set()
+    for cik, year, quarter in periods:
+        affected.add((cik, int(year), int(quarter)))
+        affected.add((cik, *next_quarter(year, quarter)))
+    if not affected:
+        return
+    with transaction() as conn:
+        with conn.cursor() as cur:
+            execute_values(cur, """
+                SELECT refresh_position_changes(cik, year, quarter)
+                FROM (VALUES %s) AS periods (cik, year, quarter);
+            """, sorted(affected), template="(%s::varchar, %s::int, %s::int)")
+            bump_data_version(cur)
+
+def refresh_rollups(periods):
+    """
+    Recomputes ManagerSectorExposure for the given (manager_cik, year, quarter) periods, and
+    SecurityOwnership for the securities those managers hold in those quarters.
+    """
+    periods = {(cik, int(year), int(quarter)) for cik, year, quarter in periods}
+    if not periods:
+        return
+    ciks_by_quarter = {}
+    for cik, year, quarter in periods:
+        ciks_by_quarter.setdefault((year, quarter), set()).add(cik)
+    with transaction() as conn:
+        with conn.cursor() as cur:
+            execute_values(cur, """
+                SELECT refresh_manager_sector_exposure(cik, year, quarter)
+                FROM (VALUES %s) AS periods (cik, year, quarter);
+            """, sorted(periods), template="(%s::varchar, %s::int, %s::int)")
+            for (year, quarter), ciks in sorted(ciks_by_quarter.items()):
+                cur.execute("SELECT refresh_security_ownership(%s, %s, %s::varchar[]);",
+                            (year, quarter, sorted(ciks)))
+            bump_data_version(cur)
+
+def tickers_missing_sector(tickers):
+    """The tickers among the given ones that no security in the database has a sector for yet."""
+    tickers = {ticker for ticker in tickers if ticker}
+    if not tickers:
+        return set()
+    with transaction() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT DISTINCT ticker FROM Securities
+                WHERE ticker = ANY(%s) AND sector IS NOT NULL;
+            """, (sorted(tickers),))
+            return tickers - {ticker for (ticker,) in cur.fetchall()}
+
+def fill_security_sectors(sectors):
+    """
+    Sets the sector of securities that don't have one yet from sectors ({ticker: sector}),
+    and refreshes the ManagerSectorExposure rows of every manager and quarter holding them.
+    """
+    if not sectors:
+        return
+    with transaction() as conn:
+        with conn.cursor() as cur:
+            updated = execute_values(cur, """
+                UPDATE Securities s
+                SET sector = v.sector
+                FROM (VALUES %s) AS v (ticker, sector)
+                WHERE s.ticker = v.ticker AND s.sector IS NULL
+                RETURNING s.security_id;
+            """, sorted(sectors.items()), fetch=True)
+            if not updated:
+                return
+            bump_data_version(cur)
+            cur.execute("""
+                SELECT DISTINCT f.manager_cik, h.year, h.quarter
+                FROM Holdings h
+                JOIN Filings f ON f.filing_id = h.filing_id
+                WHERE h.security_id = ANY(%s) AND f.manager_cik IS NOT NULL;
+            """, ([security_id for (security_id,) in updated],))
+            stale = cur.fetchall()
+            if stale:
+                execute_values(cur, """
+                    SELECT refresh_manager_sector_exposure(cik, year, quarter)
+                    FROM (VALUES %s) AS periods (cik, year, quarter);
+                """, stale, template="(%s::varchar, %s::int, %s::int)")
+
+# Filings store the full-submission .txt URL, which ends in the accession number
+ACCESSION_PATTERN = re.compile(r"(\d{10}-\d{2}-\d{6})\.txt$")
+
+def accession_from_url(raw_data_url):
+    match = ACCESSION_PATTERN.search(raw_data_url or "")
+    return match.group(1) if match else None
+
+def get_existing_accessions(manager_cik=None):
+    """Returns the set of accession numbers already stored in Filings (optionally for one manager)."""
+    with transaction() as conn:
+        with conn.cursor() as cur:
+            if manager_cik is None:
+                cur.execute("SELECT accession_number FROM Filings WHERE accession_number IS NOT NULL;")
+            else:
+                cur.execute("""
+                    SELECT accession_number FROM Filings
+                    WHERE manager_cik = %s AND accession_number IS NOT NULL;
+                """, (manager_cik,))
+            return {accession for (accession,) in cur}
+
+def get_high_water_marks():
+    """Returns {manager_cik: 'YYYY-MM-DD'}, the latest filing date ingested for each manager."""
+    with transaction() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT manager_cik, last_filing_date FROM IngestionState;")
+            return {cik: last_date.isoformat() for cik, last_date in cur.fetchall() if last_date}
+
+def update_high_water_marks(marks):
+    """
+    Advances managers' high-water marks from marks, a list of (manager_cik, filing_date,
+    accession) with one entry per manager; a mark never moves backwards.
+    """
+    with transaction() as conn:
+        with conn.cursor() as cur:
+            execute_values(cur, """
+                INSERT INTO IngestionState (manager_cik, last_filing_date, last_accession, updated_at)
+                VALUES %s
+                ON CONFLICT (manager_cik) DO UPDATE SET
+                    last_accession = CASE
+                        WHEN EXCLUDED.last_filing_date >= IngestionState.last_filing_date
+                        THEN EXCLUDED.last_accession ELSE IngestionState.last_accession END,
+                    last_filing_date = GREATEST(IngestionState.last_filing_date, EXCLUDED.last_filing_date),
+                    updated_at = NOW();
+            """, marks, template="(%s, %s, %s, NOW())")
+
+# Columns of the holdings frame bulk_load_filings copies into the staging table
+STAGING_COLUMNS = ["filing_id", "year", "quarter", "cusip", "issuer_name", "holding_ticker",
+                   "investment_discretion", "shares", "value", "weight"]
+
+def _copy_frame(cur, frame, table, columns):
+    """Streams a DataFrame into table with COPY FROM STDIN (empty fields load as NULL)."""
+    buffer = io.StringIO()
+    frame.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+def portfolio_weights(holdings):
+    """
+    Adds a weight column to a frame of holdings with filing_id and value columns: each
+    holding's value as a fraction of its filing's total value. Also returns the per-filing
+    totals as a frame indexed by filing_id with total_value and position_count (the number of
+    distinct security/discretion rows the filing will have in Holdings).
+    """
+    totals = holdings.groupby("filing_id")["value"].transform("sum")
+    weighted = holdings.assign(weight=holdings["value"] / totals.where(totals > 0))
+    filing_totals = pd.DataFrame({
+        "total_value": holdings.groupby("filing_id")["value"].sum(),
+        "position_count": holdings.drop_duplicates(["filing_id", "cusip", "investment_discretion"])
+                                  .groupby("filing_id").size(),
+    })
+    return weighted, filing_totals
+
+def bulk_load_filings(filings, holdings, sectors=None):
+    """
+    Loads a batch of filings and their holdings in one transaction, with a handful of
+    set-based statements instead of one round trip per row.
+
+    filings: list of dicts with manager_cik, manager_name, asset_size, filing_date, year,
+        quarter, raw_data_url, filing_type and accession
+    holdings: DataFrame with one row per holding and columns accession, cusip, issuer_name,
+        holding_ticker, investment_discretion, shares and value (e.g. the holdings table from
+        filings_store.split_filings)
+    sectors: optional {ticker: sector} used to fill in securities' missing sectors
+
+    Managers and filings are inserted with execute_values. Holdings are streamed with COPY
+    into a temporary staging table, new CUSIPs are upserted into Securities from there, and
+    the Holdings rows are inserted with a single join against Securities. Holdings without
+    a CUSIP cannot be matched to a security and are skipped. Portfolio weights and the filings'
+    total_value / position_count are computed here (see portfolio_weights). Each manager's
+    PositionChanges, the sector and ownership rollups, the high-water marks and the data version
+    are updated in the same transaction.
+
+    Loading is idempotent: filings are upserted by accession number, and a filing's rows for
+    the same security and investment discretion are summed into one Holdings row that
+    replaces any row already stored, so re-running a batch changes nothing.
+
+    Returns {accession: filing_id} for the batch's filings.
+    """
+    if not filings:
+        return {}
+    filings = list({f["accession"]: f for f in filings}.values())
+    with transaction() as conn:
+        with conn.cursor() as cur:
+            managers = {}
+            for filing in filings:
+                managers.setdefault(filing["manager_cik"], (filing["manager_cik"], filing["manager_name"], filing["asset_size"]))
+            execute_values(cur, """
+                INSERT INTO InvestmentManagers (cik, name, asset_size)
+                VALUES %s
+                ON CONFLICT (cik) DO NOTHING;
+            """, list(managers.values()))
+
+            rows = execute_values(cur, """
+                INSERT INTO Filings (manager_cik, filing_date, year, quarter, raw_data_url, filing_type, accession_number)
+                VALUES %s
+                ON CONFLICT (accession_number) DO UPDATE SET raw_data_url = EXCLUDED.raw_data_url
+                RETURNING accession_number, filing_id;
+            """, [
+                (f["manager_cik"], f["filing_date"], f["year"], f["quarter"], f["raw_data_url"], f["filing_type"], f["accession"])
+                for f in filings
+            ], fetch=True)
+            filing_ids = dict(rows)
+            ensure_holdings_partitions((f["year"], f["quarter"]) for f in filings)
+
+            staged = holdings[holdings["accession"].isin(filing_ids.keys()) & holdings["cusip"].notna()]
+            years = {f["accession"]: f["year"] for f in filings}
+            quarters = {f["accession"]: f["quarter"] for f in filings}
+            staged, filing_totals = portfolio_weights(staged.assign(
+                filing_id=staged["accession"].map(filing_ids),
+                year=staged["accession"].map(years),
+                quarter=staged["accession"].map(quarters),
+            ))
+            execute_values(cur, """
+                UPDATE Filings f
+                SET total_value = totals.total_value, position_count = totals.position_count
+                FROM (VALUES %s) AS totals (filing_id, total_value, position_count)
+                WHERE f.filing_id = totals.filing_id;
+            """, [
+                (filing_id, int(filing_totals["total_value"].get(filing_id, 0)),
+                 int(filing_totals["position_count"].get(filing_id, 0)))
+                for filing_id in filing_ids.values()
+            ], template="(%s::bigint, %s::decimal, %s::int)")
+
+            if not staged.empty:
+                staged = staged[STAGING_COLUMNS]
+                cur.execute("""
+                    CREATE TEMP TABLE HoldingsStaging (
+                        filing_id BIGINT,
+                        year INT,
+                        quarter SMALLINT,
+                        cusip VARCHAR,
+                        name VARCHAR,
+                        ticker VARCHAR,
+                        investment_discretion VARCHAR,
+                        position_size DECIMAL,
+                        market_value DECIMAL,
+                        weight DECIMAL
+                    ) ON COMMIT DROP;
+                """)
+                _copy_frame(cur, staged, "HoldingsStaging",
+                            ["filing_id", "year", "quarter", "cusip", "name", "ticker", "investment_discretion",
+                             "position_size", "market_value", "weight"])
+                cur.execute("""
+                    INSERT INTO Securities (ticker, cusip, name)
+                    SELECT DISTINCT ON (cusip) ticker, cusip, name
+                    FROM HoldingsStaging
+                    ORDER BY cusip, ticker NULLS LAST
+                    ON CONFLICT (cusip) DO UPDATE SET ticker = EXCLUDED.ticker
+                    WHERE Securities.ticker IS NULL AND EXCLUDED.ticker IS NOT NULL;
+                """)
+                fill_security_sectors(sectors)
+                cur.execute("""
+                    INSERT INTO Holdings (filing_id, security_id, year, quarter, investment_discretion,
+                                          position_size, market_value, weight)
+                    SELECT st.filing_id, s.security_id, st.year, st.quarter, COALESCE(st.investment_discretion, ''),
+                           SUM(st.position_size), SUM(st.market_value), SUM(st.weight)
+                    FROM HoldingsStaging st
+                    JOIN Securities s ON s.cusip = st.cusip
+                    GROUP BY st.filing_id, s.security_id, st.year, st.quarter, COALESCE(st.investment_discretion, '')
+                    ON CONFLICT (filing_id, security_id, investment_discretion, year, quarter) DO UPDATE SET
+                        position_size = EXCLUDED.position_size,
+                        market_value = EXCLUDED.market_value,
+                        weight = EXCLUDED.weight;
+                """)
+                # ON COMMIT DROP alone would leave it behind for the next load in an enclosing transaction
+                cur.execute("DROP TABLE HoldingsStaging;")
+
+            periods = [(f["manager_cik"], f["year"], f["quarter"]) for f in filings]
+            refresh_position_changes(periods)
+            refresh_rollups(periods)
+
+            latest = {}
+            for f in filings:
+                current = latest.get(f["manager_cik"])
+                if current is None or str(f["filing_date"]) >= str(current[1]):
+                    latest[f["manager_cik"]] = (f["manager_cik"], f["filing_date"], f["accession"])
+            update_high_water_marks(list(latest.values()))
+            bump_data_version(cur)
+            return filing_ids
@@ -0,0 +1,372 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+
+"""
+This file contains EdgarClient, the HTTP client get_filings.py uses to talk to SEC EDGAR.
+
+One client is shared by the whole process so that:
+  1. connections to the SEC are kept alive and reused instead of reopened per request,
+  2. every request, from every thread, goes through one rate limiter that keeps us under
+     the SEC's fair-access limit of 10 requests per second,
+  3. throttled (429) and server-error (5xx) responses are retried with backoff,
+  4. filing documents can be downloaded concurrently on the client's thread pool,
+  5. responses are kept in an on-disk ResponseCache, so re-runs barely touch the network.
+
+See https://www.sec.gov/os/accessing-edgar-data for the SEC's fair-access policy.
+"""
+
+HEADERS = {"User-Agent": "Some Name (some.email@example.com)"}
+SEC_DATA_URL = "https://data.sec.gov"
+SEC_ARCHIVES_URL = "https://www.sec.gov"
+SEC_MAX_REQUESTS_PER_SECOND = 10
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+CACHE_DIR = ".edgar_cache"
+SUBMISSIONS_TTL = 6 * 60 * 60  # seconds before a cached submissions JSON is revalidated
+
+
+def is_immutable_url(url):
+    """Filed documents under /Archives/edgar/data/ never change once they are published."""
+    return "/Archives/edgar/data/" in url
+
+
+class CachedResponse:
+    """The parts of a requests.Response that callers use, served from the ResponseCache."""
+
+    from_cache = True
+
+    def __init__(self, url, content, headers):
+        self.url = url
+        self.status_code = 200
+        self.content = content
+        self.headers = headers
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class ResponseCache:
+    """
+    On-disk cache of successful GET responses, keyed by a hash of the URL and stored gzipped.
+
+    Immutable documents (see is_immutable_url) are kept forever. Anything else, like the
+    submissions JSON, is fresh for ttl seconds; after that the client revalidates it with
+    If-None-Match / If-Modified-Since, and a 304 keeps the cached body for another ttl.
+    """
+
+    def __init__(self, directory=CACHE_DIR, ttl=SUBMISSIONS_TTL, immutable=is_immutable_url):
+        self.directory = directory
+        self.ttl = ttl
+        self.immutable = immutable
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url):
+        key = hashlib.sha256(url.encode()).hexdigest()
+        return os.path.join(self.directory, key[:2], key)
+
+    def _write(self, path, data):
+        # Write to a temporary file first so concurrent readers never see a partial entry
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def load_meta(self, url):
+        """Returns the cached entry's metadata dict without reading its body, or None."""
+        path = self._path(url)
+        try:
+            with open(path + ".json") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get("url") != url or not os.path.exists(path + ".gz"):
+            return None
+        return meta
+
+    def load(self, url):
+        """Returns the cached entry's metadata dict (with the body under "content"), or None."""
+        meta = self.load_meta(url)
+        if meta is None:
+            return None
+        try:
+            with self.open_body(meta) as f:
+                meta["content"] = f.read()
+        except (OSError, EOFError):
+            return None
+        return meta
+
+    def open_body(self, meta):
+        """Opens a cached body for streaming reads (decompressed on the fly)."""
+        return gzip.open(self._path(meta["url"]) + ".gz", "rb")
+
+    def is_fresh(self, meta):
+        return meta["immutable"] or time.time() - meta["fetched_at"] < self.ttl
+
+    def _meta(self, url, headers):
+        return json.dumps({
+            "url": url,
+            "immutable": self.immutable(url),
+            "fetched_at": time.time(),
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "content_type": headers.get("Content-Type"),
+        }).encode()
+
+    def store(self, url, content, headers):
+        path = self._path(url)
+        self._write(path + ".gz", gzip.compress(content))
+        self._write(path + ".json", self._meta(url, headers))
+
+    def writer(self, url, headers):
+        """A CacheWriter for storing a body chunk by chunk as it is downloaded."""
+        return CacheWriter(self, url, headers)
+
+    def touch(self, meta):
+        """Mark a revalidated (304) entry as fresh again."""
+        meta = {key: value for key, value in meta.items() if key != "content"}
+        meta["fetched_at"] = time.time()
+        self._write(self._path(meta["url"]) + ".json", json.dumps(meta).encode())
+
+    def response(self, meta):
+        headers = {"Content-Type": meta["content_type"]} if meta.get("content_type") else {}
+        return CachedResponse(meta["url"], meta["content"], headers)
+
+
+class CacheWriter:
+    """
+    Compresses a streamed body into a temporary file; commit() publishes it as a cache entry.
+    An entry that is never committed (e.g. the download failed) is discarded.
+    """
+
+    def __init__(self, cache, url, headers):
+        self.cache = cache
+        self.url = url
+        self.headers = headers
+        self.path = cache._path(url)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd, self._tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path))
+        self._file = gzip.GzipFile(fileobj=os.fdopen(fd, "wb"), mode="wb")
+        self._raw = self._file.fileobj
+
+    def write(self, chunk):
+        self._file.write(chunk)
+
+    def commit(self):
+        self._file.close()
+        self._raw.close()
+        os.replace(self._tmp_path, self.path + ".gz")
+        self.cache._write(self.path + ".json", self.cache._meta(self.url, self.headers))
+        self._tmp_path = None
+
+    def discard(self):
+        if self._tmp_path is None:
+            return
+        self._file.close()
+        self._raw.close()
+        os.remove(self._tmp_path)
+        self._tmp_path = None
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: acquire() blocks until a request may be sent.
+    With the default capacity of 1, requests are spaced at least 1/rate seconds apart,
+    so no one-second window ever holds more than rate requests.
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class EdgarClient:
+    """
+    Rate-limited, retrying HTTP client for EDGAR with a shared keep-alive connection pool.
+
+    rate: maximum requests per second across all threads
+    max_workers: size of the thread pool (and of the connection pool) used for concurrent downloads
+    max_retries: how many times a 429/5xx response or connection error is retried
+    backoff: base delay in seconds; retry n waits backoff * 2**n, or the server's Retry-After
+    data_url / archives_url: base URLs for the submissions API and filing archives
+        (overridable so tests can point the client at a local server)
+    cache: ResponseCache to serve and store responses (None disables caching)
+    """
+
+    def __init__(self, rate=SEC_MAX_REQUESTS_PER_SECOND, max_workers=8, max_retries=5, backoff=0.5,
+                 timeout=30, headers=HEADERS, data_url=SEC_DATA_URL, archives_url=SEC_ARCHIVES_URL,
+                 cache=None):
+        self.cache = cache
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.data_url = data_url
+        self.archives_url = archives_url
+        self.limiter = TokenBucket(rate)
+
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="edgar")
+
+    def _retry_delay(self, attempt, response=None):
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        return self.backoff * 2 ** attempt
+
+    def get(self, url, **kwargs):
+        """
+        GET url, from the cache when possible. A cached entry that is due for revalidation is
+        sent with conditional headers, and a 304 answer is served from the cache.
+        Successful responses are stored in the cache.
+        """
+        if self.cache is None:
+            return self.fetch(url, **kwargs)
+
+        cached = self.cache.load(url)
+        if cached is not None:
+            if self.cache.is_fresh(cached):
+                return self.cache.response(cached)
+            headers = dict(kwargs.pop("headers", None) or {})
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+            kwargs["headers"] = headers
+
+        response = self.fetch(url, **kwargs)
+        if response.status_code == 304 and cached is not None:
+            self.cache.touch(cached)
+            return self.cache.response(cached)
+        if response.status_code == 200:
+            self.cache.store(url, response.content, response.headers)
+        return response
+
+    @contextmanager
+    def stream(self, url, chunk_size=1 << 16):
+        """
+        GET url as a stream of byte chunks, so large documents never sit in memory whole.
+        Use as `with client.stream(url) as (status_code, chunks): ...`; chunks is empty
+        unless status_code is 200.
+
+        Fresh cache entries are streamed straight from disk. Otherwise the download is
+        written through to the cache as it is read; if the caller stops reading early, the
+        rest of the body is still drained into the cache when the block exits.
+        """
+        if self.cache is not None:
+            cached = self.cache.load_meta(url)
+            if cached is not None and self.cache.is_fresh(cached):
+                with self.cache.open_body(cached) as body:
+                    yield 200, iter(lambda: body.read(chunk_size), b"")
+                return
+            if cached is not None:
+                # Due for revalidation, which get() already knows how to do
+                response = self.get(url)
+                yield response.status_code, iter([response.content] if response.status_code == 200 else [])
+                return
+
+        response = self.fetch(url, stream=True)
+        try:
+            if response.status_code != 200:
+                yield response.status_code, iter(())
+                return
+            chunks = response.iter_content(chunk_size)
+            if self.cache is None:
+                yield 200, chunks
+                return
+
+            writer = self.cache.writer(url, response.headers)
+            try:
+                def write_through():
+                    for chunk in chunks:
+                        writer.write(chunk)
+                        yield chunk
+                yield 200, write_through()
+                for chunk in chunks:
+                    writer.write(chunk)
+                writer.commit()
+            finally:
+                writer.discard()
+        finally:
+            response.close()
+
+    def fetch(self, url, **kwargs):
+        """
+        GET url from the network, waiting for the rate limiter and retrying 429/5xx responses
+        and connection errors. Returns the final response, which may still be an error status;
+        raises the last connection error if every attempt failed to connect.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            try:
+                response = self.session.get(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(self._retry_delay(attempt))
+                continue
+
+            if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                return response
+            response.close()
+            time.sleep(self._retry_delay(attempt, response))
+
+    def submit(self, fn, *args, **kwargs):
+        """Run fn on the client's download thread pool. Returns a Future."""
+        return self.executor.submit(fn, *args, **kwargs)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client(cache_dir=CACHE_DIR):
+    """
+    Returns the process-wide EdgarClient, creating it on first use.
+    Its responses are cached under cache_dir (None disables the cache); the argument
+    only takes effect on that first call.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = EdgarClient(cache=ResponseCache(cache_dir) if cache_dir else None)
+    return _client
@@ -0,0 +1,136 @@
+import os
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from get_filings import HOLDINGS_COLUMNS, holdings_frame
+
+"""
+This file reads and writes fetched 13F filings as a partitioned Parquet dataset,
+the intermediate format between get_filings.py and the database loaders.
+
+The dataset is two normalized tables, both partitioned by the filing's year and quarter:
+    <root>/filings/year=2025/quarter=1/<batch>.parquet   one row per filing
+    <root>/holdings/year=2025/quarter=1/<batch>.parquet  one row per holding, keyed by accession
+Each write adds new files, so batches of filings can be appended as they are fetched.
+Readers select only the columns and partitions they need.
+"""
+
+DATASET_PATH = "13f_filings_demo"
+
+# Filing-level columns produced by get_all_13f_filings (everything except the nested "data")
+FILING_COLUMNS = [
+    "accession", "form", "cik", "date", "url", "text_url",
+    "Ticker Symbol", "Institution Name", "Sector/Industry",
+    "Assets Under Management (AUM)", "Fund Type",
+]
+PARTITION_COLUMNS = ["year", "quarter"]
+
+
+def filing_period(filing_date):
+    """(year, quarter) of a 'YYYY-MM-DD' filing date."""
+    year = int(filing_date[:4])
+    month = int(filing_date[5:7])
+    return year, (month - 1) // 3 + 1
+
+
+def split_filings(filings):
+    """
+    Splits a get_all_13f_filings frame into the two dataset tables.
+
+    Returns:
+        (filings_table, holdings_table): the filing rows without their nested holdings, and
+        every filing's holdings stacked into one frame with the filing's accession, cik and period.
+    """
+    filings_table = filings[[column for column in FILING_COLUMNS if column in filings.columns]].copy()
+    periods = [filing_period(date) for date in filings_table["date"]]
+    filings_table["year"] = [year for year, _ in periods]
+    filings_table["quarter"] = [quarter for _, quarter in periods]
+
+    frames = []
+    for accession, cik, (year, quarter), holdings in zip(filings["accession"], filings["cik"], periods, filings["data"]):
+        if holdings is None or holdings.empty:
+            continue
+        holdings = holdings[HOLDINGS_COLUMNS].copy()
+        holdings.insert(0, "accession", accession)
+        holdings.insert(1, "cik", cik)
+        holdings["year"] = year
+        holdings["quarter"] = quarter
+        frames.append(holdings)
+
+    if frames:
+        holdings_table = pd.concat(frames, ignore_index=True)
+    else:
+        holdings_table = holdings_frame([])
+        for column in ["accession", "cik"] + PARTITION_COLUMNS:
+            holdings_table[column] = pd.Series(dtype="object")
+    # Categories differ from filing to filing; plain strings keep batches schema-compatible
+    holdings_table["investment_discretion"] = holdings_table["investment_discretion"].astype("string")
+    return filings_table, holdings_table
+
+
+def _write_table(frame, path, batch_id):
+    if frame.empty:
+        return
+    pq.write_to_dataset(
+        pa.Table.from_pandas(frame, preserve_index=False),
+        root_path=path,
+        partition_cols=PARTITION_COLUMNS,
+        basename_template=f"{batch_id}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+    )
+
+
+def write_filings_dataset(filings, root=DATASET_PATH):
+    """
+    Appends a frame of filings (as returned by get_all_13f_filings) to the Parquet dataset at root.
+    Returns the number of (filings, holdings) rows written.
+    """
+    filings_table, holdings_table = split_filings(filings)
+    batch_id = uuid.uuid4().hex
+    _write_table(filings_table, os.path.join(root, "filings"), batch_id)
+    _write_table(holdings_table, os.path.join(root, "holdings"), batch_id)
+    return len(filings_table), len(holdings_table)
+
+
+def _period_filters(year=None, quarter=None):
+    filters = []
+    if year is not None:
+        filters.append(("year", "=", year))
+    if quarter is not None:
+        filters.append(("quarter", "=", quarter))
+    return filters or None
+
+
+def _read_table(path, columns, year, quarter):
+    if not os.path.isdir(path):
+        return pd.DataFrame(columns=columns)
+    # Arrow-backed columns avoid converting (and copying) the data into NumPy/object arrays
+    frame = pd.read_parquet(
+        path,
+        columns=columns,
+        filters=_period_filters(year, quarter),
+        dtype_backend="pyarrow",
+    )
+    for column in PARTITION_COLUMNS:
+        if column in frame.columns:
+            frame[column] = frame[column].astype("int64")
+    return frame
+
+
+def read_filings(root=DATASET_PATH, columns=None, year=None, quarter=None):
+    """Reads the filings table, optionally only some columns and only one year/quarter."""
+    return _read_table(os.path.join(root, "filings"), columns, year, quarter)
+
+
+def read_holdings(root=DATASET_PATH, columns=None, year=None, quarter=None):
+    """Reads the holdings table, optionally only some columns and only one year/quarter."""
+    return _read_table(os.path.join(root, "holdings"), columns, year, quarter)
+
+
+def dataset_periods(root=DATASET_PATH):
+    """The (year, quarter) partitions present in the dataset, oldest first."""
+    periods = read_filings(root, columns=PARTITION_COLUMNS).drop_duplicates()
+    return sorted(zip(periods["year"], periods["quarter"]))
@@ -1,14 +1,152 @@
+import argparse
 import pandas as pd
 #from config import API_KEY #later on we will individually need to create a config.py file with api keys
-import requests
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import re
 import xml.etree.ElementTree as ET
-import yfinance as yf
+from yahoo_info import get_yahoo
 from tqdm import tqdm
 import json
 from bs4 import BeautifulSoup
-from name_to_ticker import get_ticker_from_name, clean_security_name
+from name_to_ticker import get_tickers_from_names, get_resolver
+from edgar_client import get_client
 
-def fetch_holdings_data(URL):
+INFO_TABLE_NS = 'http://www.sec.gov/edgar/document/thirteenf/informationtable'
+# format: <informationTable xmlns..> ... </informationTable>, possibly with a namespace prefix
+INFO_TABLE_START = re.compile(rb"<(\w+:)?informationTable[\s>]")
+
+
+# A parsed holding: one flat record per <infoTable> row (value in dollars)
+Holding = namedtuple("Holding", [
+    "issuer_name", "cusip", "value", "shares", "investment_discretion",
+    "voting_sole", "voting_shared", "voting_none",
+])
+INTEGER_COLUMNS = ["value", "shares", "voting_sole", "voting_shared", "voting_none"]
+HOLDINGS_COLUMNS = [
+    "issuer_name", "cusip", "value", "shares", "investment_discretion", "holding_ticker",
+    "voting_sole", "voting_shared", "voting_none",
+]
+
+
+def _int_or_none(element):
+    return int(element.text) if element is not None and element.text and element.text.isdigit() else None
+
+
+def _text_or_none(element):
+    return element.text if element is not None else None
+
+
+def _holding_from_element(info):
+    """Extracts one Holding from an <infoTable> element."""
+    ns = {'info': INFO_TABLE_NS}
+    value = _int_or_none(info.find('info:value', ns))
+    voting = info.find('info:votingAuthority', ns)
+    if voting is None:
+        voting = ET.Element("votingAuthority")
+
+    return Holding(
+        issuer_name=_text_or_none(info.find('info:nameOfIssuer', ns)),
+        cusip=_text_or_none(info.find('info:cusip', ns)),
+        value=value * 1000 if value is not None else None,  # Value in thousands
+        shares=_int_or_none(info.find('info:shrsOrPrnAmt/info:sshPrnamt', ns)),
+        investment_discretion=_text_or_none(info.find('info:investmentDiscretion', ns)),
+        voting_sole=_int_or_none(voting.find('info:Sole', ns)),
+        voting_shared=_int_or_none(voting.find('info:Shared', ns)),
+        voting_none=_int_or_none(voting.find('info:None', ns)),
+    )
+
+
+def holdings_frame(holdings, tickers=None):
+    """
+    Builds the typed, flat holdings DataFrame from a list of Holding records.
+    The records are transposed into one array per column: nullable int64 for the
+    amounts, a categorical for investment discretion and strings for names/CUSIPs.
+    tickers, if given, becomes the holding_ticker column.
+    """
+    columns = list(zip(*holdings)) if holdings else [()] * len(Holding._fields)
+    data = dict(zip(Holding._fields, columns))
+    frame = pd.DataFrame({
+        "issuer_name": pd.array(data["issuer_name"], dtype="string"),
+        "cusip": pd.array(data["cusip"], dtype="string"),
+        **{column: pd.array(data[column], dtype="Int64") for column in INTEGER_COLUMNS},
+        "investment_discretion": pd.Categorical(data["investment_discretion"]),
+        "holding_ticker": pd.array(tickers if tickers is not None else [None] * len(holdings), dtype="string"),
+    })
+    return frame[HOLDINGS_COLUMNS]
+
+
+def holdings_records(frame):
+    """A holdings frame as a list of plain dicts (None for missing values), for JSON or SQL parameters."""
+    return frame.astype(object).where(frame.notna(), None).to_dict(orient="records")
+
+
+def iter_holdings(chunks):
+    """
+    Streams the holdings out of a filing's full-submission text, one at a time.
+
+    chunks: an iterable of bytes, e.g. a download as it arrives
+    Yields one Holding record per <infoTable>. Only the <informationTable>
+    part of the document is parsed, and each row is discarded once it has been yielded,
+    so memory stays bounded however many holdings the filing lists.
+    Raises xml.etree.ElementTree.ParseError if the information table is malformed or cut off.
+    """
+    parser = ET.XMLPullParser(events=("start", "end"))
+    info_table_tag = f"{{{INFO_TABLE_NS}}}infoTable"
+    root = None
+    end_marker = None
+    window = b""  # bytes carried over so a marker split across two chunks is still found
+
+    for chunk in chunks:
+        if end_marker is None:
+            window += chunk
+            match = INFO_TABLE_START.search(window)
+            if match is None:
+                window = window[-64:]
+                continue
+            end_marker = b"</" + (match.group(1) or b"") + b"informationTable>"
+            chunk = window[match.start():]
+            window = b""
+
+        # Stop feeding at the closing tag; whatever follows is not XML
+        combined = window + chunk
+        end = combined.find(end_marker)
+        if end != -1:
+            chunk = chunk[:end + len(end_marker) - len(window)]
+        else:
+            window = combined[-(len(end_marker) - 1):]
+        parser.feed(chunk)
+
+        for event, element in parser.read_events():
+            if event == "start" and root is None:
+                root = element
+            elif event == "end" and element.tag == info_table_tag:
+                yield _holding_from_element(element)
+                # Drop finished rows so the tree never grows
+                root.clear()
+        if end != -1:
+            break
+
+    if end_marker is not None:
+        parser.close()
+
+
+def stream_holdings(URL, client=None):
+    """
+    Generator over the holdings of the filing at URL, read straight from the download
+    (or the cache) without holding the whole document in memory. Tickers are not resolved.
+    Yields nothing if the filing can't be fetched or has no information table.
+    """
+    if client is None:
+        client = get_client()
+    with client.stream(URL) as (status_code, chunks):
+        if status_code != 200:
+            #print(f"Failed to fetch data from {URL}")
+            return
+        yield from iter_holdings(chunks)
+
+
+def fetch_holdings_data(URL, resolver=None, client=None):
     """
         TODO: Visit the URL to and return the holdings data for this filing.
         (example URL that will be passed in, a filing for GOOGL: https://www.sec.gov/Archives/edgar/data/1652044/000156761922020202/0001567619-22-020202.txt)
@@ -18,130 +156,109 @@ def fetch_holdings_data(URL):
         Each holding includes the name of the issuer, CUSIP, value, shares, investment discretion, and voting authority, and maybe some other information.
         Extract this information for each holding (maybe as a dictionary) and return a list of all holdings.
         (Or maybe return a dataframe where each row is a holding)
+
+        The document is parsed as it streams in (see stream_holdings), and the result is a
+        typed DataFrame with one row per holding and the columns in HOLDINGS_COLUMNS (see holdings_frame).
+
+        resolver: TickerResolver used to map issuer names to tickers (defaults to the process-wide one).
+        client: EdgarClient used for the download (defaults to the process-wide one).
     """
     pd.set_option('display.max_columns', None)
     pd.set_option('display.max_colwidth', None)
-    headers = {"User-Agent": "Some Name (some.email@example.com)"}
-    response = requests.get(URL, headers=headers)
-    
-    if response.status_code != 200:
-        #print(f"Failed to fetch data from {URL}")
-        return pd.DataFrame()
-    
-    # format: <informationTable xmlns..> ... </informationTable>
-    start_index = response.text.find("<informationTable")
-    if start_index == -1:
-        #print(f"Can't find <informationTable> in {URL}")
-        return pd.DataFrame()
-    xml_text = response.text[start_index:]
-    end_index = xml_text.find("</informationTable>")
-    if end_index == -1:
-        print("Can't find <informationTable> in {URL}")
-        return pd.DataFrame()
-    xml_text = xml_text[:end_index+len("</informationTable>")]
-    
-    # Element Tree XML
+
     try:
-        root = ET.fromstring(xml_text)
+        holdings = list(tqdm(stream_holdings(URL, client), desc="Parsing holdings", unit=" holdings"))
     except ET.ParseError as e:
         print("XML parsing error:", e)
         return pd.DataFrame()
-    
-    # Namespace dictionary based on the XML content
-    ns = {'info': 'http://www.sec.gov/edgar/document/thirteenf/informationtable'}
-    
-    holdings = []
-    print(f"Fetching {len(root.findall('.//info:infoTable', ns))} holdings from this filing.")
-    counting=0
-
-    # Load and clean name-to-ticker mapping csv
-    tickers_df = pd.read_csv("name_ticker_mapping.csv")
-    tickers_df["Clean Name"] = tickers_df["Security Name"].apply(clean_security_name)
-    choices = tickers_df["Clean Name"].tolist()
-
-    for info in tqdm(root.findall('.//info:infoTable', ns)):
-        #print(counting)
-        counting+=1
-        issuer_name = info.find('info:nameOfIssuer', ns)
-        cusip = info.find('info:cusip', ns)
-        value = info.find('info:value', ns)
-        shares = info.find('info:shrsOrPrnAmt/info:sshPrnamt', ns)
-        investment_discretion = info.find('info:investmentDiscretion', ns)
-        voting = info.find('info:votingAuthority', ns)
-        sole = voting.find('info:Sole', ns) if voting is not None else None
-        shared = voting.find('info:Shared', ns) if voting is not None else None
-        none_val = voting.find('info:None', ns) if voting is not None else None
-
-        holding = {
-            "issuer_name": issuer_name.text if issuer_name is not None else None,
-            "cusip": cusip.text if cusip is not None else None,
-            "value": int(value.text) * 1000 if value is not None and value.text.isdigit() else None,  # Value in thousands
-            "shares": int(shares.text) if shares is not None and shares.text.isdigit() else None,
-            "investment_discretion": investment_discretion.text if investment_discretion is not None else None,
-            "holding_ticker": get_ticker_from_name(issuer_name.text, choices, tickers_df),
-            "voting_authority": {
-                "sole": int(sole.text) if sole is not None and sole.text.isdigit() else None,
-                "shared": int(shared.text) if shared is not None and shared.text.isdigit() else None,
-                "none": int(none_val.text) if none_val is not None and none_val.text.isdigit() else None,
-            }
-        }
-        holdings.append(holding)
-    
-    return pd.DataFrame(holdings)
+    if not holdings:
+        return pd.DataFrame()
+    print(f"Fetched {len(holdings)} holdings from this filing.")
+
+    # Name-to-ticker mapping is loaded and cleaned once per process
+    if resolver is None:
+        resolver = get_resolver()
+
+    # Match all the filing's issuer names in one batch instead of one fuzzy scan per holding
+    tickers = get_tickers_from_names(
+        [h.issuer_name for h in holdings],
+        resolver,
+        cusips=[h.cusip for h in holdings],
+    )
+    resolver.ticker_cache.flush()
+
+    return holdings_frame(holdings, tickers)
     
 
-def get_filings(cik):
+def get_filings(cik, client=None, skip_accessions=None, since=None):
     """
     Fetches all recent 13F filings for a given Central Index Key (CIK).
+    The filing documents are downloaded and parsed concurrently on the client's thread pool.
     
     Args:
         cik (str): The CIK number of the institution.
+        client (EdgarClient): HTTP client to use (defaults to the process-wide one).
+        skip_accessions (set): Accession numbers already ingested; these filings are not downloaded.
+        since (str): Only filings dated on or after this YYYY-MM-DD date (the CIK's high-water mark) are fetched.
     
     Returns:
-        df: A dataframe containing filings for the CIK. The columns are form type, filing date, URL, and holdings listed in the filing.
+        df: A dataframe containing filings for the CIK. The columns are form type, accession number, filing date, URL, and holdings listed in the filing.
     """
     #See https://www.sec.gov/search-filings/edgar-application-programming-interfaces 
     #for more information on the SEC EDGAR API we are using.
 
+    if client is None:
+        client = get_client()
+
     # url = f"https://data.sec.gov/submissions/CIK{cik:010}.json"
-    url = f"https://data.sec.gov/submissions/CIK{int(cik):010d}.json"
-    headers = {"User-Agent": "Some Name (some.email@example.com)"}
+    url = f"{client.data_url}/submissions/CIK{int(cik):010d}.json"
     
-    response = requests.get(url, headers=headers)
+    response = client.get(url)
     
     if response.status_code != 200:
         print(f"There was an error fetching the data for CIK {cik}.")
-        return []  # Return empty list
+        return pd.DataFrame()  # Return empty dataframe
   
     data = response.json()
     filings = data.get("filings", {}).get("recent", {})
     
     indices = [i for i, form in enumerate(filings.get("form", [])) if "13F" in form]
+    # Incremental runs: only filings we have not stored yet
+    if since is not None:
+        indices = [i for i in indices if filings["filingDate"][i] >= since]
+    if skip_accessions:
+        indices = [i for i in indices if filings["accessionNumber"][i] not in skip_accessions]
     if not indices:
-        return pd.DataFrame() #return empty dataframe; this cik has no 13f filings
+        return pd.DataFrame() #return empty dataframe; this cik has no (new) 13f filings
     
+    print(f"num of filings for cik {cik}: {len(indices)}")
     results = []
     for i in indices:
-        print(f"num of filings for cik {cik}: {len(indices)}")
         accession = filings["accessionNumber"][i].replace("-", "")
-        text_url = f"https://www.sec.gov/Archives/edgar/data/{int(cik)}/{accession}/{filings['accessionNumber'][i]}.txt"
+        base_url = f"{client.archives_url}/Archives/edgar/data/{int(cik)}/{accession}/{filings['accessionNumber'][i]}"
+        text_url = f"{base_url}.txt"
         #print(text_url)
 
         one_filing = {
             "form": filings["form"][i],
+            "accession": filings["accessionNumber"][i],
             "cik": cik,
             "date": filings["filingDate"][i],
-            "url": f"https://www.sec.gov/Archives/edgar/data/{int(cik)}/{accession}/{filings['accessionNumber'][i]}-index.html",
+            "url": f"{base_url}-index.html",
             "text_url": text_url,
-            "data" : fetch_holdings_data(text_url) #the textual data of a filing is multiple holdings 
+            # the textual data of a filing is multiple holdings; download and parse in the background
+            "data": client.submit(fetch_holdings_data, text_url, None, client),
             }
 
         results.append(one_filing)
 
+    for one_filing in results:
+        one_filing["data"] = one_filing["data"].result()
+
     return pd.DataFrame(results)
 
 
-def fetch_cik_dict(demo_ciks=True):
+def fetch_cik_dict(demo_ciks=True, client=None):
     """
     Returns a dictionary mapping CIKs to (Ticker Symbol, Institution Name) from the SEC website.
     """
@@ -169,10 +286,11 @@ def fetch_cik_dict(demo_ciks=True):
         return demo_dict
 
     else:
-        url = "https://www.sec.gov/files/company_tickers.json"
-        headers = {"User-Agent": "Some Name (some.email@example.com)"}
+        if client is None:
+            client = get_client()
+        url = f"{client.archives_url}/files/company_tickers.json"
         
-        response = requests.get(url, headers=headers)
+        response = client.get(url)
         if response.status_code != 200:
             return {}
         
@@ -180,71 +298,148 @@ def fetch_cik_dict(demo_ciks=True):
         return {str(item["cik_str"]).zfill(10): (item["ticker"], item["title"]) for item in data.values()}
 
 
-def get_all_13f_filings(MAX_NUM_TO_FETCH=6):
+def iter_13f_filings(MAX_NUM_TO_FETCH=6, client=None, cik_workers=4, skip_accessions=None, high_water_marks=None,
+                     yahoo=None):
+    """
+    Fetches the 13F filings of every CIK, one CIK at a time.
+    Yields one dataframe per CIK with new filings, in CIK order, so callers can process and
+    release each batch instead of holding every filing (and its holdings) in memory.
+    Arguments are the same as get_all_13f_filings.
+    """
+    if client is None:
+        client = get_client()
+    if yahoo is None:
+        yahoo = get_yahoo()
+    cik_mapping = fetch_cik_dict(demo_ciks=True, client=client)
+    count = 0
+
+    if high_water_marks is None:
+        high_water_marks = {}
+
+    def fetch(cik):
+        return get_filings(cik, client, skip_accessions, high_water_marks.get(cik))
+
+    ciks = iter(cik_mapping.keys())
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=cik_workers, thread_name_prefix="cik") as cik_pool:
+        # Keep a window of upcoming CIKs in flight, but consume them in order
+        for cik in ciks:
+            pending.append((cik, cik_pool.submit(fetch, cik)))
+            if len(pending) == cik_workers:
+                break
+
+        try:
+            with tqdm(total=len(cik_mapping), desc="Fetching 13F Filings") as progress:
+                while pending:
+                    cik, future = pending.popleft()
+                    next_cik = next(ciks, None)
+                    if next_cik is not None:
+                        pending.append((next_cik, cik_pool.submit(fetch, next_cik)))
+
+                    cik_filings = future.result()
+                    progress.update(1)
+                    if cik_filings.empty:
+                        continue
+
+                    cik_filings["Ticker Symbol"] = cik_mapping[cik][0]
+                    cik_filings["Institution Name"] = cik_mapping[cik][1]
+                    # The Yahoo cache keeps this to one lookup per distinct manager ticker
+                    yield yahoo.enrich(cik_filings)
+                    count += 1
+
+                    if count == MAX_NUM_TO_FETCH:
+                        break
+        finally:
+            # Drop the CIKs fetched ahead that we no longer need
+            for _, extra in pending:
+                extra.cancel()
+
+
+def get_all_13f_filings(MAX_NUM_TO_FETCH=6, client=None, cik_workers=4, skip_accessions=None, high_water_marks=None,
+                        yahoo=None):
     """
     Fetches all 13F filings for every CIK.
     MAX_NUM_TO_FETCH: An optional argument specifying the maximum number of 
     CIKs to scrape (to save time).
+    client: EdgarClient to use (defaults to the process-wide one).
+    cik_workers: how many CIKs are fetched ahead concurrently. All requests still share
+    the client's rate limit, so this only overlaps waiting on the network.
+    skip_accessions / high_water_marks: for incremental runs, the accession numbers already
+    ingested and a dict of CIK -> latest filing date ingested (see get_filings). CIKs with
+    nothing new are skipped and do not count towards MAX_NUM_TO_FETCH.
+    yahoo: YahooInfo used to add the managers' sector, AUM and fund type (defaults to the
+    process-wide one).
     
     Returns:
         df: A dataframe of all 13F filings across all CIKs.
+    Large runs should use iter_13f_filings instead, which does not keep every filing in memory.
     """
-    cik_mapping = fetch_cik_dict(demo_ciks=True)
-    df = pd.DataFrame()
-    count = 0
-    
-    for cik in tqdm(cik_mapping.keys(), desc="Fetching 13F Filings"):
-        cik_filings = get_filings(cik)
-        if cik_filings.empty:
-            continue
-      
-        cik_filings["Ticker Symbol"] = cik_mapping[cik][0]
-        cik_filings["Institution Name"] = cik_mapping[cik][1]
-        cik_filings["Sector/Industry"] = cik_filings["Ticker Symbol"].apply(lambda x: get_sector_from_yahoo(x) if pd.notna(x) else "N/A")
-        cik_filings["Assets Under Management (AUM)"] = cik_filings["Ticker Symbol"].apply(lambda x: get_aum_and_fund_type(x)["AUM"] if pd.notna(x) else "N/A")
-        cik_filings["Fund Type"] = cik_filings["Ticker Symbol"].apply(lambda x: get_aum_and_fund_type(x)["Fund Type"] if pd.notna(x) else "N/A")
-        df = pd.concat([df, cik_filings], ignore_index=True)
-        count+=1
-      
-        if count == MAX_NUM_TO_FETCH:
-            break
-
-    return df
+    batches = list(iter_13f_filings(MAX_NUM_TO_FETCH, client, cik_workers, skip_accessions, high_water_marks, yahoo))
+    if not batches:
+        return pd.DataFrame()
+    return pd.concat(batches, ignore_index=True)
 
 
 def get_sector_from_yahoo(ticker):
     """Fetch sector/industry from Yahoo Finance"""
-    try:
-        stock = yf.Ticker(ticker)
-        sector = stock.info.get("sector", "N/A")
-        return sector
-    except:
-        return "N/A"
-    
+    return get_yahoo().info_frame([ticker])["Sector/Industry"].get(ticker, "N/A")
+
+
+def get_sectors_from_yahoo(tickers, yahoo=None):
+    """
+    Sectors for many tickers as {ticker: sector}, looking each distinct ticker up once.
+    Tickers Yahoo Finance has no sector for are left out.
+    """
+    if yahoo is None:
+        yahoo = get_yahoo()
+    return {ticker: info["sector"] for ticker, info in yahoo.info_for(tickers).items() if info.get("sector")}
+
 
 def get_aum_and_fund_type(ticker):
     """Fetch AUM (Assets Under Management) and Fund Type from Yahoo Finance."""
-    try:
-        stock = yf.Ticker(ticker)
-        aum = stock.info.get("totalAssets", "N/A")
-        fund_type = stock.info.get("category", "N/A")
-        
-        if isinstance(aum, (int, float)):
-            aum = f"${aum/1e9:.2f}B"
-        
-        return {"AUM": aum, "Fund Type": fund_type}
-    except:
+    info = get_yahoo().info_frame([ticker])
+    if ticker not in info.index:
         return {"AUM": "N/A", "Fund Type": "N/A"}
+    return {"AUM": info.at[ticker, "Assets Under Management (AUM)"], "Fund Type": info.at[ticker, "Fund Type"]}
 
 
-def main():
-    
-    filings = get_all_13f_filings(MAX_NUM_TO_FETCH=10)
-    print(f"Fetched {len(filings)} 13F filings.")
-    filings["data"] = filings["data"].apply(lambda df: df.to_dict(orient="records"))
+def write_filings_csv(filings, path="13f_filings_demo.csv", append=False):
+    """
+    Legacy export: one row per filing, with its holdings JSON-dumped into the "data" cell.
+    append: add the rows to an existing file (without repeating the header).
+    """
+    filings = filings.copy()
+    filings["data"] = filings["data"].apply(holdings_records)
     filings["data"] = filings["data"].apply(json.dumps)
-    filings.to_csv("13f_filings_demo.csv", index=False)
-    print("✅ CSV file '13f_filings_demo.csv' has been created successfully.")
+    filings.to_csv(path, index=False, mode="a" if append else "w", header=not append)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch 13F filings and save them locally.")
+    parser.add_argument("--csv", action="store_true", help="Write the legacy 13f_filings_demo.csv instead of the Parquet dataset")
+    args = parser.parse_args()
+
+    if args.csv:
+        def write(filings, first):
+            write_filings_csv(filings, "13f_filings_demo.csv", append=not first)
+    else:
+        from filings_store import DATASET_PATH, write_filings_dataset
+
+        def write(filings, first):
+            write_filings_dataset(filings, DATASET_PATH)
+
+    # Each CIK's filings are written out, then dropped, as soon as they are fetched
+    num_filings, num_holdings = 0, 0
+    for filings in iter_13f_filings(MAX_NUM_TO_FETCH=10):
+        write(filings, first=num_filings == 0)
+        num_filings += len(filings)
+        num_holdings += int(filings["data"].map(len).sum())
+
+    print(f"Fetched {num_filings} 13F filings.")
+    if args.csv:
+        print("✅ CSV file '13f_filings_demo.csv' has been created successfully.")
+    else:
+        print(f"✅ Wrote {num_filings} filings and {num_holdings} holdings to the Parquet dataset '{DATASET_PATH}/'.")
 
 if __name__ == "__main__":
     main()
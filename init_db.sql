@@ -1,4 +1,5 @@
-
+-- The full current schema, for creating a new database in one step.
+-- Existing databases are upgraded with `python migrate.py`; keep this file in sync with migrations/.
 CREATE TABLE InvestmentManagers (
     cik VARCHAR PRIMARY KEY,
     name VARCHAR,
@@ -12,7 +13,10 @@ CREATE TABLE Filings (
     year INT,
     quarter SMALLINT,
     raw_data_url VARCHAR,
-    filing_type VARCHAR
+    filing_type VARCHAR,
+    accession_number VARCHAR UNIQUE,
+    total_value DECIMAL,     -- sum of the filing's Holdings.market_value
+    position_count INT       -- number of the filing's Holdings rows
 );
 
 CREATE TABLE Securities (
@@ -23,11 +27,259 @@ CREATE TABLE Securities (
     sector VARCHAR
 );
 
+-- Partitioned by filing quarter (the quarter of Filings.filing_date): one partition per
+-- (year, quarter), created on demand by create_holdings_partition() below. year and quarter are copied from the holding's filing.
 CREATE TABLE Holdings (
-    position_id SERIAL PRIMARY KEY,
+    position_id BIGSERIAL,
     filing_id BIGINT REFERENCES Filings(filing_id),
     security_id INT REFERENCES Securities(security_id),
+    year INT NOT NULL,
+    quarter SMALLINT NOT NULL,
     position_size DECIMAL,
     market_value DECIMAL,
-    weight DECIMAL
-);
\ No newline at end of file
+    weight DECIMAL,          -- market_value / the filing's total_value
+    investment_discretion VARCHAR NOT NULL DEFAULT '',
+    PRIMARY KEY (position_id, year, quarter),
+    CONSTRAINT holdings_filing_security_discretion_key
+        UNIQUE (filing_id, security_id, investment_discretion, year, quarter)
+) PARTITION BY RANGE (year, quarter);
+
+-- Creates the partition for one quarter if Holdings has none yet, e.g. holdings_2025q1.
+-- Attachment is checked in pg_inherits: a table of the same name that is not attached (a quarter
+-- detached but not yet moved to the archive schema) is an error rather than a partition to reuse.
+CREATE FUNCTION create_holdings_partition(p_year INT, p_quarter INT) RETURNS VOID AS $$
+DECLARE
+    partition_name TEXT := format('holdings_%sq%s', p_year, p_quarter);
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'holdings'::regclass AND c.relname = partition_name
+    ) THEN
+        IF to_regclass(partition_name) IS NOT NULL THEN
+            RAISE EXCEPTION '% exists but is not attached to Holdings', partition_name;
+        END IF;
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF Holdings FOR VALUES FROM (%s, %s) TO (%s, %s)',
+            partition_name, p_year, p_quarter,
+            CASE WHEN p_quarter = 4 THEN p_year + 1 ELSE p_year END,
+            CASE WHEN p_quarter = 4 THEN 1 ELSE p_quarter + 1 END
+        );
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Detached quarters are moved here by db_utils.archive_holdings_partition
+CREATE SCHEMA archive;
+
+CREATE INDEX holdings_security_id_idx ON Holdings (security_id);
+CREATE INDEX filings_manager_cik_idx ON Filings (manager_cik);
+CREATE INDEX filings_year_quarter_idx ON Filings (year, quarter);
+CREATE INDEX securities_ticker_idx ON Securities (ticker);
+
+-- Per-manager high-water mark for incremental ingestion (populate_db.py --incremental)
+CREATE TABLE IngestionState (
+    manager_cik VARCHAR PRIMARY KEY REFERENCES InvestmentManagers(cik),
+    last_filing_date DATE,
+    last_accession VARCHAR,
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+
+-- Quarter-over-quarter change of every manager's position in every security.
+-- A manager's position in a quarter is its latest 13F-HR filed that quarter (amendments can be
+-- partial, so they are not used). Rows compare it with the manager's previous quarter:
+--   shares / value            this quarter's position (0 if the position was exited)
+--   prev_shares / prev_value  the previous quarter's position (0 if the position is new)
+--   shares_change / value_change  the difference
+--   is_new / is_exited / is_increased / is_decreased  by share count
+-- When the manager has no filing in the previous quarter there is nothing to compare with:
+-- prev_* and *_change are NULL and every flag is false.
+CREATE TABLE PositionChanges (
+    manager_cik VARCHAR REFERENCES InvestmentManagers(cik),
+    security_id INT REFERENCES Securities(security_id),
+    year INT NOT NULL,
+    quarter SMALLINT NOT NULL,
+    shares DECIMAL,
+    value DECIMAL,
+    prev_shares DECIMAL,
+    prev_value DECIMAL,
+    shares_change DECIMAL,
+    value_change DECIMAL,
+    is_new BOOLEAN NOT NULL,
+    is_exited BOOLEAN NOT NULL,
+    is_increased BOOLEAN NOT NULL,
+    is_decreased BOOLEAN NOT NULL,
+    PRIMARY KEY (manager_cik, year, quarter, security_id)
+);
+
+CREATE INDEX position_changes_security_period_idx ON PositionChanges (security_id, year, quarter);
+CREATE INDEX position_changes_period_idx ON PositionChanges (year, quarter);
+
+-- The filing that defines a manager's positions for one quarter
+CREATE FUNCTION latest_13f_filing(p_cik VARCHAR, p_year INT, p_quarter INT) RETURNS BIGINT AS $$
+    SELECT filing_id
+    FROM Filings
+    WHERE manager_cik = p_cik AND year = p_year AND quarter = p_quarter AND filing_type = '13F-HR'
+    ORDER BY filing_date DESC, filing_id DESC
+    LIMIT 1;
+$$ LANGUAGE sql STABLE;
+
+-- Recomputes one manager's PositionChanges rows for one quarter
+CREATE FUNCTION refresh_position_changes(p_cik VARCHAR, p_year INT, p_quarter INT) RETURNS VOID AS $$
+DECLARE
+    prev_year INT := CASE WHEN p_quarter = 1 THEN p_year - 1 ELSE p_year END;
+    prev_quarter INT := CASE WHEN p_quarter = 1 THEN 4 ELSE p_quarter - 1 END;
+    cur_filing BIGINT := latest_13f_filing(p_cik, p_year, p_quarter);
+    prev_filing BIGINT := latest_13f_filing(p_cik, prev_year, prev_quarter);
+BEGIN
+    DELETE FROM PositionChanges
+    WHERE manager_cik = p_cik AND year = p_year AND quarter = p_quarter;
+
+    IF cur_filing IS NULL THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO PositionChanges (manager_cik, security_id, year, quarter, shares, value,
+                                 prev_shares, prev_value, shares_change, value_change,
+                                 is_new, is_exited, is_increased, is_decreased)
+    SELECT p_cik,
+           COALESCE(cur.security_id, prev.security_id),
+           p_year,
+           p_quarter,
+           COALESCE(cur.shares, 0),
+           COALESCE(cur.value, 0),
+           CASE WHEN prev_filing IS NOT NULL THEN COALESCE(prev.shares, 0) END,
+           CASE WHEN prev_filing IS NOT NULL THEN COALESCE(prev.value, 0) END,
+           CASE WHEN prev_filing IS NOT NULL THEN COALESCE(cur.shares, 0) - COALESCE(prev.shares, 0) END,
+           CASE WHEN prev_filing IS NOT NULL THEN COALESCE(cur.value, 0) - COALESCE(prev.value, 0) END,
+           prev_filing IS NOT NULL AND prev.security_id IS NULL,
+           cur.security_id IS NULL,
+           COALESCE(cur.shares > prev.shares, FALSE),
+           COALESCE(cur.shares < prev.shares, FALSE)
+    FROM (
+        SELECT security_id, SUM(position_size) AS shares, SUM(market_value) AS value
+        FROM Holdings
+        WHERE filing_id = cur_filing AND year = p_year AND quarter = p_quarter
+        GROUP BY security_id
+    ) cur
+    FULL JOIN (
+        SELECT security_id, SUM(position_size) AS shares, SUM(market_value) AS value
+        FROM Holdings
+        WHERE filing_id = prev_filing AND year = prev_year AND quarter = prev_quarter
+        GROUP BY security_id
+    ) prev ON prev.security_id = cur.security_id
+    WHERE COALESCE(cur.security_id, prev.security_id) IS NOT NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Rollups of each quarter's 13F-HR positions (the same latest filing per manager and quarter
+-- that PositionChanges uses), kept up to date as filings and security sectors are loaded.
+
+-- How much of each manager's portfolio is in each sector, per quarter.
+-- Securities without a known sector are grouped under 'Unknown'.
+CREATE TABLE ManagerSectorExposure (
+    manager_cik VARCHAR REFERENCES InvestmentManagers(cik),
+    year INT NOT NULL,
+    quarter SMALLINT NOT NULL,
+    sector VARCHAR NOT NULL,
+    value DECIMAL,           -- market value held in the sector
+    weight DECIMAL,          -- value / the filing's total_value
+    position_count INT,      -- number of securities held in the sector
+    PRIMARY KEY (manager_cik, year, quarter, sector)
+);
+
+CREATE INDEX manager_sector_exposure_sector_period_idx ON ManagerSectorExposure (sector, year, quarter);
+
+-- Institutional ownership of each security, per quarter, across all managers.
+CREATE TABLE SecurityOwnership (
+    security_id INT REFERENCES Securities(security_id),
+    year INT NOT NULL,
+    quarter SMALLINT NOT NULL,
+    holder_count INT,        -- managers holding the security
+    total_shares DECIMAL,
+    total_value DECIMAL,
+    PRIMARY KEY (security_id, year, quarter)
+);
+
+CREATE INDEX security_ownership_period_idx ON SecurityOwnership (year, quarter);
+
+-- Recomputes one manager's ManagerSectorExposure rows for one quarter
+CREATE FUNCTION refresh_manager_sector_exposure(p_cik VARCHAR, p_year INT, p_quarter INT) RETURNS VOID AS $$
+DECLARE
+    filing BIGINT := latest_13f_filing(p_cik, p_year, p_quarter);
+BEGIN
+    DELETE FROM ManagerSectorExposure
+    WHERE manager_cik = p_cik AND year = p_year AND quarter = p_quarter;
+
+    IF filing IS NULL THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO ManagerSectorExposure (manager_cik, year, quarter, sector, value, weight, position_count)
+    SELECT p_cik, p_year, p_quarter, COALESCE(s.sector, 'Unknown'),
+           SUM(h.market_value),
+           SUM(h.market_value) / NULLIF(MAX(f.total_value), 0),
+           COUNT(DISTINCT h.security_id)
+    FROM Holdings h
+    JOIN Filings f ON f.filing_id = h.filing_id
+    JOIN Securities s ON s.security_id = h.security_id
+    WHERE h.filing_id = filing AND h.year = p_year AND h.quarter = p_quarter
+    GROUP BY COALESCE(s.sector, 'Unknown');
+END;
+$$ LANGUAGE plpgsql;
+
+-- Recomputes SecurityOwnership for one quarter, for the securities any of p_ciks hold (or held,
+-- in a filing since superseded) that quarter
+CREATE FUNCTION refresh_security_ownership(p_year INT, p_quarter INT, p_ciks VARCHAR[]) RETURNS VOID AS $$
+BEGIN
+    CREATE TEMP TABLE AffectedSecurities ON COMMIT DROP AS
+    SELECT DISTINCT h.security_id
+    FROM Filings f
+    JOIN Holdings h ON h.filing_id = f.filing_id AND h.year = p_year AND h.quarter = p_quarter
+    WHERE f.manager_cik = ANY(p_ciks) AND f.year = p_year AND f.quarter = p_quarter
+      AND h.security_id IS NOT NULL;
+
+    DELETE FROM SecurityOwnership
+    WHERE year = p_year AND quarter = p_quarter
+      AND security_id IN (SELECT security_id FROM AffectedSecurities);
+
+    INSERT INTO SecurityOwnership (security_id, year, quarter, holder_count, total_shares, total_value)
+    SELECT h.security_id, p_year, p_quarter,
+           COUNT(DISTINCT latest.manager_cik), SUM(h.position_size), SUM(h.market_value)
+    FROM (
+        SELECT DISTINCT ON (manager_cik) manager_cik, filing_id
+        FROM Filings
+        WHERE year = p_year AND quarter = p_quarter AND filing_type = '13F-HR'
+        ORDER BY manager_cik, filing_date DESC, filing_id DESC
+    ) latest
+    JOIN Holdings h ON h.filing_id = latest.filing_id AND h.year = p_year AND h.quarter = p_quarter
+    WHERE h.security_id IN (SELECT security_id FROM AffectedSecurities)
+    GROUP BY h.security_id;
+
+    DROP TABLE AffectedSecurities;
+END;
+$$ LANGUAGE plpgsql;
+
+-- A counter bumped in the same transaction as every change to the loaded data (filings,
+-- holdings, sectors, PositionChanges and the rollups), so its value identifies the data.
+-- answer_cache keys cached answers on it.
+CREATE TABLE DataVersion (
+    version BIGINT NOT NULL
+);
+INSERT INTO DataVersion (version) VALUES (0);
+
+-- Migrations already reflected above (see migrate.py)
+CREATE TABLE SchemaMigrations (
+    version INT PRIMARY KEY,
+    name VARCHAR,
+    applied_at TIMESTAMP DEFAULT NOW()
+);
+INSERT INTO SchemaMigrations (version, name) VALUES
+    (1, 'baseline'),
+    (2, 'indexes_and_idempotency'),
+    (3, 'partition_holdings'),
+    (4, 'position_changes'),
+    (5, 'portfolio_weights'),
+    (6, 'rollups'),
+    (7, 'ingestion_state'),
+    (8, 'data_version'),
+    (9, 'attached_partitions');
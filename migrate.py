@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Apply the versioned schema migrations in migrations/ to the FinBot database."""
+
+import os
+import re
+import argparse
+
+from db_utils import transaction
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+MIGRATION_FILE = re.compile(r'^(\d+)_(\w+)\.sql$')
+
+# Arbitrary key for pg_advisory_xact_lock, so concurrent runs apply migrations one at a time
+MIGRATION_LOCK_KEY = 0x13F
+
+
+def available_migrations(directory=MIGRATIONS_DIR):
+    """Returns [(version, name, path), ...] for the NNN_name.sql files in directory, in order."""
+    migrations = []
+    for filename in os.listdir(directory):
+        match = MIGRATION_FILE.match(filename)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(directory, filename)))
+    return sorted(migrations)
+
+
+def _ensure_migrations_table(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS SchemaMigrations (
+            version INT PRIMARY KEY,
+            name VARCHAR,
+            applied_at TIMESTAMP DEFAULT NOW()
+        );
+    """)
+
+
+def applied_versions():
+    """The set of migration versions already applied to the database."""
+    with transaction() as conn:
+        with conn.cursor() as cur:
+            _ensure_migrations_table(cur)
+            cur.execute('SELECT version FROM SchemaMigrations;')
+            return {version for (version,) in cur.fetchall()}
+
+
+def current_version():
+    """The newest applied migration version (0 for an unmigrated database)."""
+    return max(applied_versions(), default=0)
+
+
+def migrate(target=None, directory=MIGRATIONS_DIR):
+    """Apply pending migrations up to target (default: all), each in its own transaction.
+
+    Returns:
+        list: The versions that were applied.
+    """
+    applied = []
+    for version, name, path in available_migrations(directory):
+        if target is not None and version > target:
+            break
+        with open(path) as f:
+            sql = f.read()
+        with transaction() as conn:
+            with conn.cursor() as cur:
+                cur.execute('SELECT pg_advisory_xact_lock(%s);', (MIGRATION_LOCK_KEY,))
+                _ensure_migrations_table(cur)
+                cur.execute('SELECT 1 FROM SchemaMigrations WHERE version = %s;', (version,))
+                if cur.fetchone():
+                    continue
+                cur.execute(sql)
+                cur.execute(
+                    'INSERT INTO SchemaMigrations (version, name) VALUES (%s, %s);',
+                    (version, name),
+                )
+        print(f'✅ Applied migration {version:03d}_{name}')
+        applied.append(version)
+    return applied
+
+
+def main():
+    """Parse CLI arguments and apply or list migrations."""
+    parser = argparse.ArgumentParser(description='Apply FinBot schema migrations.')
+    parser.add_argument(
+        '--target',
+        type=int,
+        default=None,
+        help='Only migrate up to this version',
+    )
+    parser.add_argument(
+        '--status',
+        action='store_true',
+        help='List migrations and whether they are applied, without applying any',
+    )
+    args = parser.parse_args()
+
+    if args.status:
+        applied = applied_versions()
+        for version, name, _ in available_migrations():
+            state = 'applied' if version in applied else 'pending'
+            print(f'{version:03d}_{name}: {state}')
+        return
+
+    if not migrate(target=args.target):
+        print(f'Schema is up to date (version {current_version()}).')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+-- The schema as originally shipped in init_db.sql. IF NOT EXISTS lets databases created
+-- from that script adopt migrations without recreating anything.
+CREATE TABLE IF NOT EXISTS InvestmentManagers (
+    cik VARCHAR PRIMARY KEY,
+    name VARCHAR,
+    asset_size DECIMAL
+);
+
+CREATE TABLE IF NOT EXISTS Filings (
+    filing_id BIGSERIAL PRIMARY KEY,
+    manager_cik VARCHAR REFERENCES InvestmentManagers(cik),
+    filing_date DATE,
+    year INT,
+    quarter SMALLINT,
+    raw_data_url VARCHAR,
+    filing_type VARCHAR
+);
+
+CREATE TABLE IF NOT EXISTS Securities (
+    security_id SERIAL PRIMARY KEY,
+    ticker VARCHAR,
+    cusip VARCHAR UNIQUE,
+    name VARCHAR,
+    sector VARCHAR
+);
+
+CREATE TABLE IF NOT EXISTS Holdings (
+    position_id SERIAL PRIMARY KEY,
+    filing_id BIGINT REFERENCES Filings(filing_id),
+    security_id INT REFERENCES Securities(security_id),
+    position_size DECIMAL,
+    market_value DECIMAL,
+    weight DECIMAL
+);
@@ -0,0 +1,52 @@
+-- Filings are identified by their accession number, so loading one twice is a no-op.
+ALTER TABLE Filings ADD COLUMN accession_number VARCHAR;
+UPDATE Filings
+SET accession_number = substring(raw_data_url FROM '(\d{10}-\d{2}-\d{6})\.txt$')
+WHERE accession_number IS NULL;
+
+-- Earlier runs could store the same filing more than once; keep the first copy.
+CREATE TEMP TABLE DuplicateFilings ON COMMIT DROP AS
+SELECT filing_id
+FROM (
+    SELECT filing_id,
+           ROW_NUMBER() OVER (PARTITION BY accession_number ORDER BY filing_id) AS copy
+    FROM Filings
+    WHERE accession_number IS NOT NULL
+) numbered
+WHERE copy > 1;
+DELETE FROM Holdings WHERE filing_id IN (SELECT filing_id FROM DuplicateFilings);
+DELETE FROM Filings WHERE filing_id IN (SELECT filing_id FROM DuplicateFilings);
+
+ALTER TABLE Filings ADD CONSTRAINT filings_accession_number_key UNIQUE (accession_number);
+
+-- A filing can list a security once per investment discretion (SOLE, DFND, OTR).
+ALTER TABLE Holdings ADD COLUMN investment_discretion VARCHAR NOT NULL DEFAULT '';
+
+-- Existing rows have no discretion, so merge a filing's repeated securities into one row.
+CREATE TEMP TABLE MergedHoldings ON COMMIT DROP AS
+SELECT MIN(position_id) AS position_id,
+       SUM(position_size) AS position_size,
+       SUM(market_value) AS market_value
+FROM Holdings
+WHERE filing_id IS NOT NULL AND security_id IS NOT NULL
+GROUP BY filing_id, security_id, investment_discretion
+HAVING COUNT(*) > 1;
+UPDATE Holdings h
+SET position_size = m.position_size, market_value = m.market_value
+FROM MergedHoldings m
+WHERE h.position_id = m.position_id;
+DELETE FROM Holdings h
+USING Holdings kept
+WHERE h.filing_id = kept.filing_id
+  AND h.security_id = kept.security_id
+  AND h.investment_discretion = kept.investment_discretion
+  AND h.position_id > kept.position_id;
+
+-- Also serves lookups by filing_id alone, so Holdings needs no separate filing_id index.
+ALTER TABLE Holdings ADD CONSTRAINT holdings_filing_security_discretion_key
+    UNIQUE (filing_id, security_id, investment_discretion);
+
+CREATE INDEX holdings_security_id_idx ON Holdings (security_id);
+CREATE INDEX filings_manager_cik_idx ON Filings (manager_cik);
+CREATE INDEX filings_year_quarter_idx ON Filings (year, quarter);
+CREATE INDEX securities_ticker_idx ON Securities (ticker);
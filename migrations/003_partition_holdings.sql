@@ -0,0 +1,73 @@
+-- Holdings becomes a table partitioned by filing quarter (the quarter of filing_date), one
+-- partition per (year, quarter).
+-- The filing's year and quarter are copied onto every holding, so queries that filter on
+-- Holdings.year / Holdings.quarter only read that quarter's partition.
+
+-- Creates the partition for one quarter if it does not exist yet, e.g. holdings_2025q1.
+CREATE FUNCTION create_holdings_partition(p_year INT, p_quarter INT) RETURNS VOID AS $$
+DECLARE
+    partition_name TEXT := format('holdings_%sq%s', p_year, p_quarter);
+BEGIN
+    IF to_regclass(partition_name) IS NULL THEN
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF Holdings FOR VALUES FROM (%s, %s) TO (%s, %s)',
+            partition_name, p_year, p_quarter,
+            CASE WHEN p_quarter = 4 THEN p_year + 1 ELSE p_year END,
+            CASE WHEN p_quarter = 4 THEN 1 ELSE p_quarter + 1 END
+        );
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Keep position_id values (and their sequence) across the swap
+ALTER SEQUENCE holdings_position_id_seq OWNED BY NONE;
+ALTER SEQUENCE holdings_position_id_seq AS BIGINT;
+ALTER TABLE Holdings RENAME TO HoldingsUnpartitioned;
+ALTER TABLE HoldingsUnpartitioned RENAME CONSTRAINT holdings_filing_security_discretion_key
+    TO holdingsunpartitioned_filing_security_discretion_key;
+ALTER INDEX holdings_pkey RENAME TO holdingsunpartitioned_pkey;
+ALTER TABLE HoldingsUnpartitioned RENAME CONSTRAINT holdings_filing_id_fkey
+    TO holdingsunpartitioned_filing_id_fkey;
+ALTER TABLE HoldingsUnpartitioned RENAME CONSTRAINT holdings_security_id_fkey
+    TO holdingsunpartitioned_security_id_fkey;
+ALTER INDEX holdings_security_id_idx RENAME TO holdingsunpartitioned_security_id_idx;
+
+CREATE TABLE Holdings (
+    position_id BIGINT NOT NULL DEFAULT nextval('holdings_position_id_seq'),
+    filing_id BIGINT REFERENCES Filings(filing_id),
+    security_id INT REFERENCES Securities(security_id),
+    year INT NOT NULL,
+    quarter SMALLINT NOT NULL,
+    position_size DECIMAL,
+    market_value DECIMAL,
+    weight DECIMAL,
+    investment_discretion VARCHAR NOT NULL DEFAULT '',
+    PRIMARY KEY (position_id, year, quarter),
+    CONSTRAINT holdings_filing_security_discretion_key
+        UNIQUE (filing_id, security_id, investment_discretion, year, quarter)
+) PARTITION BY RANGE (year, quarter);
+ALTER SEQUENCE holdings_position_id_seq OWNED BY Holdings.position_id;
+
+CREATE INDEX holdings_security_id_idx ON Holdings (security_id);
+
+SELECT create_holdings_partition(year, quarter)
+FROM (
+    SELECT DISTINCT f.year, f.quarter
+    FROM HoldingsUnpartitioned h
+    JOIN Filings f ON f.filing_id = h.filing_id
+    WHERE f.year IS NOT NULL AND f.quarter IS NOT NULL
+) periods;
+
+-- Holdings without a filing (or a filing without a period) have no partition and are dropped
+INSERT INTO Holdings (position_id, filing_id, security_id, year, quarter,
+                      position_size, market_value, weight, investment_discretion)
+SELECT h.position_id, h.filing_id, h.security_id, f.year, f.quarter,
+       h.position_size, h.market_value, h.weight, h.investment_discretion
+FROM HoldingsUnpartitioned h
+JOIN Filings f ON f.filing_id = h.filing_id
+WHERE f.year IS NOT NULL AND f.quarter IS NOT NULL;
+
+DROP TABLE HoldingsUnpartitioned;
+
+-- Detached quarters are moved here by db_utils.archive_holdings_partition
+CREATE SCHEMA IF NOT EXISTS archive;
@@ -0,0 +1,93 @@
+-- Quarter-over-quarter change of every manager's position in every security.
+-- A manager's position in a quarter is its latest 13F-HR filed that quarter (amendments can be
+-- partial, so they are not used). Rows compare it with the manager's previous quarter:
+--   shares / value            this quarter's position (0 if the position was exited)
+--   prev_shares / prev_value  the previous quarter's position (0 if the position is new)
+--   shares_change / value_change  the difference
+--   is_new / is_exited / is_increased / is_decreased  by share count
+-- When the manager has no filing in the previous quarter there is nothing to compare with:
+-- prev_* and *_change are NULL and every flag is false.
+CREATE TABLE PositionChanges (
+    manager_cik VARCHAR REFERENCES InvestmentManagers(cik),
+    security_id INT REFERENCES Securities(security_id),
+    year INT NOT NULL,
+    quarter SMALLINT NOT NULL,
+    shares DECIMAL,
+    value DECIMAL,
+    prev_shares DECIMAL,
+    prev_value DECIMAL,
+    shares_change DECIMAL,
+    value_change DECIMAL,
+    is_new BOOLEAN NOT NULL,
+    is_exited BOOLEAN NOT NULL,
+    is_increased BOOLEAN NOT NULL,
+    is_decreased BOOLEAN NOT NULL,
+    PRIMARY KEY (manager_cik, year, quarter, security_id)
+);
+
+CREATE INDEX position_changes_security_period_idx ON PositionChanges (security_id, year, quarter);
+CREATE INDEX position_changes_period_idx ON PositionChanges (year, quarter);
+
+-- The filing that defines a manager's positions for one quarter
+CREATE FUNCTION latest_13f_filing(p_cik VARCHAR, p_year INT, p_quarter INT) RETURNS BIGINT AS $$
+    SELECT filing_id
+    FROM Filings
+    WHERE manager_cik = p_cik AND year = p_year AND quarter = p_quarter AND filing_type = '13F-HR'
+    ORDER BY filing_date DESC, filing_id DESC
+    LIMIT 1;
+$$ LANGUAGE sql STABLE;
+
+-- Recomputes one manager's PositionChanges rows for one quarter
+CREATE FUNCTION refresh_position_changes(p_cik VARCHAR, p_year INT, p_quarter INT) RETURNS VOID AS $$
+DECLARE
+    prev_year INT := CASE WHEN p_quarter = 1 THEN p_year - 1 ELSE p_year END;
+    prev_quarter INT := CASE WHEN p_quarter = 1 THEN 4 ELSE p_quarter - 1 END;
+    cur_filing BIGINT := latest_13f_filing(p_cik, p_year, p_quarter);
+    prev_filing BIGINT := latest_13f_filing(p_cik, prev_year, prev_quarter);
+BEGIN
+    DELETE FROM PositionChanges
+    WHERE manager_cik = p_cik AND year = p_year AND quarter = p_quarter;
+
+    IF cur_filing IS NULL THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO PositionChanges (manager_cik, security_id, year, quarter, shares, value,
+                                 prev_shares, prev_value, shares_change, value_change,
+                                 is_new, is_exited, is_increased, is_decreased)
+    SELECT p_cik,
+           COALESCE(cur.security_id, prev.security_id),
+           p_year,
+           p_quarter,
+           COALESCE(cur.shares, 0),
+           COALESCE(cur.value, 0),
+           CASE WHEN prev_filing IS NOT NULL THEN COALESCE(prev.shares, 0) END,
+           CASE WHEN prev_filing IS NOT NULL THEN COALESCE(prev.value, 0) END,
+           CASE WHEN prev_filing IS NOT NULL THEN COALESCE(cur.shares, 0) - COALESCE(prev.shares, 0) END,
+           CASE WHEN prev_filing IS NOT NULL THEN COALESCE(cur.value, 0) - COALESCE(prev.value, 0) END,
+           prev_filing IS NOT NULL AND prev.security_id IS NULL,
+           cur.security_id IS NULL,
+           COALESCE(cur.shares > prev.shares, FALSE),
+           COALESCE(cur.shares < prev.shares, FALSE)
+    FROM (
+        SELECT security_id, SUM(position_size) AS shares, SUM(market_value) AS value
+        FROM Holdings
+        WHERE filing_id = cur_filing AND year = p_year AND quarter = p_quarter
+        GROUP BY security_id
+    ) cur
+    FULL JOIN (
+        SELECT security_id, SUM(position_size) AS shares, SUM(market_value) AS value
+        FROM Holdings
+        WHERE filing_id = prev_filing AND year = prev_year AND quarter = prev_quarter
+        GROUP BY security_id
+    ) prev ON prev.security_id = cur.security_id
+    WHERE COALESCE(cur.security_id, prev.security_id) IS NOT NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT refresh_position_changes(manager_cik, year, quarter)
+FROM (
+    SELECT DISTINCT manager_cik, year, quarter
+    FROM Filings
+    WHERE manager_cik IS NOT NULL AND year IS NOT NULL AND quarter IS NOT NULL
+) periods;
@@ -0,0 +1,13 @@
+-- Per-filing totals, so Holdings.weight (a holding's share of its filing's total value)
+-- can be stored at load time and read without aggregating.
+ALTER TABLE Filings ADD COLUMN total_value DECIMAL;
+ALTER TABLE Filings ADD COLUMN position_count INT;
+
+UPDATE Filings f
+SET total_value = (SELECT COALESCE(SUM(h.market_value), 0) FROM Holdings h WHERE h.filing_id = f.filing_id),
+    position_count = (SELECT COUNT(*) FROM Holdings h WHERE h.filing_id = f.filing_id);
+
+UPDATE Holdings h
+SET weight = h.market_value / NULLIF(f.total_value, 0)
+FROM Filings f
+WHERE f.filing_id = h.filing_id;
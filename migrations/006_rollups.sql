@@ -0,0 +1,102 @@
+-- Rollups of each quarter's 13F-HR positions (the same latest filing per manager and quarter
+-- that PositionChanges uses), kept up to date as filings and security sectors are loaded.
+
+-- How much of each manager's portfolio is in each sector, per quarter.
+-- Securities without a known sector are grouped under 'Unknown'.
+CREATE TABLE ManagerSectorExposure (
+    manager_cik VARCHAR REFERENCES InvestmentManagers(cik),
+    year INT NOT NULL,
+    quarter SMALLINT NOT NULL,
+    sector VARCHAR NOT NULL,
+    value DECIMAL,           -- market value held in the sector
+    weight DECIMAL,          -- value / the filing's total_value
+    position_count INT,      -- number of securities held in the sector
+    PRIMARY KEY (manager_cik, year, quarter, sector)
+);
+
+CREATE INDEX manager_sector_exposure_sector_period_idx ON ManagerSectorExposure (sector, year, quarter);
+
+-- Institutional ownership of each security, per quarter, across all managers.
+CREATE TABLE SecurityOwnership (
+    security_id INT REFERENCES Securities(security_id),
+    year INT NOT NULL,
+    quarter SMALLINT NOT NULL,
+    holder_count INT,        -- managers holding the security
+    total_shares DECIMAL,
+    total_value DECIMAL,
+    PRIMARY KEY (security_id, year, quarter)
+);
+
+CREATE INDEX security_ownership_period_idx ON SecurityOwnership (year, quarter);
+
+-- Recomputes one manager's ManagerSectorExposure rows for one quarter
+CREATE FUNCTION refresh_manager_sector_exposure(p_cik VARCHAR, p_year INT, p_quarter INT) RETURNS VOID AS $$
+DECLARE
+    filing BIGINT := latest_13f_filing(p_cik, p_year, p_quarter);
+BEGIN
+    DELETE FROM ManagerSectorExposure
+    WHERE manager_cik = p_cik AND year = p_year AND quarter = p_quarter;
+
+    IF filing IS NULL THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO ManagerSectorExposure (manager_cik, year, quarter, sector, value, weight, position_count)
+    SELECT p_cik, p_year, p_quarter, COALESCE(s.sector, 'Unknown'),
+           SUM(h.market_value),
+           SUM(h.market_value) / NULLIF(MAX(f.total_value), 0),
+           COUNT(DISTINCT h.security_id)
+    FROM Holdings h
+    JOIN Filings f ON f.filing_id = h.filing_id
+    JOIN Securities s ON s.security_id = h.security_id
+    WHERE h.filing_id = filing AND h.year = p_year AND h.quarter = p_quarter
+    GROUP BY COALESCE(s.sector, 'Unknown');
+END;
+$$ LANGUAGE plpgsql;
+
+-- Recomputes SecurityOwnership for one quarter, for the securities any of p_ciks hold (or held,
+-- in a filing since superseded) that quarter
+CREATE FUNCTION refresh_security_ownership(p_year INT, p_quarter INT, p_ciks VARCHAR[]) RETURNS VOID AS $$
+BEGIN
+    CREATE TEMP TABLE AffectedSecurities ON COMMIT DROP AS
+    SELECT DISTINCT h.security_id
+    FROM Filings f
+    JOIN Holdings h ON h.filing_id = f.filing_id AND h.year = p_year AND h.quarter = p_quarter
+    WHERE f.manager_cik = ANY(p_ciks) AND f.year = p_year AND f.quarter = p_quarter
+      AND h.security_id IS NOT NULL;
+
+    DELETE FROM SecurityOwnership
+    WHERE year = p_year AND quarter = p_quarter
+      AND security_id IN (SELECT security_id FROM AffectedSecurities);
+
+    INSERT INTO SecurityOwnership (security_id, year, quarter, holder_count, total_shares, total_value)
+    SELECT h.security_id, p_year, p_quarter,
+           COUNT(DISTINCT latest.manager_cik), SUM(h.position_size), SUM(h.market_value)
+    FROM (
+        SELECT DISTINCT ON (manager_cik) manager_cik, filing_id
+        FROM Filings
+        WHERE year = p_year AND quarter = p_quarter AND filing_type = '13F-HR'
+        ORDER BY manager_cik, filing_date DESC, filing_id DESC
+    ) latest
+    JOIN Holdings h ON h.filing_id = latest.filing_id AND h.year = p_year AND h.quarter = p_quarter
+    WHERE h.security_id IN (SELECT security_id FROM AffectedSecurities)
+    GROUP BY h.security_id;
+
+    DROP TABLE AffectedSecurities;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT refresh_manager_sector_exposure(manager_cik, year, quarter)
+FROM (
+    SELECT DISTINCT manager_cik, year, quarter
+    FROM Filings
+    WHERE manager_cik IS NOT NULL AND year IS NOT NULL AND quarter IS NOT NULL
+) periods;
+
+SELECT refresh_security_ownership(year, quarter, ciks)
+FROM (
+    SELECT year, quarter, ARRAY_AGG(DISTINCT manager_cik) AS ciks
+    FROM Filings
+    WHERE manager_cik IS NOT NULL AND year IS NOT NULL AND quarter IS NOT NULL
+    GROUP BY year, quarter
+) periods;
@@ -0,0 +1,8 @@
+-- Per-manager high-water mark for incremental ingestion (populate_db.py --incremental).
+-- IF NOT EXISTS: databases migrated before this was its own migration already have it.
+CREATE TABLE IF NOT EXISTS IngestionState (
+    manager_cik VARCHAR PRIMARY KEY REFERENCES InvestmentManagers(cik),
+    last_filing_date DATE,
+    last_accession VARCHAR,
+    updated_at TIMESTAMP DEFAULT NOW()
+);
@@ -0,0 +1,7 @@
+-- A counter bumped in the same transaction as every change to the loaded data (filings,
+-- holdings, sectors, PositionChanges and the rollups), so its value identifies the data.
+-- answer_cache keys cached answers on it.
+CREATE TABLE IF NOT EXISTS DataVersion (
+    version BIGINT NOT NULL
+);
+INSERT INTO DataVersion (version) SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM DataVersion);
@@ -0,0 +1,23 @@
+-- Creates the partition for one quarter if Holdings has none yet, e.g. holdings_2025q1.
+-- Attachment is checked in pg_inherits: a table of the same name that is not attached (a quarter
+-- detached but not yet moved to the archive schema) is an error rather than a partition to reuse.
+CREATE OR REPLACE FUNCTION create_holdings_partition(p_year INT, p_quarter INT) RETURNS VOID AS $$
+DECLARE
+    partition_name TEXT := format('holdings_%sq%s', p_year, p_quarter);
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'holdings'::regclass AND c.relname = partition_name
+    ) THEN
+        IF to_regclass(partition_name) IS NOT NULL THEN
+            RAISE EXCEPTION '% exists but is not attached to Holdings', partition_name;
+        END IF;
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF Holdings FOR VALUES FROM (%s, %s) TO (%s, %s)',
+            partition_name, p_year, p_quarter,
+            CASE WHEN p_quarter = 4 THEN p_year + 1 ELSE p_year END,
+            CASE WHEN p_quarter = 4 THEN 1 ELSE p_quarter + 1 END
+        );
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
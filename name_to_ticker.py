@@ -1,5 +1,14 @@
-import pandas as pd
+import atexit
+import os
+import pickle
 import re
+import sqlite3
+import threading
+from collections import Counter, OrderedDict
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
 from rapidfuzz import process, fuzz
 
 """
@@ -7,14 +16,17 @@ This file:
   1. Generates name_ticker_mapping.csv, which maps stock tickers to company names.
   2. Contains the utility function "get_ticker_from_name", used by get_filings.py 
      to map company names from institutional holdings to their tickers.
+  3. Contains TickerResolver, which loads name_ticker_mapping.csv once per process
+     so the mapping is not re-read and re-cleaned for every filing.
+  4. Contains TickerCache, which remembers tickers already resolved (by CUSIP or
+     cleaned issuer name) across filings and across runs.
 """
 
-  # Function to clean the Security Name
-def clean_security_name(name):
-
+MAPPING_PATH = "name_ticker_mapping.csv"
+TICKER_CACHE_PATH = "ticker_cache.sqlite"
 
-  # List of nuisance phrases/words to remove
-  nuisance_phrases = [
+# List of nuisance phrases/words to remove, in the order they are removed
+NUISANCE_PHRASES = [
     "inc", "llc", "corp", "corporation", "group", "sa", "plc", "ltd", "limited",
     "common stock", "ordinary shares", "etf", "fund", "shares", "unit", "class a", 
     "class b", "depositary shares", "rights", "warrant", "options", "global", "active", 
@@ -22,45 +34,78 @@ def clean_security_name(name):
     "inc", "co", "test", "industries", "solutions", "partners", "services"
 ]
 
-  # Check if the name is a valid string (not NaN)
-  if isinstance(name, str):
-      # Normalize to lowercase
-      name = name.lower()
-
-      # Remove everything after a hyphen
-      name = re.sub(r' -.*$', '', name)
-
-      # Remove nuisance phrases
-      for phrase in nuisance_phrases:
-          name = name.replace(phrase, "")
-      
-      # Fix known abbreviations
-      name = name.replace('rlty', 'realty')
-      name = name.replace('agro', 'agriculture')
-      name = name.replace('prod', 'products')
-      name = name.replace('chems', 'chemicals')
-      name = name.replace('invt','investment')
-      name = name.replace('grp','group')
-      name = name.replace('inds','industries')
-      name = name.replace('centy','century')
-      name = name.replace('labs','laboratories')
-      name = name.replace('resh','research')
-      name = name.replace('hldgs','holdings')
-      
-      # Special known fixes for common abbreviations or variations
-      name = name.replace('aehr', 'aehr test systems')
-      name = name.replace('adv energy', 'advanced energy industries')
-
-      # Remove extra punctuation such as hyphens, commas, periods, etc.
-      name = re.sub(r'[-,.\(\)]', ' ', name)
-
-      # Remove extra spaces (multiple spaces) left after replacing phrases
-      name = re.sub(r'\s+', ' ', name).strip()
-
-      name = name.title()
-      return name
-  else:
-      return ""
+# Known abbreviations to expand, applied after the nuisance phrases are removed
+ABBREVIATIONS = {
+    "rlty": "realty",
+    "agro": "agriculture",
+    "prod": "products",
+    "chems": "chemicals",
+    "invt": "investment",
+    "grp": "group",
+    "inds": "industries",
+    "centy": "century",
+    "labs": "laboratories",
+    "resh": "research",
+    "hldgs": "holdings",
+    # Special known fixes for common abbreviations or variations
+    "aehr": "aehr test systems",
+    "adv energy": "advanced energy industries",
+}
+
+
+_TRAILING_HYPHEN = re.compile(r" -.*$")
+# Hyphens, commas, periods and parentheses become spaces
+_PUNCTUATION = str.maketrans("-,.()", "     ")
+
+
+@lru_cache(maxsize=65536)
+def _clean_name(name):
+    # Normalize to lowercase and remove everything after a hyphen
+    name = _TRAILING_HYPHEN.sub("", name.lower())
+    # One phrase at a time, in order: removing one phrase can create another that a later
+    # replace catches ("cinco" -> "co" -> ""), which a single regex over all of them would miss
+    for phrase in NUISANCE_PHRASES:
+        name = name.replace(phrase, "")
+    for short, full in ABBREVIATIONS.items():
+        name = name.replace(short, full)
+    # Remove extra punctuation and the extra spaces left after removing phrases
+    return " ".join(name.translate(_PUNCTUATION).split()).title()
+
+
+def clean_security_name(name):
+    """
+    Normalizes a security or issuer name so the same company is spelled the same way
+    in name_ticker_mapping.csv and in 13F filings. Returns "" for missing (non-string) names.
+    Issuer names repeat across filings, so results are memoized.
+    """
+    if isinstance(name, str):
+        return _clean_name(name)
+    return ""
+
+
+def clean_security_names(names):
+    """
+    clean_security_name for a whole column at once.
+    Each distinct name is cleaned once, through pandas .str methods, then mapped back.
+
+    names: a pandas Series (or list) of names
+    Returns a Series of cleaned names with the same index.
+    """
+    names = pd.Series(names, dtype=object)
+    is_name = names.map(lambda name: isinstance(name, str))
+    unique = pd.Series(names[is_name].unique(), dtype=object)
+    cleaned = unique.str.lower().str.replace(_TRAILING_HYPHEN, "", regex=True)
+    for phrase in NUISANCE_PHRASES:
+        cleaned = cleaned.str.replace(phrase, "", regex=False)
+    for short, full in ABBREVIATIONS.items():
+        cleaned = cleaned.str.replace(short, full, regex=False)
+    cleaned = (
+        cleaned.str.translate(_PUNCTUATION)
+        .str.split()
+        .str.join(" ")
+        .str.title()
+    )
+    return names.map(dict(zip(unique, cleaned))).where(is_name, "")
 
 
 def create_name_ticker_mapping_file():
@@ -85,43 +130,402 @@ def create_name_ticker_mapping_file():
   combined = pd.concat([nasdaq, nyse], ignore_index=True)
 
   # Apply cleaning function to the Security Name column
-  combined["Security Name"] = combined["Security Name"].apply(clean_security_name)
+  combined["Security Name"] = clean_security_names(combined["Security Name"])
 
   # Save to CSV
   combined.to_csv("name_ticker_mapping.csv", index=False)
   print("✅ Combined CSV saved as 'name_ticker_mapping.csv'")
   
 
-def get_ticker_from_name(original_name, choices, df):
+class TickerCache:
+    """
+    LRU cache of resolved tickers, keyed by CUSIP or by cleaned issuer name.
+
+    Failed matches are cached too (as None), so an issuer that has no ticker is
+    not fuzzy-matched again either. When path is given, entries are persisted to
+    a SQLite file and preloaded on the next run; the file is emptied whenever
+    version (the mapping csv and matcher it was built with) changes.
+    """
+
+    _MISSING = object()
+
+    def __init__(self, path=None, maxsize=100_000, version=None, commit_every=256):
+        self.path = path
+        self.maxsize = maxsize
+        self.commit_every = commit_every
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS tickers (key TEXT PRIMARY KEY, ticker TEXT)")
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+            if version is not None and (row is None or row[0] != str(version)):
+                self._conn.execute("DELETE FROM tickers")
+                self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (str(version),))
+                self._conn.commit()
+            for key, ticker in self._conn.execute("SELECT key, ticker FROM tickers LIMIT ?", (maxsize,)):
+                self._entries[key] = ticker
+
+    @staticmethod
+    def keys_for(clean_name, cusip=None):
+        """Cache keys for a holding, most specific (CUSIP) first."""
+        keys = []
+        if isinstance(cusip, str) and cusip.strip():
+            keys.append("cusip:" + cusip.strip().upper())
+        keys.append("name:" + clean_name)
+        return keys
+
+    def lookup(self, keys):
+        """
+        Returns (found, ticker) for the first key present in the cache.
+        found is False when none of the keys have been resolved before.
+        """
+        with self._lock:
+            for key in keys:
+                ticker = self._entries.get(key, self._MISSING)
+                if ticker is not self._MISSING:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, ticker
+            self.misses += 1
+            return False, None
+
+    def store(self, keys, ticker):
+        with self._lock:
+            for key in keys:
+                self._entries[key] = ticker
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+            if self._conn is not None:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO tickers (key, ticker) VALUES (?, ?)",
+                    [(key, ticker) for key in keys],
+                )
+                self._pending += 1
+                if self._pending >= self.commit_every:
+                    self._conn.commit()
+                    self._pending = 0
+
+    def flush(self):
+        """Commit any entries not yet written to the SQLite file."""
+        with self._lock:
+            if self._conn is not None and self._pending:
+                self._conn.commit()
+                self._pending = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self._entries),
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class TickerResolver:
+    """
+    Holds name_ticker_mapping.csv in memory, already cleaned and indexed.
+
+    Attributes:
+        choices: cleaned security names, in the same order as the csv rows
+        symbols: ticker for each entry in choices
+        token_index: maps each word of a cleaned name to the indices of the choices containing it
+        exact_index: maps each cleaned name to the index of its first occurrence in choices
+
+    Names are matched in tiers, cheapest first:
+        1. exact: the cleaned name is itself a mapping entry (a dict lookup)
+        2. block: fuzzy-score only the choices sharing a word with the name
+        3. full: fuzzy-score every choice, only when the block found nothing
+    tier_stats() reports how many names each tier decided.
+
+    The block tier takes the best match of at least 90 among the choices sharing a word. A full
+    scan could in principle find a higher score among choices sharing no word (e.g. a misspelled
+    one), so the tiers are an approximation of always scanning everything; on the mapping's own
+    names with words or letters dropped they agree (see test_tiered_matching_agrees_with_full_scan).
+
+    If cache_path is given, the cleaned names and index are pickled there and reused
+    on later runs for as long as the csv is unchanged. Tickers already resolved are
+    kept in ticker_cache (an in-memory TickerCache unless one is passed in).
+    """
+
+    # Bump when the pickled state changes shape, so old cache files are rebuilt
+    STATE_VERSION = 2
+    # Bump when match() can return different tickers, so tickers cached by an older matcher are dropped
+    MATCHER_VERSION = 2
+
+    def __init__(self, mapping_path=MAPPING_PATH, cache_path=None, ticker_cache=None):
+        self.mapping_path = mapping_path
+        self.cache_path = cache_path
+
+        state = self._load_cache()
+        if state is None:
+            state = self._build()
+            self._save_cache(state)
+
+        self.mapping_version = state["mapping_mtime"]
+        # What a TickerCache of this resolver's tickers is valid for
+        self.ticker_cache_version = f"{self.mapping_version}:{self.MATCHER_VERSION}"
+        self.choices = state["choices"]
+        self.symbols = state["symbols"]
+        self.token_index = state["token_index"]
+        self.exact_index = state["exact_index"]
+        self.ticker_cache = ticker_cache if ticker_cache is not None else TickerCache()
+        self._tier_counts = Counter()
+        self._stats_lock = threading.Lock()
+
+    def _build(self):
+        # keep_default_na=False so the ticker "NA" is not read as a missing value
+        df = pd.read_csv(self.mapping_path, keep_default_na=False)
+        choices = clean_security_names(df["Security Name"]).tolist()
+        symbols = df["Symbol"].tolist()
+
+        token_index = {}
+        exact_index = {}
+        for idx, name in enumerate(choices):
+            exact_index.setdefault(name, idx)
+            for token in set(name.split()):
+                token_index.setdefault(token, []).append(idx)
+
+        return {
+            "version": self.STATE_VERSION,
+            "mapping_mtime": os.path.getmtime(self.mapping_path),
+            "choices": choices,
+            "symbols": symbols,
+            "token_index": token_index,
+            "exact_index": exact_index,
+        }
+
+    def _load_cache(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return None
+        try:
+            with open(self.cache_path, "rb") as f:
+                state = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        # Rebuild if the mapping csv was regenerated since the cache was written
+        if state.get("mapping_mtime") != os.path.getmtime(self.mapping_path):
+            return None
+        if state.get("version") != self.STATE_VERSION:
+            return None
+        return state
+
+    def _save_cache(self, state):
+        if not self.cache_path:
+            return
+        with open(self.cache_path, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _count(self, tier, comparisons=0):
+        with self._stats_lock:
+            self._tier_counts[tier] += 1
+            self._tier_counts["comparisons"] += comparisons
+
+    def _match_exact(self, name):
+        idx = self.exact_index.get(name)
+        if idx is None:
+            return False, None
+        self._count("exact")
+        return True, self.symbols[idx]
+
+    def _match_block(self, name):
+        # Candidates sharing at least one word with the name, in mapping order
+        block = sorted({idx for token in name.split() for idx in self.token_index.get(token, ())})
+        if not block:
+            return False, None
+
+        match = process.extractOne(
+            query=name,
+            choices=[self.choices[idx] for idx in block],
+            scorer=fuzz.token_sort_ratio,
+            score_cutoff=90
+        )
+        if match is None:
+            with self._stats_lock:
+                self._tier_counts["comparisons"] += len(block)
+            return False, None
+        self._count("block", len(block))
+        return True, self.symbols[block[match[2]]]
+
+    def match(self, name):
+        """Match an already cleaned name, trying each tier in turn. Returns the ticker, or None."""
+        for tier in (self._match_exact, self._match_block):
+            found, ticker = tier(name)
+            if found:
+                return ticker
+
+        # Run fuzzy matching using a fast and accurate scorer
+        match = process.extractOne(
+            query=name,
+            choices=self.choices,
+            scorer=fuzz.token_sort_ratio,  # Faster and better for slightly reordered words
+            score_cutoff=90
+        )
+
+        if match:
+            matched_name, score, idx = match
+            self._count("full", len(self.choices))
+            # Optionally print match details
+            # print(f"✅ Matched '{name}' → '{matched_name}' with score {score:.2f}")
+            return self.symbols[idx]
+        self._count("unmatched", len(self.choices))
+        # print(f"❌ No match found for '{name}'")
+        return None
+
+    def match_many(self, names, chunk_size=512):
+        """
+        Match many already cleaned names. The exact and block tiers run per name; whatever
+        they leave unresolved is scored against every choice in one vectorized pass with
+        rapidfuzz's cdist on all cores, chunk_size names at a time to bound the score matrix.
+        Returns a dict of name -> ticker (or None), with the same results as match().
+        """
+        results = {}
+        queries = []
+        for name in dict.fromkeys(names):
+            for tier in (self._match_exact, self._match_block):
+                found, ticker = tier(name)
+                if found:
+                    results[name] = ticker
+                    break
+            else:
+                queries.append(name)
+
+        for start in range(0, len(queries), chunk_size):
+            chunk = queries[start:start + chunk_size]
+            scores = process.cdist(
+                chunk,
+                self.choices,
+                scorer=fuzz.token_sort_ratio,
+                score_cutoff=90,
+                workers=-1,
+            )
+            # argmax picks the first best-scoring choice, the same one extractOne returns
+            best = scores.argmax(axis=1)
+            best_scores = scores[np.arange(len(chunk)), best]
+            for name, idx, score in zip(chunk, best, best_scores):
+                matched = score >= 90
+                results[name] = self.symbols[idx] if matched else None
+                self._count("full" if matched else "unmatched", len(self.choices))
+        return results
+
+    def tier_stats(self):
+        """
+        How many names each tier decided ("unmatched" went through every tier without a match),
+        and how many name-vs-choice scores were computed compared to always scanning everything.
+        """
+        with self._stats_lock:
+            counts = dict(self._tier_counts)
+        comparisons = counts.pop("comparisons", 0)
+        decided = {tier: counts.get(tier, 0) for tier in ("exact", "block", "full", "unmatched")}
+        full_scan = sum(decided.values()) * len(self.choices)
+        return {
+            **decided,
+            "comparisons": comparisons,
+            "comparisons_skipped": full_scan - comparisons,
+        }
+
+    def __len__(self):
+        return len(self.choices)
+
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+
+def get_resolver(mapping_path=MAPPING_PATH, cache_path=None, ticker_cache_path=TICKER_CACHE_PATH):
+    """
+    Returns the process-wide TickerResolver, creating it on first use.
+    The arguments only take effect on that first call; ticker_cache_path=None
+    keeps resolved tickers in memory only.
+    """
+    global _resolver
+    if _resolver is None:
+        with _resolver_lock:
+            if _resolver is None:
+                resolver = TickerResolver(mapping_path, cache_path)
+                if ticker_cache_path:
+                    resolver.ticker_cache = TickerCache(ticker_cache_path, version=resolver.ticker_cache_version)
+                    atexit.register(resolver.ticker_cache.flush)
+                _resolver = resolver
+    return _resolver
+
+
+def get_ticker_from_name(original_name, resolver=None, cusip=None):
     """
-    original_name:the company name we are trying to match
-    choices: the list of company names from name_ticker_mapping.csv we are matching against
-    df: the data in name_ticker_mapping.csv
+    original_name: the company name we are trying to match
+    resolver: the TickerResolver to match against (defaults to the process-wide one)
+    cusip: the holding's CUSIP, checked in the ticker cache before the name
     """
     if not isinstance(original_name, str):
         return None
-    
+
+    if resolver is None:
+        resolver = get_resolver()
+
     # Clean the input name
     name = clean_security_name(original_name)
-    
-    # Run fuzzy matching using a fast and accurate scorer
-    match = process.extractOne(
-        query=name,
-        choices=choices,
-        scorer=fuzz.token_sort_ratio,  # Faster and better for slightly reordered words
-        score_cutoff=90
-    )
 
-    if match:
-        matched_name, score, idx = match
-        ticker = df.iloc[idx]["Symbol"]
-        # Optionally print match details
-        # print(f"✅ Matched '{name}' → '{matched_name}' with score {score:.2f}")
+    # Issuers seen before skip the fuzzy scan entirely
+    keys = TickerCache.keys_for(name, cusip)
+    found, ticker = resolver.ticker_cache.lookup(keys)
+    if found:
         return ticker
-    else:
-        # print(f"❌ No match found for '{name}'")
-        return None
-  
+
+    ticker = resolver.match(name)
+    resolver.ticker_cache.store(keys, ticker)
+    return ticker
+
+
+def get_tickers_from_names(original_names, resolver=None, cusips=None):
+    """
+    Bulk version of get_ticker_from_name, for all the holdings of a filing (or of many filings).
+
+    original_names: the company names we are trying to match
+    resolver: the TickerResolver to match against (defaults to the process-wide one)
+    cusips: optional CUSIPs, parallel to original_names
+
+    Names are cleaned and checked against the ticker cache first; every distinct name
+    still unresolved is then fuzzy-matched together in one pass.
+    Returns a list of tickers (or None), parallel to original_names.
+    """
+    if resolver is None:
+        resolver = get_resolver()
+    if cusips is None:
+        cusips = [None] * len(original_names)
+
+    tickers = [None] * len(original_names)
+    unresolved = {}  # clean name -> positions in original_names still needing a match
+    for pos, (original_name, cusip) in enumerate(zip(original_names, cusips)):
+        if not isinstance(original_name, str):
+            continue
+        name = clean_security_name(original_name)
+
+        found, ticker = resolver.ticker_cache.lookup(TickerCache.keys_for(name, cusip))
+        if found:
+            tickers[pos] = ticker
+        else:
+            unresolved.setdefault(name, []).append(pos)
+
+    matches = resolver.match_many(list(unresolved)) if unresolved else {}
+    for name, positions in unresolved.items():
+        ticker = matches[name]
+        for pos in positions:
+            tickers[pos] = ticker
+            resolver.ticker_cache.store(TickerCache.keys_for(name, cusips[pos]), ticker)
+
+    return tickers
 
 
 if __name__ == "__main__":
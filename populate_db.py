@@ -1,20 +1,25 @@
 #!/usr/bin/env python3
 """Populate the FinBot PostgreSQL database with SEC 13F filings data."""
 
-import os
 import re
 import argparse
 
+import pandas as pd
 from dotenv import load_dotenv
 
-from get_filings import get_all_13f_filings
+from get_filings import get_sectors_from_yahoo, iter_13f_filings
+from filings_store import split_filings
 from db_utils import (
-    insert_investment_manager,
-    insert_filing,
-    insert_security,
-    insert_holding,
+    bulk_load_filings,
+    close_pool,
+    get_existing_accessions,
+    get_high_water_marks,
+    tickers_missing_sector,
 )
 
+# Filings loaded per bulk_load_filings transaction
+DEFAULT_BATCH_SIZE = 50
+
 
 def parse_aum(aum_str):
     """Convert strings like '$12.34B' into a numeric AUM value.
@@ -32,20 +37,32 @@ def parse_aum(aum_str):
     return None
 
 
-def run(max_num_to_fetch):
-    """Fetch filings and populate the database.
+def group_batches(batches, batch_size):
+    """Regroups per-CIK filing frames into frames of at least batch_size filings (the last may be smaller).
 
-    Args:
-        max_num_to_fetch (int): Maximum number of CIKs to process (0 = no limit).
+    Only one group is held at a time, so memory stays flat however many CIKs are fetched.
     """
-    print('▶️  Loading environment variables from .env')
-    load_dotenv()
+    group, size = [], 0
+    for batch in batches:
+        group.append(batch)
+        size += len(batch)
+        if size >= batch_size:
+            yield pd.concat(group, ignore_index=True)
+            group, size = [], 0
+    if group:
+        yield pd.concat(group, ignore_index=True)
 
-    print('▶️  Fetching 13F filings…')
-    df = get_all_13f_filings(MAX_NUM_TO_FETCH=max_num_to_fetch)
+
+def load_batch(df):
+    """Loads one frame of filings (as yielded by iter_13f_filings) in a single transaction.
+
+    Returns:
+        dict: accession number -> filing_id of every filing loaded.
+    """
+    filings_table, holdings_table = split_filings(df)
 
     # Rename columns to valid Python identifiers
-    df.rename(
+    filings_table.rename(
         columns={
             'Institution Name': 'institution_name',
             'Assets Under Management (AUM)': 'aum_str',
@@ -53,52 +70,68 @@ def run(max_num_to_fetch):
         inplace=True,
     )
 
-    total = len(df)
-    print(f'Fetched {total} filings in total')
+    filings = [
+        {
+            'manager_cik': row.cik,
+            'manager_name': row.institution_name,
+            'asset_size': parse_aum(row.aum_str),
+            'filing_date': row.date,
+            'year': int(row.year),
+            'quarter': int(row.quarter),
+            'raw_data_url': row.text_url,
+            'filing_type': row.form,
+            'accession': row.accession,
+        }
+        for row in filings_table.itertuples()
+    ]
+    # Only look up sectors the database doesn't already know
+    sectors = get_sectors_from_yahoo(
+        tickers_missing_sector(holdings_table['holding_ticker'].dropna().unique())
+    )
+    return bulk_load_filings(filings, holdings_table, sectors=sectors)
 
-    for idx, row in enumerate(df.itertuples(), start=1):
-        cik = row.cik
-        name = row.institution_name
-        aum = parse_aum(row.aum_str)
-
-        insert_investment_manager(cik, name, aum)
-        print(f'[{idx}/{total}] Manager upserted: CIK={cik}, Name={name}, AUM={aum}')
-
-        filing_date = row.date
-        year = int(filing_date[:4])
-        month = int(filing_date[5:7])
-        quarter = (month - 1) // 3 + 1
-        filing_id = insert_filing(
-            cik,
-            filing_date,
-            year,
-            quarter,
-            row.text_url,
-            row.form,
-        )
+
+def run(max_num_to_fetch, incremental=False, batch_size=DEFAULT_BATCH_SIZE):
+    """Fetch filings and populate the database.
+
+    Args:
+        max_num_to_fetch (int): Maximum number of CIKs to process (0 = no limit).
+        incremental (bool): Only download and insert filings whose accession
+            numbers are not already stored, starting from each manager's
+            high-water mark.
+        batch_size (int): Number of filings loaded per bulk transaction
+            (managers are never split across transactions, so a batch can run over).
+    """
+    print('▶️  Loading environment variables from .env')
+    load_dotenv()
+
+    skip_accessions, high_water_marks = None, None
+    if incremental:
+        skip_accessions = get_existing_accessions()
+        high_water_marks = get_high_water_marks()
         print(
-            f'    ↳ Filing inserted: ID={filing_id}, '
-            f'Date={filing_date}, Q{quarter}-{year}'
+            f'▶️  Incremental run: {len(skip_accessions)} filings already stored, '
+            f'{len(high_water_marks)} managers with a high-water mark'
         )
 
-        holdings = row.data.to_dict(orient='records')
-        for holding in holdings:
-            security_id = insert_security(
-                None,
-                holding.get('cusip'),
-                holding.get('issuer_name'),
-                None,
-            )
-            insert_holding(
-                filing_id,
-                security_id,
-                holding.get('shares'),
-                holding.get('value'),
-                None,
-            )
-
-        print(f'    ↳ Inserted {len(holdings)} holdings for filing {filing_id}\n')
+    print('▶️  Fetching 13F filings…')
+    batches = iter_13f_filings(
+        MAX_NUM_TO_FETCH=max_num_to_fetch,
+        skip_accessions=skip_accessions,
+        high_water_marks=high_water_marks,
+    )
 
+    total = 0
+    for df in group_batches(batches, batch_size):
+        filing_ids = load_batch(df)
+        total += len(df)
+        print(
+            f'[{total}] Inserted {len(filing_ids)} filings '
+            f'with {int(df["data"].map(len).sum())} holdings'
+        )
+
+    print(f'Fetched {total} filings in total')
+    close_pool()
     print('✅ Database population complete.')
 
 
@@ -113,9 +146,24 @@ def main():
         default=0,
         help='Max number of CIKs to fetch (0 = no limit)',
     )
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='Only fetch and insert filings not already in the database',
+    )
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help='Number of filings loaded per bulk database transaction',
+    )
     args = parser.parse_args()
 
-    run(max_num_to_fetch=args.limit)
+    run(
+        max_num_to_fetch=args.limit,
+        incremental=args.incremental,
+        batch_size=args.batch_size,
+    )
 
 
 if __name__ == '__main__':
@@ -1,13 +1,16 @@
+import os
 import pandas as pd
 import json
-from tqdm import tqdm
 
-from db_utils import (
-    insert_investment_manager,
-    insert_filing,
-    insert_security,
-    insert_holding
-)
+from db_utils import accession_from_url, bulk_load_filings, close_pool, tickers_missing_sector
+from filings_store import DATASET_PATH, dataset_periods, filing_period, read_filings, read_holdings
+from get_filings import get_sectors_from_yahoo
+
+# Filings loaded per bulk_load_filings transaction
+BATCH_SIZE = 50
+
+# The holdings columns bulk_load_filings reads
+HOLDING_COLUMNS = ["accession", "issuer_name", "cusip", "holding_ticker", "investment_discretion", "shares", "value"]
 
 def parse_aum(aum_str):
     try:
@@ -21,61 +24,82 @@ def parse_aum(aum_str):
     except:
         return None
 
-def populate_database(csv_path: str):
-    df = pd.read_csv(csv_path)
+def filing_records(filings):
+    """bulk_load_filings' filing dicts from a frame of filings with the dataset's (or CSV's) columns."""
+    records = []
+    for row in filings.astype(object).where(filings.notna(), None).to_dict(orient="records"):
+        year, quarter = filing_period(row["date"])
+        records.append({
+            "manager_cik": row["cik"],
+            "manager_name": row["Institution Name"],
+            "asset_size": parse_aum(row["Assets Under Management (AUM)"]),
+            "filing_date": row["date"],
+            "year": year,
+            "quarter": quarter,
+            "raw_data_url": row["text_url"],
+            "filing_type": row["form"],
+            "accession": row["accession"],
+        })
+    return records
 
-    for _, row in df.iterrows():
-        cik = row['cik']
-        name = row['Institution Name']
-        aum = parse_aum(row['Assets Under Management (AUM)'])
-        filing_date = row['date']
-        form = row['form']
-        raw_data_url = row['text_url']
-        sector = row['Sector/Industry']
-        ticker = row['Ticker Symbol']
+def load_filings(filings, holdings):
+    """
+    Loads a frame of filings and the frame of their holdings (one row per holding, keyed by
+    accession) with bulk_load_filings, in one transaction.
+    """
+    if filings.empty:
+        return {}
+    sectors = get_sectors_from_yahoo(tickers_missing_sector(holdings["holding_ticker"].dropna().unique()))
+    return bulk_load_filings(filing_records(filings), holdings, sectors=sectors)
 
-        # Parse date
-        year = int(filing_date.split('-')[0])
-        month = int(filing_date.split('-')[1])
-        quarter = (month - 1) // 3 + 1
+def populate_database_from_csv(csv_path: str):
+    """Load a legacy CSV (one row per filing, holdings JSON-dumped into "data"), BATCH_SIZE filings at a time."""
+    for df in pd.read_csv(csv_path, dtype={"cik": str}, chunksize=BATCH_SIZE):
+        if "accession" not in df.columns:
+            df["accession"] = df["text_url"].map(accession_from_url)
+        parsed, records = [], []
+        for _, row in df.iterrows():
+            try:
+                holdings_data = json.loads(row['data'].replace('""', '"'))
+            except json.JSONDecodeError as e:
+                print(f"Error parsing holdings JSON for CIK {row['cik']}: {e}")
+                continue
+            parsed.append(row["accession"])
+            records += [{**h, "accession": row["accession"]} for h in holdings_data]
 
-        # Insert investment manager
-        insert_investment_manager(cik, name, aum)
+        holdings = pd.DataFrame.from_records(records, columns=HOLDING_COLUMNS)
+        for column in ("shares", "value"):
+            holdings[column] = pd.to_numeric(holdings[column]).astype("Int64")
+        filings = df[df["accession"].isin(parsed)]
+        filing_ids = load_filings(filings, holdings)
+        print(f"Inserted {len(filing_ids)} filings with {len(holdings)} holdings")
 
-        # Insert filing
-        try:
-            filing_id = insert_filing(cik, filing_date, year, quarter, raw_data_url, form)
-        except Exception as e:
-            print(f"Failed to insert filing for {cik} on {filing_date}: {e}")
-            continue
+def populate_database_from_parquet(dataset_path: str):
+    """
+    Load a Parquet dataset written by filings_store, one year/quarter partition at a time and
+    BATCH_SIZE filings per transaction. The Arrow-backed frames go to bulk_load_filings as they are.
+    """
+    filing_columns = ["accession", "cik", "date", "form", "text_url", "Institution Name",
+                      "Assets Under Management (AUM)"]
 
-        # Parse holdings
-        try:
-            holdings_data = json.loads(row['data'].replace('""', '"'))
-        except json.JSONDecodeError as e:
-            print(f"Error parsing holdings JSON for CIK {cik}: {e}")
-            continue
+    for year, quarter in dataset_periods(dataset_path):
+        filings = read_filings(dataset_path, columns=filing_columns, year=year, quarter=quarter)
+        holdings = read_holdings(dataset_path, columns=HOLDING_COLUMNS, year=year, quarter=quarter)
+        print(f"Q{quarter}-{year}: {len(filings)} filings, {len(holdings)} holdings")
 
-        for h in tqdm(holdings_data):
-            try:
-                security_id = insert_security(
-                    ticker=h.get("holdings_ticker"),
-                    cusip=h.get("cusip"),
-                    name=h.get("issuer_name"),
-                    sector=sector
-                )
+        for start in range(0, len(filings), BATCH_SIZE):
+            batch = filings.iloc[start:start + BATCH_SIZE]
+            load_filings(batch, holdings[holdings["accession"].isin(batch["accession"])])
 
-                insert_holding(
-                    filing_id=filing_id,
-                    security_id=security_id,
-                    position_size=h.get("shares"),
-                    market_value=h.get("value"),
-                    weight=None  # not sure
-                )
-            except Exception as e:
-                print(f"Failed to insert holding for CIK {cik}, security {h.get('cusip')}: {e}")
+def populate_database(path: str):
+    """path is either a Parquet dataset directory (see filings_store.py) or a legacy CSV file."""
+    if os.path.isdir(path):
+        populate_database_from_parquet(path)
+    else:
+        populate_database_from_csv(path)
+    close_pool()
 
     print("🌼 Database population complete.")
 
 if __name__ == "__main__":
-    populate_database("13f_filings_demo.csv")
\ No newline at end of file
+    populate_database(DATASET_PATH if os.path.isdir(DATASET_PATH) else "13f_filings_demo.csv")
@@ -1,34 +1,74 @@
-from langchain_core.prompts import PromptTemplate
+import asyncio
+import threading
+import time
 from langchain_community.agent_toolkits import create_sql_agent
 from langchain_community.agent_toolkits.sql.toolkit import SQLDatabaseToolkit
 from langchain.agents.agent_types import AgentType
 from langchain_community.utilities import SQLDatabase
 from langchain_google_genai import ChatGoogleGenerativeAI
 import google.generativeai as genai
-import sqlite3
-import pandas as pd
 import os
 from dotenv import load_dotenv
 import config # Put your API key in config.py
+from db_utils import database_uri, engine_args
+from migrate import current_version
+from schema_card import get_schema_card
+from answer_cache import data_version, generated_sql, get_answer_cache, result_row_count, serialize_steps
+from router import answer_question
 
-def init_agent(): 
-    GEMINI_API_KEY = config.GEMINI_API_KEY
-    os.environ["GEMINI_API_KEY"] = GEMINI_API_KEY
+"""
+Builds the SQL agent that answers questions about the 13F database.
+Building it (the Gemini client, and reflecting the database schema) takes seconds, so the app
+shares one agent per process: get_agent() builds it on first use, and warm_up_agent() starts
+that in the background so the first question doesn't wait for it.
+The agent's SQL tools describe tables from the schema card (schema_card.py) instead of querying
+the catalog and sample rows on every question; the agent is rebuilt when the schema changes.
+"""
+
+# What the agent answers when it gives up; such answers are not cached
+AGENT_STOPPED = "Agent stopped due to iteration limit or time limit."
+
+# What the agent writes before its final answer in a ReAct step
+FINAL_ANSWER = "Final Answer:"
 
-    system_prompt = """ You are a data analyst assistant helping users understand institutional investment behavior 
+# How often (in seconds) get_agent() checks whether a migration changed the schema
+SCHEMA_CHECK_INTERVAL = 60
+
+SYSTEM_PROMPT = """ You are a data analyst assistant helping users understand institutional investment behavior 
     based on SEC 13F filings. You have access to a PostgreSQL database with the following schema: - 
     InvestmentManagers: contains info about investment firms, with fields `cik`, `name`, and `asset_size` 
     (assets under management). - Filings: contains 13F filings submitted by those managers, with fields like 
-    `filing_id`, `manager_cik`, `filing_date`, `year`, `quarter`, and `filing_type`. - Securities: contains 
+    `filing_id`, `manager_cik`, `filing_date`, `year`, `quarter`, `filing_type`, `total_value` (the value of all its 
+    holdings) and `position_count` (its number of holdings). - Securities: contains 
     metadata about individual stocks or holdings, including `ticker`, `cusip`, `name`, and `sector`. - Holdings: 
     connects filings to securities, with fields such as `position_size` (number of shares), `market_value`, and 
-    `weight` (relative importance in the filing). Use only the data available in these tables to generate your 
+    `weight` (the holding's fraction of its filing's `total_value`, between 0 and 1; use it directly for portfolio 
+    share or concentration questions instead of computing it). Holdings also carries its filing's `year` and `quarter`; when a question 
+    is about specific periods, filter on `Holdings.year` and `Holdings.quarter` so only those quarters are read. - PositionChanges: one row per 
+    manager (`manager_cik`), security (`security_id`) and quarter (`year`, `quarter`) comparing the manager's position with 
+    the previous quarter: `shares`, `value`, `prev_shares`, `prev_value`, `shares_change`, `value_change`, and the flags 
+    `is_new`, `is_exited`, `is_increased` and `is_decreased`. For questions about buying, selling, new or exited positions, 
+    or changes over quarters, query PositionChanges (summing `shares_change` across quarters if needed) instead of joining 
+    filings from different quarters yourself. - ManagerSectorExposure: per manager (`manager_cik`), quarter (`year`, 
+    `quarter`) and `sector`, the `value` held, its `weight` in the portfolio and `position_count`; use it for sector 
+    allocation and sector shift questions. - SecurityOwnership: per security (`security_id`) and quarter, the number 
+    of managers holding it (`holder_count`), `total_shares` and `total_value`; use it for institutional ownership 
+    questions. Use only the data available in these tables to generate your 
     SQL queries and answers. Focus on analyzing positions, sectors, institution behavior, and filing trends. 
     Do not make financial recommendations, guesses about user sentiment, or speculative statements. 
     If data is missing or incomplete, explain this politely without disclaimers like “As an AI, I cannot…” 
     or “You should talk to a financial advisor.” Just focus on the data. Provide helpful, concise, and insightful summaries. 
     Your goal is to translate the user's question into a relevant SQL query, run it, and explain the results clearly. No destructive SQL commands allowed (e.g., DELETE, UPDATE).
-    Do not rely on weights data or display it to the user because it is not functional. Do not make any mentions of a database or fields to the user. When producing SQL queries, wrap them in a tool use block or always use the Action: / Action Input: format. After giving your response, provide a sentence to the user explaining how this information might be useful to them."""
+    Do not make any mentions of a database or fields to the user. When producing SQL queries, wrap them in a tool use block or always use the Action: / Action Input: format. After giving your response, provide a sentence to the user explaining how this information might be useful to them."""
+
+
+def init_agent(schema_card=None):
+    """
+    Builds a new SQL agent. Use get_agent() to share one instead.
+    schema_card: the card its tools describe tables with (defaults to the current schema's).
+    """
+    GEMINI_API_KEY = config.GEMINI_API_KEY
+    os.environ["GEMINI_API_KEY"] = GEMINI_API_KEY
 
     # genai.configure(api_key=GEMINI_API_KEY)
     # for m in genai.list_models():
@@ -38,32 +78,22 @@ def init_agent():
 
     #llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash-exp", google_api_key=GEMINI_API_KEY, temperature=0)
     llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash", google_api_key=GEMINI_API_KEY, temperature=0)
-    df = pd.read_csv("13f_filings_demo.csv")
-    conn = sqlite3.connect("testdatabase.db")
 
     load_dotenv()  # Load environment variables from .env file
-    # Check if environment variables are properly set
-    user = os.getenv("DB_USER")
-    password = os.getenv("DB_PASSWORD")
-    host = os.getenv("DB_HOST")
-    port = os.getenv("DB_PORT")
-    dbname = os.getenv("DB_NAME")
-
-    if None in [user, password, host, port, dbname]:
-        raise ValueError("One or more environment variables are missing.")
-
-    # Ensure the port is an integer
-    port = int(port)
-
-    # Create the PostgreSQL connection URI
-    pg_uri = f"postgresql+psycopg2://{user}:{password}@{host}:{port}/{dbname}"
 
+    if schema_card is None:
+        schema_card = get_schema_card()
 
-    my_db = SQLDatabase.from_uri(pg_uri)
-
-    # # Convert DataFrame to a SQLite table named "Filings"
-    # df.to_sql("Filings", conn, if_exists='replace')
-    # my_db = SQLDatabase.from_uri("sqlite:///testdatabase.db")
+    # Same database and pool bounds as the loaders in db_utils.py. Only the card's tables are
+    # reflected (not every Holdings partition), and their descriptions come from the card, so
+    # listing tables and reading schemas never queries the database.
+    my_db = SQLDatabase.from_uri(
+        database_uri(),
+        engine_args=engine_args(),
+        include_tables=sorted(schema_card["tables"]),
+        sample_rows_in_table_info=0,
+        custom_table_info=schema_card["tables"],
+    )
 
     agent_executor = create_sql_agent(
         llm=llm,
@@ -71,10 +101,127 @@ def init_agent():
         agent_type=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
         handle_parsing_errors=True,
         verbose=True,
-        prefix=system_prompt,
+        prefix=SYSTEM_PROMPT,
         agent_executor_kwargs={"return_intermediate_steps": True}
     )
 
-    return agent_executor, df
+    return agent_executor
     # user_inquiry = "What major institutions are included in these filings and what makes them significant?"
-    #agent_executor.invoke(user_inquiry)
\ No newline at end of file
+    #agent_executor.invoke(user_inquiry)
+
+
+_agent = None
+_agent_version = None
+_agent_lock = threading.Lock()
+_schema_checked_at = 0.0
+_warm_up = None
+
+
+def _schema_changed():
+    """Whether a migration changed the schema since the agent was built (checked at most every SCHEMA_CHECK_INTERVAL)."""
+    global _schema_checked_at
+    if time.time() - _schema_checked_at < SCHEMA_CHECK_INTERVAL:
+        return False
+    _schema_checked_at = time.time()
+    return current_version() != _agent_version
+
+
+def get_agent():
+    """
+    Returns the process-wide SQL agent, building it on first use and again after the schema changes.
+    The agent keeps no state between invocations and its database engine is thread-safe, so
+    every session can share it. If building fails, the next call tries again.
+    """
+    global _agent, _agent_version, _schema_checked_at
+    if _agent is None or _schema_changed():
+        with _agent_lock:
+            if _agent is None or _agent_version != current_version():
+                schema_card = get_schema_card()
+                _agent = init_agent(schema_card)
+                _agent_version = schema_card["version"]
+                _schema_checked_at = time.time()
+    return _agent
+
+
+def warm_up_agent():
+    """Starts building the shared agent in a background thread (a no-op once it is built or building)."""
+    global _warm_up
+    if _agent is not None or (_warm_up is not None and _warm_up.is_alive()):
+        return
+
+    def build():
+        try:
+            get_agent()
+        except Exception as e:
+            # get_agent() will retry, and report the error, when a question is asked
+            print(f"Building the SQL agent failed: {e}")
+
+    _warm_up = threading.Thread(target=build, name="agent-warm-up", daemon=True)
+    _warm_up.start()
+
+
+async def _stream_agent(question, on_event):
+    """
+    Runs the shared agent with astream_events, reporting its progress to on_event (see ask()).
+    Returns the agent's result, like invoke() does.
+    """
+    root, result, answer = None, None, ""
+    llm_output = {}  # run id -> text of each LLM call so far
+    async for event in get_agent().astream_events(question, version="v2"):
+        kind, data = event["event"], event["data"]
+        if root is None:
+            root = event["run_id"]
+        if kind == "on_chat_model_stream":
+            content = data["chunk"].content
+            text = llm_output.get(event["run_id"], "") + (content if isinstance(content, str) else "")
+            llm_output[event["run_id"]] = text
+            if FINAL_ANSWER in text:
+                answer = text.split(FINAL_ANSWER, 1)[1].lstrip()
+                on_event("answer", answer)
+        elif kind == "on_tool_start":
+            on_event("tool", {"tool": event["name"], "input": data.get("input")})
+        elif kind == "on_tool_end":
+            output = str(data.get("output", ""))
+            rows = result_row_count(output) if event["name"] == "sql_db_query" else None
+            on_event("tool_end", {"tool": event["name"], "output": output, "rows": rows})
+        elif kind == "on_chain_end" and event["run_id"] == root:
+            result = data["output"]
+    # The root run's output is the executor's result; fall back to what was streamed without it
+    return result if isinstance(result, dict) and "output" in result else {"output": answer}
+
+
+def ask(question, cache=None, on_event=None):
+    """
+    Answers question with a SQL template when one fits (see router.py), else from the answer cache
+    when the same question was already answered for the current data, else with the shared agent.
+    cache: AnswerCache to use (defaults to the process-wide one).
+    on_event: optional function called as on_event(kind, data) while the agent works, so the
+    caller can show its progress before the answer is complete:
+        "tool", {"tool", "input"}: a tool (e.g. sql_db_query) was called
+        "tool_end", {"tool", "output", "rows"}: it returned (rows is set for sql_db_query only)
+        "answer", text: the final answer so far, as its tokens arrive
+
+    Returns:
+        dict: "answer", "steps" (the agent's intermediate steps, see answer_cache.serialize_steps),
+        "sql" (the queries it ran) and "cached" (whether the answer came from the cache).
+    """
+    routed = answer_question(question)
+    if routed is not None:
+        return {**routed, "cached": False}
+
+    if cache is None:
+        cache = get_answer_cache()
+    version = data_version()
+    hit = cache.get(question, version)
+    if hit is not None:
+        return {**hit, "cached": True}
+
+    if on_event is None:
+        result = get_agent().invoke(question)
+    else:
+        result = asyncio.run(_stream_agent(question, on_event))
+    steps = serialize_steps(result.get("intermediate_steps", []))
+    answer = {"answer": result["output"], "steps": steps, "sql": generated_sql(steps)}
+    if answer["answer"] and answer["answer"] != AGENT_STOPPED:
+        cache.put(question, version, **answer)
+    return {**answer, "cached": False}
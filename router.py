@@ -0,0 +1,360 @@
+import re
+from collections import namedtuple
+
+from db_utils import transaction
+
+"""
+This file answers FinBot's common questions directly with SQL templates, without the agent.
+
+The agent needs several Gemini calls for every question, even for the README's canonical ones.
+route() recognizes those with regular expressions and extracts their parameters (a security,
+a manager, a quarter, a number of quarters, how many rows); answer() resolves the name to exactly
+one security or manager, runs the matching template over the PositionChanges and
+ManagerSectorExposure tables and formats the rows as a table. Compound questions, names that
+match nothing or several, and templates that find no rows return None and are left to the agent.
+"""
+
+# A recognized question: which template answers it, and the parameters it needs
+Route = namedtuple("Route", ["intent", "params"])
+
+NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+}
+
+def _normalized(expression):
+    """
+    SQL that normalizes a company name for matching: lowercase, punctuation dropped, and
+    trailing corporate suffixes removed ("BlackRock, Inc." and "blackrock" both give "blackrock").
+    """
+    cleaned = f"TRIM(REGEXP_REPLACE(LOWER({expression}), '[^a-z0-9&]+', ' ', 'g'))"
+    return (f"REGEXP_REPLACE({cleaned}, "
+            r"'( (inc|corp|corporation|co|company|ltd|llc|lp|plc|sa|ag|nv|the|new|com|cl a|class a|group|holdings?))+$', '')")
+
+
+# The one security a question names: by exact ticker (e.g. "TSLA"), or else by exact normalized
+# issuer name (e.g. "Tesla" for "TESLA INC"). Two rows back means the name is ambiguous.
+RESOLVE_SECURITY = f"""
+    SELECT security_id, ticker FROM Securities WHERE ticker = UPPER(%(name)s)
+    UNION ALL
+    SELECT security_id, COALESCE(ticker, name) FROM Securities
+    WHERE {_normalized('name')} = {_normalized('%(name)s')}
+      AND NOT EXISTS (SELECT 1 FROM Securities WHERE ticker = UPPER(%(name)s))
+    LIMIT 2;
+"""
+
+# The one manager a question names, by exact normalized name
+RESOLVE_MANAGER = f"""
+    SELECT cik, name FROM InvestmentManagers
+    WHERE {_normalized('name')} = {_normalized('%(name)s')}
+    LIMIT 2;
+"""
+
+# The requested quarter; else the newest quarter with rows, minus %(offset)s quarters
+# ("last quarter" is the one before the newest)
+PERIOD_KEY = "year * 4 + quarter - 1"
+PERIOD_FILTER = "(%(year)s::INT IS NULL OR (year, quarter) = (%(year)s, %(quarter)s))"
+
+
+def _period_ctes(where):
+    return f"""newest AS (
+            SELECT {PERIOD_KEY} - %(offset)s AS period FROM PositionChanges
+            WHERE {where} AND {PERIOD_FILTER}
+            ORDER BY year DESC, quarter DESC
+            LIMIT 1
+        ),
+        period AS (SELECT period / 4 AS year, period %% 4 + 1 AS quarter FROM newest)"""
+
+
+TEMPLATES = {
+    "top_holders": f"""
+        WITH {_period_ctes("security_id = %(security_id)s")}
+        SELECT m.name AS manager, p.year, p.quarter, pc.shares, pc.value
+        FROM period p
+        JOIN PositionChanges pc ON pc.year = p.year AND pc.quarter = p.quarter
+        JOIN InvestmentManagers m ON m.cik = pc.manager_cik
+        WHERE pc.security_id = %(security_id)s AND pc.shares > 0
+        ORDER BY pc.value DESC
+        LIMIT %(limit)s;
+    """,
+    "new_positions": f"""
+        WITH {_period_ctes("manager_cik = %(manager_cik)s")}
+        SELECT m.name AS manager, s.name AS security, s.ticker, p.year, p.quarter, pc.shares, pc.value
+        FROM period p
+        JOIN PositionChanges pc ON pc.year = p.year AND pc.quarter = p.quarter
+        JOIN InvestmentManagers m ON m.cik = pc.manager_cik
+        JOIN Securities s ON s.security_id = pc.security_id
+        WHERE pc.manager_cik = %(manager_cik)s AND pc.is_new
+        ORDER BY pc.value DESC
+        LIMIT %(limit)s;
+    """,
+    "biggest_increases": """
+        WITH periods AS (
+            SELECT DISTINCT year, quarter FROM PositionChanges
+            WHERE security_id = %(security_id)s
+            ORDER BY year DESC, quarter DESC
+            LIMIT %(quarters)s
+        )
+        SELECT m.name AS manager, SUM(pc.shares_change) AS shares_change, SUM(pc.value_change) AS value_change
+        FROM periods p
+        JOIN PositionChanges pc ON pc.year = p.year AND pc.quarter = p.quarter
+        JOIN InvestmentManagers m ON m.cik = pc.manager_cik
+        WHERE pc.security_id = %(security_id)s
+        GROUP BY m.name
+        HAVING SUM(pc.shares_change) > 0
+        ORDER BY shares_change DESC
+        LIMIT %(limit)s;
+    """,
+    # Compares the newest quarter with the one %(quarters)s quarters before it (or the oldest there is)
+    "sector_shift": f"""
+        WITH periods AS (
+            SELECT DISTINCT {PERIOD_KEY} AS period FROM ManagerSectorExposure
+            WHERE manager_cik = %(manager_cik)s
+            ORDER BY period DESC
+            LIMIT %(quarters)s + 1
+        ),
+        bounds AS (SELECT MIN(period) AS first, MAX(period) AS last FROM periods),
+        exposure AS (
+            SELECT e.sector, e.year * 4 + e.quarter - 1 = b.last AS is_last, SUM(e.value) AS value
+            FROM ManagerSectorExposure e CROSS JOIN bounds b
+            WHERE e.manager_cik = %(manager_cik)s
+              AND e.year * 4 + e.quarter - 1 IN (b.first, b.last)
+            GROUP BY 1, 2
+        )
+        SELECT e.sector,
+               MIN(b.first) / 4 || ' Q' || MIN(b.first) %% 4 + 1 AS from_quarter,
+               MIN(b.last) / 4 || ' Q' || MIN(b.last) %% 4 + 1 AS to_quarter,
+               SUM(SUM(e.value) FILTER (WHERE NOT e.is_last)) OVER () AS total_before,
+               SUM(e.value) FILTER (WHERE NOT e.is_last) AS value_before,
+               SUM(SUM(e.value) FILTER (WHERE e.is_last)) OVER () AS total_after,
+               SUM(e.value) FILTER (WHERE e.is_last) AS value_after
+        FROM exposure e CROSS JOIN bounds b
+        GROUP BY e.sector;
+    """,
+}
+
+# Words the patterns share
+_COUNT = r"(?P<limit>\d+|" + "|".join(NUMBER_WORDS) + r")"
+_QUARTERS = r"(?P<quarters>\d+|" + "|".join(NUMBER_WORDS) + r"|a|the)"
+_PERIOD = r"(?:\s+(?:(?P<relative>this|last) quarter|in (?P<period>q[1-4]\s*\d{4}|\d{4}\s*q[1-4])))?"
+_FIRMS = r"(?:firms|institutions|managers|funds|investors|holders)"
+# A company name: words of letters, digits and the punctuation names use ("at&t", "j.p. morgan")
+_NAME = r"[\w&.,'\-]+(?: [\w&.,'\-]+)*?"
+# A sector: one or two words
+_SECTOR = r"\w+(?: \w+)?"
+
+# A capture containing one of these is part of a compound question, which the agent should answer
+NOT_IN_NAMES = {
+    "and", "or", "but", "how", "why", "what", "when", "where", "which", "who", "whether",
+    "compared", "compare", "vs", "vs.", "versus", "than", "did", "does", "do", "is", "are",
+}
+
+PATTERNS = [
+    ("biggest_increases", re.compile(
+        rf"(?:which|what|who)?\s*(?:are\s+)?(?:the\s+)?(?:top\s+)?(?:{_COUNT}\s+)?{_FIRMS}?\s*(?:have\s+)?"
+        rf"increased (?:their )?(?P<security>{_NAME}) (?:holdings?|positions?|stakes?|shares)\s+(?:the )?most\s+"
+        rf"(?:over|in) the (?:last|past) {_QUARTERS}?\s*(?P<unit>quarters?|years?)"
+    )),
+    ("biggest_increases", re.compile(
+        rf"(?:the\s+)?(?:top\s+)?(?:{_COUNT}\s+)?(?:biggest|largest) increases? in (?P<security>{_NAME})"
+        rf"(?: holdings?| positions?| shares)?\s+(?:over|in) the (?:last|past) {_QUARTERS}?\s*(?P<unit>quarters?|years?)"
+    )),
+    ("sector_shift", re.compile(
+        rf"(?:has|did) (?P<manager>{_NAME}) shift(?:ed)? from (?P<from_sector>{_SECTOR}) to (?P<to_sector>{_SECTOR})"
+        rf"(?:\s+(?:in|over) the (?:last|past) {_QUARTERS}?\s*(?P<unit>quarters?|years?))?"
+    )),
+    ("sector_shift", re.compile(
+        rf"(?:how has )?(?:the )?sector (?:shift|allocation|exposure|mix)s? (?:of|for) (?P<manager>{_NAME})"
+        rf"(?:\s+(?:changed\s+)?(?:in|over) the (?:last|past) {_QUARTERS}?\s*(?P<unit>quarters?|years?))?"
+    )),
+    ("new_positions", re.compile(
+        rf"what new positions did (?P<manager>{_NAME}) (?:add|open|buy|take|start|initiate)(?: on)?{_PERIOD}"
+    )),
+    ("new_positions", re.compile(
+        rf"(?:show |list )?(?:the )?new positions (?:of|for|by|from) (?P<manager>{_NAME}){_PERIOD}"
+    )),
+    ("top_holders", re.compile(
+        rf"(?:who are |which are |what are |show )?(?:the )?(?:top|largest|biggest) (?:{_COUNT} )?"
+        rf"(?:holders|owners|shareholders|{_FIRMS}) (?:of|in|holding) (?P<security>{_NAME}){_PERIOD}"
+    )),
+    ("top_holders", re.compile(
+        rf"(?:who|which {_FIRMS}) (?:holds?|owns?) the most (?P<security>{_NAME})(?: shares| stock)?{_PERIOD}"
+    )),
+]
+
+DEFAULT_LIMITS = {"top_holders": 10, "new_positions": 20, "biggest_increases": 5, "sector_shift": None}
+
+
+def _number(word, default):
+    if word is None or word in ("a", "the"):
+        return default
+    return int(word) if word.isdigit() else NUMBER_WORDS[word]
+
+
+def _period(text):
+    """(year, quarter) from "Q1 2025" or "2025 Q1", else (None, None) for the newest quarter."""
+    if not text:
+        return None, None
+    match = re.match(r"q([1-4])\s*(\d{4})|(\d{4})\s*q([1-4])", text)
+    if match.group(1):
+        return int(match.group(2)), int(match.group(1))
+    return int(match.group(3)), int(match.group(4))
+
+
+def _quarters(groups, default):
+    """A "last N quarters" / "past year" span, in quarters."""
+    unit = groups.get("unit")
+    if unit is None:
+        return default
+    count = _number(groups.get("quarters"), 1)
+    return count * 4 if unit.startswith("year") else count
+
+
+def _is_name(text):
+    return not NOT_IN_NAMES.intersection(text.replace(",", " ").split())
+
+
+def route(question):
+    """The Route answering question, or None if it needs the agent."""
+    text = " ".join(question.lower().replace("’", "'").split()).rstrip("?.! ")
+    for intent, pattern in PATTERNS:
+        match = pattern.fullmatch(text)
+        if match is None:
+            continue
+        groups = match.groupdict()
+        names = [groups.get(key) for key in ("security", "manager", "from_sector", "to_sector")]
+        if not all(_is_name(name) for name in names if name):
+            return None
+        params = {"limit": _number(groups.get("limit"), DEFAULT_LIMITS[intent])}
+        if "security" in groups:
+            params["security"] = re.sub(r"^(?:the )|'s$", "", groups["security"]).strip()
+        if "manager" in groups:
+            params["manager"] = groups["manager"].strip()
+        if intent in ("top_holders", "new_positions"):
+            params["year"], params["quarter"] = _period(groups.get("period"))
+            params["offset"] = 1 if groups.get("relative") == "last" else 0
+        if intent == "biggest_increases":
+            params["quarters"] = _quarters(groups, 2)
+        if intent == "sector_shift":
+            params["quarters"] = _quarters(groups, 4)
+            params["sectors"] = [groups[key].strip() for key in ("from_sector", "to_sector") if groups.get(key)]
+        return Route(intent, params)
+    return None
+
+
+def _format_value(column, value):
+    if value is None:
+        return "-"
+    if column.startswith("weight"):
+        return f"{float(value):+.1%}" if column.endswith("change") else f"{float(value):.1%}"
+    if column.endswith("change"):
+        return f"{float(value):+,.0f}"
+    if isinstance(value, (int, float)) or hasattr(value, "as_integer_ratio"):
+        return f"{float(value):,.0f}" if column not in ("year", "quarter") else str(value)
+    return str(value)
+
+
+def markdown_table(columns, rows):
+    """A markdown table of rows, with numbers formatted for reading."""
+    lines = [
+        "| " + " | ".join(column.replace("_", " ").capitalize() for column in columns) + " |",
+        "|" + "---|" * len(columns),
+    ]
+    for row in rows:
+        lines.append("| " + " | ".join(_format_value(c, v) for c, v in zip(columns, row)) + " |")
+    return "\n".join(lines)
+
+
+def _sector_rows(rows):
+    """The sector_shift rows as (sector, weight before, weight after, weight change), biggest change first."""
+    table = []
+    for sector, _, _, total_before, value_before, total_after, value_after in rows:
+        before = float(value_before) / float(total_before) if value_before and total_before else 0.0
+        after = float(value_after) / float(total_after) if value_after and total_after else 0.0
+        table.append((sector, before, after, after - before))
+    return sorted(table, key=lambda row: row[3], reverse=True)
+
+
+def _resolve(cur, params):
+    """
+    Replaces the security or manager the question names with its one security_id or manager_cik.
+    Returns:
+        (dict, str): the template's params and the resolved name, or None when the name matches
+        nothing or more than one security/manager, so the agent should try instead.
+    """
+    if "security" in params:
+        cur.execute(RESOLVE_SECURITY, {"name": params["security"]})
+        key = "security_id"
+    else:
+        cur.execute(RESOLVE_MANAGER, {"name": params["manager"]})
+        key = "manager_cik"
+    matches = cur.fetchall()
+    if len(matches) != 1:
+        return None
+    (resolved, name), = matches
+    params = {k: v for k, v in params.items() if k not in ("security", "manager", "sectors")}
+    return {**params, key: resolved}, name
+
+
+def _describe(route_, name, rows):
+    """A sentence introducing the results."""
+    if route_.intent == "top_holders":
+        return f"The largest holders of {name} in {rows[0][1]} Q{rows[0][2]}:"
+    if route_.intent == "new_positions":
+        return f"New positions opened by {name} in {rows[0][3]} Q{rows[0][4]}:"
+    if route_.intent == "biggest_increases":
+        return (f"The managers that increased their {name} holdings the most "
+                f"over the last {route_.params['quarters']} quarters:")
+    return f"{name}'s portfolio weight by sector, {rows[0][1]} vs. {rows[0][2]}:"
+
+
+def answer(route_):
+    """
+    Runs route_'s template for the one security or manager the question names.
+    Returns:
+        dict: "answer" (markdown), "steps" and "sql" shaped like prompt.ask()'s, or None when
+        the name is unknown or ambiguous, or the template finds no rows, and the agent should
+        try instead.
+    """
+    with transaction() as conn:
+        with conn.cursor() as cur:
+            resolved = _resolve(cur, route_.params)
+            if resolved is None:
+                return None
+            params, name = resolved
+            query = cur.mogrify(TEMPLATES[route_.intent], params).decode()
+            cur.execute(query)
+            columns = [column.name for column in cur.description]
+            rows = cur.fetchall()
+    if not rows:
+        return None
+
+    text = _describe(route_, name, rows)
+    if route_.intent == "sector_shift":
+        table = _sector_rows(rows)
+        text += "\n\n" + markdown_table(["sector", "weight_before", "weight_after", "weight_change"], table)
+        # The sectors the question named, matched loosely ("financials" -> "Financial Services")
+        mentioned = [row for sector in route_.params["sectors"] for row in table
+                     if sector.lower()[:6] in row[0].lower()]
+        if mentioned:
+            text += "\n\n" + " ".join(
+                f"{sector}: {before:.1%} → {after:.1%}." for sector, before, after, _ in mentioned
+            )
+    else:
+        text += "\n\n" + markdown_table(columns, rows)
+
+    steps = [{
+        "tool": f"router:{route_.intent}",
+        "tool_input": route_.params,
+        "log": "Answered with a SQL template instead of the agent",
+        "observation": f"{len(rows)} rows",
+    }]
+    return {"answer": text, "steps": steps, "sql": [query]}
+
+
+def answer_question(question):
+    """Answers question with a template if one applies; None means it needs the agent."""
+    route_ = route(question)
+    if route_ is None:
+        return None
+    return answer(route_)
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+import os
+import json
+import argparse
+
+from db_utils import transaction
+from migrate import current_version
+
+"""
+Builds the schema card the chat agent's SQL tools serve instead of introspecting the database.
+
+Without it, every sql_db_schema call runs catalog queries and a SELECT ... LIMIT 3 on each table
+(including the large Holdings table) and sends the raw rows to Gemini. The card describes each
+table once: its columns and types, what they mean, and a few representative values. It is
+built from the database, saved to SCHEMA_CARD_PATH together with the schema version
+(migrate.current_version()), and only rebuilt when a migration changes that version.
+"""
+
+SCHEMA_CARD_PATH = "schema_card.json"
+# Bump when CARD_TABLES or the card layout change, so saved cards are rebuilt
+CARD_FORMAT = 2
+
+# The tables the agent may query: a description, then what each column means
+CARD_TABLES = {
+    "investmentmanagers": ("Investment firms that file 13F reports.", {
+        "cik": "SEC Central Index Key of the firm",
+        "name": "firm name as registered with the SEC",
+        "asset_size": "assets under management in dollars (NULL if unknown)",
+    }),
+    "filings": ("13F filings, one row per filing submitted by a manager.", {
+        "manager_cik": "the InvestmentManagers.cik that filed it",
+        "filing_date": "date the filing was submitted",
+        "year": "year the 13F was filed in (from filing_date, not the period it reports on)",
+        "quarter": "quarter the 13F was filed in, 1-4 (usually the quarter after the one it reports on)",
+        "raw_data_url": "URL of the filing on SEC EDGAR",
+        "filing_type": "'13F-HR' for a report, '13F-HR/A' for an amendment",
+        "accession_number": "SEC accession number, unique per filing",
+        "total_value": "sum of the filing's Holdings.market_value in dollars",
+        "position_count": "number of the filing's Holdings rows",
+    }),
+    "securities": ("Stocks and other securities that appear in filings.", {
+        "ticker": "trading symbol (NULL if unknown)",
+        "cusip": "CUSIP identifier, unique per security",
+        "name": "issuer name",
+        "sector": "industry sector from Yahoo Finance (NULL if unknown)",
+    }),
+    "holdings": ("One row per position reported in a filing. Filter on year and quarter when the "
+                 "question is about specific periods, so only those quarters are read.", {
+        "filing_id": "the Filings row that reported it",
+        "security_id": "the Securities row held",
+        "year": "the filing's year (the year it was filed in)",
+        "quarter": "the filing's quarter (the quarter it was filed in)",
+        "position_size": "number of shares",
+        "market_value": "value of the position in dollars",
+        "weight": "market_value / the filing's total_value, between 0 and 1",
+        "investment_discretion": "'SOLE', 'DFND' or 'OTR' ('' if not reported)",
+    }),
+    "positionchanges": ("Quarter-over-quarter change of each manager's position in each security, "
+                        "from the manager's latest 13F-HR of each quarter.", {
+        "shares": "shares held this quarter (0 if the position was exited)",
+        "value": "value held this quarter in dollars",
+        "prev_shares": "shares held the previous quarter (0 if new, NULL if no previous filing)",
+        "prev_value": "value held the previous quarter (NULL if no previous filing)",
+        "shares_change": "shares - prev_shares",
+        "value_change": "value - prev_value",
+        "is_new": "the position was opened this quarter",
+        "is_exited": "the position was closed this quarter",
+        "is_increased": "more shares than the previous quarter",
+        "is_decreased": "fewer shares than the previous quarter",
+    }),
+    "managersectorexposure": ("How much of each manager's portfolio is in each sector, per quarter.", {
+        "sector": "Securities.sector, or 'Unknown'",
+        "value": "value held in the sector in dollars",
+        "weight": "value / the filing's total_value",
+        "position_count": "number of securities held in the sector",
+    }),
+    "securityownership": ("Institutional ownership of each security per quarter, across all managers.", {
+        "holder_count": "number of managers holding it",
+        "total_shares": "shares held by all managers",
+        "total_value": "value held by all managers in dollars",
+    }),
+}
+
+# Queries for a few representative values of a column. Holdings has none: it is too large to
+# scan for examples, and its values are covered by the other tables.
+REPRESENTATIVE_VALUES = {
+    "investmentmanagers": {
+        "name": "SELECT name FROM InvestmentManagers WHERE name IS NOT NULL "
+                "GROUP BY name ORDER BY MAX(asset_size) DESC NULLS LAST, name LIMIT 5",
+    },
+    "filings": {
+        "filing_type": "SELECT filing_type FROM Filings WHERE filing_type IS NOT NULL "
+                       "GROUP BY filing_type ORDER BY COUNT(*) DESC LIMIT 5",
+        "year, quarter": "SELECT year || ' Q' || quarter FROM Filings WHERE year IS NOT NULL "
+                         "GROUP BY year, quarter ORDER BY year DESC, quarter DESC LIMIT 8",
+    },
+    "securities": {
+        "ticker": "SELECT ticker FROM Securities WHERE ticker IS NOT NULL "
+                  "GROUP BY ticker ORDER BY MIN(security_id) LIMIT 5",
+        "sector": "SELECT sector FROM Securities WHERE sector IS NOT NULL "
+                  "GROUP BY sector ORDER BY COUNT(*) DESC LIMIT 12",
+    },
+}
+
+
+def _table_columns(cur):
+    """{table: [(column, type), ...]} for the CARD_TABLES that exist, in column order."""
+    cur.execute("""
+        SELECT table_name, column_name, data_type
+        FROM information_schema.columns
+        WHERE table_schema = 'public' AND table_name = ANY(%s)
+        ORDER BY table_name, ordinal_position;
+    """, (list(CARD_TABLES),))
+    columns = {}
+    for table, column, data_type in cur.fetchall():
+        columns.setdefault(table, []).append((column, data_type))
+    return columns
+
+
+def _representative_values(cur, table):
+    examples = {}
+    for column, query in REPRESENTATIVE_VALUES.get(table, {}).items():
+        cur.execute(query)
+        values = [row[0] for row in cur.fetchall()]
+        if values:
+            examples[column] = ", ".join(repr(value) for value in values)
+    return examples
+
+
+def _table_card(table, columns, examples):
+    description, column_notes = CARD_TABLES[table]
+    lines = [f"CREATE TABLE {table} ("]
+    for i, (column, data_type) in enumerate(columns):
+        note = column_notes.get(column)
+        separator = "," if i < len(columns) - 1 else ""
+        lines.append(f"\t{column} {data_type}{separator}" + (f" -- {note}" if note else ""))
+    lines.append(")")
+    lines.append("/*")
+    lines.append(description)
+    if examples:
+        lines.append("Representative values:")
+        lines.extend(f"  {column}: {values}" for column, values in examples.items())
+    lines.append("*/")
+    return "\n".join(lines)
+
+
+def build_schema_card():
+    """
+    Builds the card from the database.
+    Returns:
+        dict: {"version": schema version, "format": CARD_FORMAT, "tables": {table name: card text}}.
+    """
+    version = current_version()
+    with transaction() as conn:
+        with conn.cursor() as cur:
+            columns = _table_columns(cur)
+            tables = {
+                table: _table_card(table, columns[table], _representative_values(cur, table))
+                for table in CARD_TABLES if table in columns
+            }
+    return {"version": version, "format": CARD_FORMAT, "tables": tables}
+
+
+_card = None
+
+
+def get_schema_card(path=SCHEMA_CARD_PATH, rebuild=False):
+    """
+    Returns the card for the database's current schema version (and this file's CARD_FORMAT).
+    It is served from memory, else from path, and only built (and saved to path) when neither
+    matches the current version, or when rebuild is set.
+    """
+    global _card
+    version = current_version()
+
+    def current(card):
+        return card is not None and card["version"] == version and card.get("format") == CARD_FORMAT
+
+    if not rebuild and not current(_card) and os.path.exists(path):
+        with open(path) as f:
+            _card = json.load(f)
+    if rebuild or not current(_card):
+        _card = build_schema_card()
+        with open(path, "w") as f:
+            json.dump(_card, f, indent=2)
+    return _card
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and print the schema card used by the chat agent.")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Rebuild the card even if the schema version hasn't changed (e.g. to refresh its example values)")
+    args = parser.parse_args()
+
+    card = get_schema_card(rebuild=args.rebuild)
+    print(f"Schema version {card['version']}\n")
+    print("\n\n".join(card["tables"].values()))
+
+
+if __name__ == "__main__":
+    main()
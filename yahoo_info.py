@@ -0,0 +1,148 @@
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import yfinance as yf
+
+"""
+This file looks up company information (sector, fund AUM and fund category) on Yahoo Finance
+for get_filings.py and the database loaders.
+
+Every lookup goes through a YahooInfo enricher, which:
+  1. dedupes the tickers it is asked about, so each ticker's .info is fetched once,
+  2. fetches the missing ones concurrently on a small thread pool,
+  3. keeps the results in a SQLite cache for ttl seconds, so re-runs barely touch Yahoo,
+  4. joins the results back onto a DataFrame with vectorized column maps.
+
+The fetcher is a plain function ticker -> info dict, so tests can inject an offline one.
+"""
+
+YAHOO_CACHE_PATH = "yahoo_cache.sqlite"
+INFO_TTL = 7 * 24 * 60 * 60  # seconds before a cached lookup is fetched again
+INFO_FIELDS = ["sector", "totalAssets", "category"]
+
+
+def fetch_yahoo_info(ticker):
+    """The INFO_FIELDS of a ticker's Yahoo Finance .info (missing fields are left out)."""
+    info = yf.Ticker(ticker).info or {}
+    return {field: info[field] for field in INFO_FIELDS if info.get(field) is not None}
+
+
+class InfoCache:
+    """SQLite-backed cache of info dicts by ticker; entries older than ttl seconds count as missing."""
+
+    def __init__(self, path=YAHOO_CACHE_PATH, ttl=INFO_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS info (ticker TEXT PRIMARY KEY, data TEXT, fetched_at REAL)"
+        )
+        self._conn.commit()
+
+    def get_many(self, tickers):
+        """{ticker: info} for the tickers with a fresh entry."""
+        cutoff = time.time() - self.ttl
+        found = {}
+        with self._lock:
+            tickers = list(tickers)
+            # Stay under SQLite's limit on query parameters
+            for start in range(0, len(tickers), 500):
+                chunk = tickers[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT ticker, data FROM info WHERE fetched_at >= ? "
+                    f"AND ticker IN ({', '.join('?' * len(chunk))})",
+                    [cutoff, *chunk],
+                )
+                for ticker, data in rows:
+                    found[ticker] = json.loads(data)
+        return found
+
+    def store_many(self, infos):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO info (ticker, data, fetched_at) VALUES (?, ?, ?)",
+                [(ticker, json.dumps(info), now) for ticker, info in infos.items()],
+            )
+            self._conn.commit()
+
+
+class YahooInfo:
+    """
+    Batched, cached Yahoo Finance lookups.
+
+    fetcher: function ticker -> info dict (defaults to fetch_yahoo_info); a fetcher that
+        raises is treated as "no info" for that ticker, and the failure is not cached
+    cache: InfoCache to serve and store lookups (None disables caching)
+    max_workers: how many tickers are fetched at once
+    """
+
+    def __init__(self, fetcher=fetch_yahoo_info, cache=None, max_workers=8):
+        self.fetcher = fetcher
+        self.cache = cache
+        self.max_workers = max_workers
+        self.fetched = 0
+
+    def _fetch(self, ticker):
+        try:
+            return ticker, self.fetcher(ticker)
+        except Exception:
+            return ticker, None
+
+    def info_for(self, tickers):
+        """{ticker: info dict} for every distinct, non-empty ticker given."""
+        tickers = sorted({ticker for ticker in tickers if isinstance(ticker, str) and ticker})
+        infos = self.cache.get_many(tickers) if self.cache is not None else {}
+        missing = [ticker for ticker in tickers if ticker not in infos]
+        if missing:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="yahoo") as pool:
+                fetched = {ticker: info for ticker, info in pool.map(self._fetch, missing) if info is not None}
+            self.fetched += len(missing)
+            if self.cache is not None and fetched:
+                self.cache.store_many(fetched)
+            infos.update(fetched)
+        return {ticker: infos.get(ticker, {}) for ticker in tickers}
+
+    def info_frame(self, tickers):
+        """
+        The lookups as a DataFrame indexed by ticker, with the display columns get_filings.py
+        uses: "Sector/Industry", "Assets Under Management (AUM)" (e.g. "$12.34B") and "Fund Type".
+        """
+        infos = self.info_for(tickers)
+        raw = pd.DataFrame.from_dict(infos, orient="index", columns=INFO_FIELDS)
+        aum = pd.to_numeric(raw["totalAssets"], errors="coerce")
+        return pd.DataFrame({
+            "Sector/Industry": raw["sector"].fillna("N/A"),
+            "Assets Under Management (AUM)": (aum / 1e9).map("${:.2f}B".format).where(aum.notna(), "N/A"),
+            "Fund Type": raw["category"].fillna("N/A"),
+        }, index=raw.index)
+
+    def enrich(self, frame, ticker_column="Ticker Symbol"):
+        """A copy of frame with the info_frame columns joined on ticker_column ("N/A" when unknown)."""
+        frame = frame.copy()
+        info = self.info_frame(frame[ticker_column].dropna().unique())
+        for column in info.columns:
+            frame[column] = frame[ticker_column].map(info[column]).fillna("N/A")
+        return frame
+
+
+_yahoo = None
+_yahoo_lock = threading.Lock()
+
+
+def get_yahoo(cache_path=YAHOO_CACHE_PATH):
+    """
+    Returns the process-wide YahooInfo, creating it on first use.
+    Lookups are cached in cache_path (None disables the cache); the argument only takes
+    effect on that first call.
+    """
+    global _yahoo
+    if _yahoo is None:
+        with _yahoo_lock:
+            if _yahoo is None:
+                _yahoo = YahooInfo(cache=InfoCache(cache_path) if cache_path else None)
+    return _yahoo